@@ -1,20 +1,38 @@
 import customtkinter as ctk
 import sqlite3
 import threading
+import heapq
+import re
+import abc
+import gc
+import queue
+import argparse
+import math
+import random
 import webbrowser
 import time
 import datetime
 import pygame
 import json
+import csv
 import os
 import subprocess
 import numpy as np
 from plyer import notification
 from dateutil.relativedelta import relativedelta
-from tkinter import messagebox
+from tkinter import messagebox, filedialog, TclError, Misc
 import sys
 import tempfile
+import shutil
+import urllib.request
 import socket
+import uuid
+import hashlib
+import pathlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, groupby, repeat
+from operator import itemgetter
 
 # Port for single-instance communication
 FOCUSPRO_PORT = 65432
@@ -45,61 +63,3136 @@ def bring_window_to_front():
             except:
                 pass
 
-def start_single_instance_server(bring_to_front_callback):
-    """Persistent local socket server to receive 'focus' commands and bring app to front."""
-    def server():
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            s.bind(("localhost", FOCUSPRO_PORT))
-            s.listen(5)
-            s.settimeout(1)  # Add timeout to prevent hanging
-            while True:
+class SingleInstanceServer:
+    """Local socket server that brings the window to the front when a second launch sends 'focus'.
+
+    One listening socket serves the whole run: a connection that fails or
+    stalls is dropped and the next one accepted. Only when the port cannot
+    be bound (or the socket itself fails) is it opened again, backing off
+    up to RETRY_MAX_SECONDS between attempts.
+    """
+    RETRY_MAX_SECONDS = 60
+
+    def __init__(self, callback, port=FOCUSPRO_PORT):
+        self.callback = callback
+        self.port = port  # 0 picks a free port; the bound one is stored here
+        self.binds = 0  # listening sockets opened so far
+        self.handled = 0  # connections served
+        self.closed = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.closed.set()
+        self.thread.join(timeout=2)
+
+    def _run(self):
+        delay = 1
+        while not self.closed.is_set():
+            try:
+                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                    if sys.platform != "win32":  # On Windows it would let a second instance share the port
+                        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                    s.bind(("localhost", self.port))
+                    s.listen(5)
+                    s.settimeout(1)  # Check for close() once a second
+                    self.port = s.getsockname()[1]
+                    self.binds += 1
+                    delay = 1
+                    self._serve(s)
+            except OSError as e:
+                print(f"Single-instance server: {e}")
+                self.closed.wait(delay)
+                delay = min(delay * 2, self.RETRY_MAX_SECONDS)
+
+    def _serve(self, s):
+        while not self.closed.is_set():
+            try:
+                conn, _ = s.accept()
+            except socket.timeout:
+                continue
+            except ConnectionError:
+                continue  # The client gave up before we accepted
+            with conn:
                 try:
-                    conn, _ = s.accept()
-                    with conn:
-                        data = conn.recv(1024)
-                        if data == b"focus":
-                            bring_to_front_callback()
-                except socket.timeout:
-                    continue  # Just continue on timeout
-                except:
-                    break  # Break on other errors to restart server
-
-    # Start server in a daemon thread that will restart if it crashes
-    def server_wrapper():
-        while True:
+                    conn.settimeout(1)  # A client that never writes must not stall the server
+                    if conn.recv(1024) == b"focus":
+                        self.callback()
+                except Exception as e:
+                    print(f"Single-instance request failed: {e}")
+            self.handled += 1
+
+def get_appdata_path():
+    """Get the appropriate user application data directory."""
+    if sys.platform == "win32":
+        return os.path.join(os.environ["APPDATA"], "RemeiniumFocusPro")
+    elif sys.platform == "darwin": # macOS
+        return os.path.join(os.path.expanduser("~/Library/Application Support"), "RemeiniumFocusPro")
+    else: # Linux and other Unix-like systems
+        xdg_data_home = os.environ.get("XDG_DATA_HOME", os.path.join(os.path.expanduser("~"), ".local", "share"))
+        app_data_path = os.path.join(xdg_data_home, "RemeiniumFocusPro")
+
+        os.makedirs(app_data_path, exist_ok=True)
+        return app_data_path
+
+def open_file(filepath):
+    if sys.platform.startswith("darwin"):  # macOS
+        subprocess.call(('open', filepath))
+    elif sys.platform.startswith("win"):
+        os.startfile(filepath)
+    else:  # Linux
+        subprocess.call(('xdg-open', filepath))
+
+class UIDispatcher:
+    """Marshal widget updates from worker threads onto the Tk thread.
+
+    Background threads never touch widgets directly; they post() a callable
+    instead. A single pump running on the Tk event loop drains the pending
+    updates once per frame. Updates posted under the same key are coalesced,
+    so only the latest state for each widget is applied per frame.
+    """
+    FRAME_MS = 16    # ~60 fps while updates are flowing
+    IDLE_MS = 100    # Back off to this poll interval when nothing is pending
+    HIDDEN_IDLE_MS = 1000  # Idle poll interval while the window is hidden
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._pending = {}  # key -> (func, args, kwargs), in posting order
+        self._sequence = 0
+        self._interval = self.IDLE_MS
+        self._idle_ms = self.IDLE_MS
+        self._after_id = None
+
+    def post(self, key, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) for the Tk thread (safe from any thread).
+
+        Use a key such as "timer_label" for state updates that can be
+        coalesced; key=None queues a one-off call that always runs.
+        """
+        with self._lock:
+            if key is None:
+                self._sequence += 1
+                key = ("call", self._sequence)
+            # A coalesced key keeps the slot of its first post this frame, so the
+            # newest state still runs ahead of one-off calls posted after that
+            self._pending[key] = (func, args, kwargs)
+
+    def start(self):
+        """Start the pump (Tk thread only)"""
+        if self._after_id is None:
+            self._after_id = self.root.after(self.FRAME_MS, self.pump)
+
+    def stop(self):
+        """Stop the pump (Tk thread only)"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def set_idle_interval(self, ms):
+        """Change how often the pump polls when nothing is pending"""
+        self._idle_ms = ms
+
+    def pump(self):
+        """Apply all pending updates, then reschedule"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        for func, args, kwargs in pending.values():
             try:
-                server()
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"UI update error: {e}")
+
+        if pending:
+            self._interval = self.FRAME_MS
+        else:
+            self._interval = min(self._interval * 2, self._idle_ms)
+        self._after_id = self.root.after(self._interval, self.pump)
+
+class Countdown:
+    """A single named countdown tracked by TimerScheduler"""
+    __slots__ = ("name", "duration", "deadline", "remaining", "paused", "generation")
+
+    def __init__(self, name, duration, deadline):
+        self.name = name
+        self.duration = duration
+        self.deadline = deadline
+        self.remaining = duration
+        self.paused = False
+        self.generation = 0
+
+class TimerScheduler:
+    """Any number of named countdowns ordered by monotonic deadline.
+
+    Running countdowns sit in a heap keyed by deadline, so the owner only
+    needs one wakeup source: sleep until next_deadline(), then collect
+    pop_expired(). Each heap entry carries a scheduler-wide sequence number
+    that the countdown records as its generation; pausing, resuming,
+    cancelling or replacing it leaves the old entry to be discarded lazily,
+    even when a new countdown reuses the name.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.timers = {}  # name -> Countdown, in creation order
+        self._heap = []   # (deadline, sequence, name)
+        self._sequence = 0
+
+    def _push(self, timer):
+        self._sequence += 1
+        timer.generation = self._sequence
+        heapq.heappush(self._heap, (timer.deadline, self._sequence, timer.name))
+
+    def _is_live(self, entry):
+        timer = self.timers.get(entry[2])
+        return timer is not None and not timer.paused and timer.generation == entry[1]
+
+    def add(self, name, duration):
+        """Start a countdown of duration seconds (replaces one with the same name)"""
+        timer = Countdown(name, duration, self.clock() + duration)
+        self.timers[name] = timer
+        self._push(timer)
+        return timer
+
+    def pause(self, name):
+        timer = self.timers.get(name)
+        if timer and not timer.paused:
+            timer.remaining = max(0.0, timer.deadline - self.clock())
+            timer.paused = True
+            timer.generation = 0  # No heap entry carries sequence 0
+
+    def resume(self, name):
+        timer = self.timers.get(name)
+        if timer and timer.paused:
+            timer.paused = False
+            timer.deadline = self.clock() + timer.remaining
+            self._push(timer)
+
+    def cancel(self, name):
+        self.timers.pop(name, None)
+
+    def remaining(self, name):
+        """Seconds left on a countdown (0 once expired)"""
+        timer = self.timers[name]
+        if timer.paused:
+            return timer.remaining
+        return max(0.0, timer.deadline - self.clock())
+
+    def next_deadline(self):
+        """Earliest deadline among running countdowns, or None"""
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def next_wakeup_delay(self):
+        """Seconds until the next deadline or whole display second, or None when idle"""
+        deadline = self.next_deadline()
+        if deadline is None:
+            return None
+        left = max(0.0, deadline - self.clock())
+        return min(left, (left % 1.0) or 1.0)
+
+    def pop_expired(self):
+        """Remove and return every countdown whose deadline has passed"""
+        now = self.clock()
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                expired.append(self.timers.pop(entry[2]))
+        return expired
+
+def next_tick_delay(remaining, checkpoint_in, visible):
+    """Seconds until the focus timer thread should wake next.
+
+    While the window is visible the countdown redraws on every whole second.
+    When it is minimized or unfocused only minute boundaries of the countdown
+    and checkpoints wake the thread. The deadline itself is always hit exactly.
+    """
+    if visible:
+        step = remaining % 1.0 or 1.0
+    else:
+        step = remaining % 60.0 or 60.0
+    return max(0.0, min(step, checkpoint_in, remaining))
+
+class Clock:
+    """Where the focus timer and the data it writes get the time from.
+
+    FocusSessionEngine reads wall time, the monotonic timer and today's
+    date only through a Clock and sleeps only in wait(), so a
+    SimulatedClock can run it far faster than real time.
+    """
+
+    def time(self):
+        """Unix seconds (event timestamps)"""
+        return time.time()
+
+    def monotonic(self):
+        """Seconds for measuring the countdown"""
+        return time.monotonic()
+
+    def now(self):
+        """Local wall-clock datetime (session start times, hours of the day)"""
+        return datetime.datetime.now()
+
+    def today(self):
+        return datetime.date.today()
+
+    def wait(self, event, timeout=None):
+        """Block until `event` is set or `timeout` seconds pass; True if it was set"""
+        return event.wait(timeout)
+
+class SimulatedClock(Clock):
+    """A Clock that only moves when waited on or advanced.
+
+    wait() returns immediately: time jumps to the timeout, or to the next
+    action scheduled with at() if that comes first. Actions are what would
+    otherwise arrive from the user (pause, resume, stop); once one sets the
+    event being waited on, wait() returns True like Event.wait() would.
+    """
+
+    def __init__(self, start):
+        self.start = start.timestamp()  # `start` is a local datetime
+        self.elapsed = 0.0
+        self.actions = []  # heap of (elapsed seconds, sequence, callback)
+        self.sequence = 0
+
+    def time(self):
+        return self.start + self.elapsed
+
+    def monotonic(self):
+        return self.elapsed
+
+    def now(self):
+        return datetime.datetime.fromtimestamp(self.time())
+
+    def today(self):
+        return self.now().date()
+
+    def at(self, elapsed, callback):
+        """Run callback() once the clock reaches `elapsed` (a monotonic() value)"""
+        heapq.heappush(self.actions, (elapsed, self.sequence, callback))
+        self.sequence += 1
+
+    def advance(self, seconds):
+        """Move forward by `seconds`, running the actions that fall due"""
+        self.wait(threading.Event(), seconds)
+
+    def wait(self, event, timeout=None):
+        if event.is_set():
+            return True
+        deadline = None if timeout is None else self.elapsed + timeout
+        while self.actions and (deadline is None or self.actions[0][0] <= deadline):
+            elapsed, _, callback = heapq.heappop(self.actions)
+            self.elapsed = max(self.elapsed, elapsed)
+            callback()
+            if event.is_set():
+                return True
+        if deadline is None:
+            raise RuntimeError("Waiting without a timeout on a simulated clock with no action scheduled")
+        self.elapsed = deadline
+        return False
+
+class NotificationBackend(abc.ABC):
+    """Delivers one notification; send() may block, the service bounds it with `timeout`"""
+    name = "backend"
+    timeout = 2.0  # seconds
+
+    @abc.abstractmethod
+    def send(self, title, message):
+        """Deliver one notification (called on a worker thread)"""
+
+class PlyerBackend(NotificationBackend):
+    """Desktop notification through plyer (notify-send / D-Bus / Win32 toast)"""
+    name = "plyer"
+    timeout = 3.0
+
+    def send(self, title, message):
+        notification.notify(
+            title=title,
+            message=message,
+            app_name="Focus Session Pro",
+            timeout=5
+        )
+
+class SoundBackend(NotificationBackend):
+    """Plays the notification sound, loaded once and reused"""
+    name = "sound"
+    timeout = 1.0
+
+    def __init__(self, sound_path):
+        self.sound_path = sound_path
+        self.sound = None
+
+    def send(self, title, message):
+        try:
+            # Initialize mixer if not already done
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            if self.sound is None:
+                self.sound = pygame.mixer.Sound(self.sound_path)
+            self.sound.play()
+        except Exception as e:
+            print(f"Error playing sound: {e}")
+            # Fallback to built-in sound
+            try:
+                import winsound
+                winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
             except:
-                time.sleep(1)  # Wait a second before restarting
+                print("No fallback sound available")
+
+class LocalStubBackend(NotificationBackend):
+    """Records notifications in memory; `delay` simulates a slow desktop backend"""
+    name = "stub"
+
+    def __init__(self, delay=0.0, timeout=2.0):
+        self.delay = delay
+        self.timeout = timeout
+        self.sent = []
+
+    def send(self, title, message):
+        if self.delay:
+            time.sleep(self.delay)
+        self.sent.append((title, message))
+
+class NotificationService:
+    """Delivers notifications on a worker thread so the Tk thread never blocks.
+
+    notify() only enqueues. The worker waits COALESCE_SECONDS after the first
+    notification of a burst and merges everything that arrived meanwhile into
+    one notification, which each backend then gets at most `timeout` seconds
+    to deliver.
+    """
+    COALESCE_SECONDS = 1.0
+
+    def __init__(self, backends, coalesce_seconds=None):
+        self.backends = backends
+        self.coalesce_seconds = self.COALESCE_SECONDS if coalesce_seconds is None else coalesce_seconds
+        self.queue = queue.Queue()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def notify(self, title, message):
+        """Queue a notification (safe from any thread, never blocks)"""
+        self.queue.put((title, message))
+
+    def close(self):
+        self.queue.put(None)
+        self.worker.join(timeout=1)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.coalesce_seconds
+            while True:
+                wait = deadline - time.monotonic()
+                if wait <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=wait)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._deliver(*self.merge(batch))
+                    return
+                batch.append(item)
+            self._deliver(*self.merge(batch))
+
+    @staticmethod
+    def merge(batch):
+        """Combine a burst of (title, message) pairs into one"""
+        if len(batch) == 1:
+            return batch[0]
+        return " • ".join(title for title, _ in batch), "\n".join(message for _, message in batch)
+
+    def _deliver(self, title, message):
+        # Each backend runs on its own daemon thread so a hung one is abandoned
+        # after its timeout instead of stalling the rest (or app exit)
+        for backend in self.backends:
+            thread = threading.Thread(target=self._send, args=(backend, title, message), daemon=True)
+            thread.start()
+            thread.join(backend.timeout)
+            if thread.is_alive():
+                print(f"Notification backend '{backend.name}' timed out")
+
+    @staticmethod
+    def _send(backend, title, message):
+        try:
+            backend.send(title, message)
+        except Exception as e:
+            print(f"Notification error ({backend.name}): {e}")
+
+# Session event kinds, stored as small integers in session_events.kind
+EVENT_START = 0
+EVENT_PAUSE = 1
+EVENT_RESUME = 2
+EVENT_CHECKPOINT = 3
+EVENT_STOP = 4
+
+# sessions store local wall-clock time as integers: days / seconds since 1970-01-01
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+def epoch_day(date):
+    """date -> days since 1970-01-01"""
+    return date.toordinal() - EPOCH_ORDINAL
+
+def day_to_date(day):
+    return datetime.date.fromordinal(day + EPOCH_ORDINAL)
+
+def local_seconds(dt):
+    """Naive local datetime -> wall-clock seconds since 1970-01-01 (no timezone shift)"""
+    return (dt.toordinal() - EPOCH_ORDINAL) * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second
+
+def timestamp_to_local_seconds(ts):
+    """Unix seconds (event log) -> local wall-clock seconds (sessions columns)"""
+    return local_seconds(datetime.datetime.fromtimestamp(ts))
+
+def migration_session_events(conn):
+    """Add the append-only session event log and backfill it from sessions"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS session_events (
+            id INTEGER PRIMARY KEY,
+            session_id INTEGER NOT NULL,
+            kind INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            elapsed INTEGER NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_session_events_session
+        ON session_events (session_id, id)
+    """)
+    conn.execute("ALTER TABLE sessions ADD COLUMN paused INTEGER NOT NULL DEFAULT 0")
+
+    backfill_session_events(conn)
+
+def backfill_session_events(conn, after_id=0, session_ids=()):
+    """Synthesize start/stop events for sessions rows (id > after_id or in session_ids) that have no event log"""
+    # Such rows only know their start, focused minutes and (maybe) end; the
+    # 'utc' modifier converts their local ISO times to unix seconds
+    conn.execute("""
+        CREATE TEMP TABLE backfill AS
+        SELECT id, CAST(strftime('%s', start_time, 'utc') AS INTEGER) AS start_ts,
+               CAST(strftime('%s', end_time, 'utc') AS INTEGER) AS end_ts,
+               completed * 60 AS elapsed
+        FROM sessions s
+        WHERE (id > ? OR id IN (SELECT value FROM json_each(?)))
+        AND strftime('%s', start_time, 'utc') IS NOT NULL
+        AND NOT EXISTS (SELECT 1 FROM session_events e WHERE e.session_id = s.id)
+    """, (after_id, json.dumps(list(session_ids))))
+    conn.execute("""
+        INSERT INTO session_events (session_id, kind, ts, elapsed)
+        SELECT id, ?, start_ts, 0 FROM backfill ORDER BY id
+    """, (EVENT_START,))
+    conn.execute("""
+        INSERT INTO session_events (session_id, kind, ts, elapsed)
+        SELECT id, CASE WHEN end_ts IS NULL THEN ? ELSE ? END,
+               COALESCE(end_ts, start_ts + elapsed), elapsed
+        FROM backfill ORDER BY id
+    """, (EVENT_CHECKPOINT, EVENT_STOP))
+    conn.execute("DROP TABLE temp.backfill")
+
+def migration_session_natural_key(conn):
+    """Deduplicate sessions and enforce the (start_time, task_category) natural key"""
+    duplicates = """
+        SELECT id FROM sessions WHERE id NOT IN (
+            SELECT MIN(id) FROM sessions GROUP BY start_time, task_category
+        )
+    """
+    conn.execute(f"DELETE FROM session_events WHERE session_id IN ({duplicates})")
+    conn.execute(f"DELETE FROM sessions WHERE id IN ({duplicates})")
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_natural_key
+        ON sessions (start_time, task_category)
+    """)
+
+def migration_daily_totals(conn):
+    """Add the per-day, per-category rollup that analytics read from"""
+    # archived_* hold the part contributed by rows moved to yearly archives
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            date TEXT NOT NULL,
+            task_category TEXT NOT NULL,
+            minutes INTEGER NOT NULL DEFAULT 0,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            archived_minutes INTEGER NOT NULL DEFAULT 0,
+            archived_sessions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, task_category)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO daily_totals (date, task_category, minutes, sessions)
+        SELECT date, task_category, SUM(completed), COUNT(*)
+        FROM sessions GROUP BY date, task_category
+    """)
+
+def spread_natural_key(conn, key):
+    """Move sessions that share (start_ts, key) to the next free second, so the unique index can be built"""
+    # Start times used to keep microseconds; two sessions in the same second
+    # collide once truncated. Shifting the later one keeps both sessions and
+    # daily_totals' counts intact, where merging them would not.
+    conn.execute(f"CREATE INDEX idx_sessions_spread ON sessions (start_ts, {key})")
+    while conn.execute(f"""
+        UPDATE sessions SET start_ts = start_ts + 1 WHERE id IN (
+            SELECT s.id FROM sessions s JOIN sessions t
+            ON t.start_ts = s.start_ts AND t.{key} = s.{key} AND t.id < s.id
+        )
+    """).rowcount:
+        pass
+    conn.execute("DROP INDEX idx_sessions_spread")
+
+def migration_integer_times(conn):
+    """Store sessions/daily_totals dates and times as integers, keeping the ISO text as generated columns"""
+    conn.execute("""
+        CREATE TABLE sessions_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day INTEGER NOT NULL,
+            task_category TEXT NOT NULL,
+            duration INTEGER NOT NULL,
+            completed INTEGER NOT NULL,
+            start_ts INTEGER NOT NULL,
+            end_ts INTEGER,
+            paused INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            date TEXT GENERATED ALWAYS AS (date(day * 86400, 'unixepoch')) VIRTUAL,
+            start_time TEXT GENERATED ALWAYS AS (strftime('%Y-%m-%dT%H:%M:%S', start_ts, 'unixepoch')) VIRTUAL,
+            end_time TEXT GENERATED ALWAYS AS (strftime('%Y-%m-%dT%H:%M:%S', end_ts, 'unixepoch')) VIRTUAL
+        )
+    """)
+    # strftime('%s') without 'utc' keeps the wall-clock value, matching local_seconds()
+    conn.execute("""
+        INSERT INTO sessions_new (id, day, task_category, duration, completed, start_ts, end_ts, paused, created_at)
+        SELECT id, CAST(julianday(date) - 2440587.5 AS INTEGER), task_category, duration, completed,
+               COALESCE(CAST(strftime('%s', start_time) AS INTEGER),
+                        CAST(strftime('%s', date) AS INTEGER)),
+               CAST(strftime('%s', end_time) AS INTEGER), paused, created_at
+        FROM sessions
+    """)
+    conn.execute("DROP TABLE sessions")
+    conn.execute("ALTER TABLE sessions_new RENAME TO sessions")
+    spread_natural_key(conn, "task_category")
+    conn.execute("CREATE UNIQUE INDEX idx_sessions_natural_key ON sessions (start_ts, task_category)")
+    conn.execute("CREATE INDEX idx_sessions_day ON sessions (day)")
+
+    conn.execute("""
+        CREATE TABLE daily_totals_new (
+            day INTEGER NOT NULL,
+            task_category TEXT NOT NULL,
+            minutes INTEGER NOT NULL DEFAULT 0,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            archived_minutes INTEGER NOT NULL DEFAULT 0,
+            archived_sessions INTEGER NOT NULL DEFAULT 0,
+            date TEXT GENERATED ALWAYS AS (date(day * 86400, 'unixepoch')) VIRTUAL,
+            PRIMARY KEY (day, task_category)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO daily_totals_new (day, task_category, minutes, sessions, archived_minutes, archived_sessions)
+        SELECT CAST(julianday(date) - 2440587.5 AS INTEGER), task_category,
+               minutes, sessions, archived_minutes, archived_sessions
+        FROM daily_totals
+    """)
+    conn.execute("DROP TABLE daily_totals")
+    conn.execute("ALTER TABLE daily_totals_new RENAME TO daily_totals")
+
+# Seeded into the categories table; colors match the analytics chart
+DEFAULT_CATEGORIES = (
+    ("Maths", "#3b82f6"),
+    ("Physics", "#f2f763"),
+    ("ICT", "#f5517a"),
+    ("General", "#a37ef7"),
+)
+DEFAULT_CATEGORY_COLOR = "#9ca3af"
+
+def migration_categories(conn):
+    """Dictionary-encode task categories: sessions/daily_totals store a categories.id"""
+    conn.execute(f"""
+        CREATE TABLE categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            color TEXT NOT NULL DEFAULT '{DEFAULT_CATEGORY_COLOR}',
+            archived INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.executemany("INSERT INTO categories (name, color) VALUES (?, ?)", DEFAULT_CATEGORIES)
+    conn.execute("""
+        INSERT OR IGNORE INTO categories (name)
+        SELECT task_category FROM sessions UNION SELECT task_category FROM daily_totals
+    """)
+
+    conn.execute("""
+        CREATE TABLE sessions_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day INTEGER NOT NULL,
+            category_id INTEGER NOT NULL REFERENCES categories (id),
+            duration INTEGER NOT NULL,
+            completed INTEGER NOT NULL,
+            start_ts INTEGER NOT NULL,
+            end_ts INTEGER,
+            paused INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            date TEXT GENERATED ALWAYS AS (date(day * 86400, 'unixepoch')) VIRTUAL,
+            start_time TEXT GENERATED ALWAYS AS (strftime('%Y-%m-%dT%H:%M:%S', start_ts, 'unixepoch')) VIRTUAL,
+            end_time TEXT GENERATED ALWAYS AS (strftime('%Y-%m-%dT%H:%M:%S', end_ts, 'unixepoch')) VIRTUAL
+        )
+    """)
+    conn.execute("""
+        INSERT INTO sessions_new (id, day, category_id, duration, completed, start_ts, end_ts, paused, created_at)
+        SELECT s.id, s.day, c.id, s.duration, s.completed, s.start_ts, s.end_ts, s.paused, s.created_at
+        FROM sessions s JOIN categories c ON c.name = s.task_category
+    """)
+    conn.execute("DROP TABLE sessions")
+    conn.execute("ALTER TABLE sessions_new RENAME TO sessions")
+    spread_natural_key(conn, "category_id")
+    conn.execute("CREATE UNIQUE INDEX idx_sessions_natural_key ON sessions (start_ts, category_id)")
+    conn.execute("CREATE INDEX idx_sessions_day ON sessions (day)")
+
+    conn.execute("""
+        CREATE TABLE daily_totals_new (
+            day INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            minutes INTEGER NOT NULL DEFAULT 0,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            archived_minutes INTEGER NOT NULL DEFAULT 0,
+            archived_sessions INTEGER NOT NULL DEFAULT 0,
+            date TEXT GENERATED ALWAYS AS (date(day * 86400, 'unixepoch')) VIRTUAL,
+            PRIMARY KEY (day, category_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO daily_totals_new (day, category_id, minutes, sessions, archived_minutes, archived_sessions)
+        SELECT d.day, c.id, d.minutes, d.sessions, d.archived_minutes, d.archived_sessions
+        FROM daily_totals d JOIN categories c ON c.name = d.task_category
+    """)
+    conn.execute("DROP TABLE daily_totals")
+    conn.execute("ALTER TABLE daily_totals_new RENAME TO daily_totals")
+
+    # Sessions with their category name, in the column layout of exports and archives
+    conn.execute("""
+        CREATE VIEW session_records AS
+        SELECT s.id, s.day, s.date, c.name AS task_category, s.duration, s.completed,
+               s.start_time, s.end_time, s.paused
+        FROM sessions s JOIN categories c ON c.id = s.category_id
+    """)
+
+def migration_sync_log(conn):
+    """Version every sessions row with a (Lamport clock, device) stamp for delta sync"""
+    # One row: this install's UUID and logical clock. While `merging` is set
+    # the triggers stand aside so merged rows keep their origin's stamp.
+    conn.execute("""
+        CREATE TABLE sync_state (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            device TEXT NOT NULL,
+            clock INTEGER NOT NULL,
+            exported_clock INTEGER NOT NULL DEFAULT 0,
+            merging INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("INSERT INTO sync_state (id, device, clock) VALUES (0, ?, 1)", (str(uuid.uuid4()),))
+    conn.execute("""
+        CREATE TABLE sync_log (
+            session_id INTEGER PRIMARY KEY,
+            clock INTEGER NOT NULL,
+            device TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX idx_sync_log_device ON sync_log (device, clock)")
+    # Change-set files already merged; shared folders may deliver them out of order
+    conn.execute("""
+        CREATE TABLE sync_applied (
+            device TEXT NOT NULL,
+            clock INTEGER NOT NULL,
+            PRIMARY KEY (device, clock)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("INSERT INTO sync_log (session_id, clock, device) SELECT s.id, 1, device FROM sessions s, sync_state")
+
+    stamp = """
+        UPDATE sync_state SET clock = clock + 1;
+        INSERT OR REPLACE INTO sync_log (session_id, clock, device)
+        SELECT new.id, clock, device FROM sync_state;
+    """
+    conn.execute(f"""
+        CREATE TRIGGER sync_sessions_insert AFTER INSERT ON sessions
+        WHEN (SELECT merging FROM sync_state) = 0
+        BEGIN {stamp} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER sync_sessions_update
+        AFTER UPDATE OF category_id, duration, completed, end_ts, paused ON sessions
+        WHEN (SELECT merging FROM sync_state) = 0
+        BEGIN {stamp} END
+    """)
+    conn.execute("""
+        CREATE TRIGGER sync_sessions_delete AFTER DELETE ON sessions
+        BEGIN DELETE FROM sync_log WHERE session_id = old.id; END
+    """)
+
+DEFAULT_DAILY_GOAL_HOURS = 8
+DEFAULT_MONTHLY_GOAL_HOURS = 100
+
+def migration_goal_history(conn):
+    """Effective-dated daily goals and a goal-met bitmap of closed days"""
+    conn.execute("""
+        CREATE TABLE goal_history (
+            effective_day INTEGER PRIMARY KEY,
+            minutes INTEGER NOT NULL
+        )
+    """)
+    # The one goal known so far applies to all of history
+    row = conn.execute("SELECT value FROM settings WHERE key = 'daily_goal'").fetchone()
+    conn.execute("INSERT INTO goal_history (effective_day, minutes) VALUES (0, ?)",
+                 (int(row[0]) * 60 if row else DEFAULT_DAILY_GOAL_HOURS * 60,))
+    # One row per year; bit n of `bits` (little-endian) is day n of that year
+    conn.execute("""
+        CREATE TABLE goal_met (
+            year INTEGER PRIMARY KEY,
+            bits BLOB NOT NULL
+        )
+    """)
+    yesterday = epoch_day(datetime.date.today()) - 1
+    conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('goal_closed_through', ?)", (str(yesterday),))
+    update_goal_met(conn, [row[0] for row in conn.execute("SELECT DISTINCT day FROM daily_totals")])
+
+def migration_hour_buckets(conn):
+    """Add focused seconds per local hour and category, replayed from the event log"""
+    conn.execute("""
+        CREATE TABLE hour_buckets (
+            day INTEGER NOT NULL,
+            hour INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            seconds INTEGER NOT NULL,
+            PRIMARY KEY (day, hour, category_id)
+        ) WITHOUT ROWID
+    """)
+    replay_hour_buckets(conn, after_id=0)
+
+def migration_session_notes(conn):
+    """Add a free-text note per session with an FTS5 index kept in step by triggers"""
+    conn.execute("ALTER TABLE sessions ADD COLUMN note TEXT")
+    conn.execute("DROP VIEW session_records")
+    conn.execute("""
+        CREATE VIEW session_records AS
+        SELECT s.id, s.day, s.date, c.name AS task_category, s.duration, s.completed,
+               s.start_time, s.end_time, s.paused, s.note
+        FROM sessions s JOIN categories c ON c.id = s.category_id
+    """)
+    # External content: the text lives once, in sessions.note; prefix
+    # indexes make search-as-you-type prefixes ("integ*") cheap
+    conn.execute("""
+        CREATE VIRTUAL TABLE session_notes USING fts5(
+            note, content='sessions', content_rowid='id', prefix='2 3'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER session_notes_insert AFTER INSERT ON sessions
+        WHEN new.note IS NOT NULL BEGIN
+            INSERT INTO session_notes (rowid, note) VALUES (new.id, new.note);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER session_notes_delete AFTER DELETE ON sessions
+        WHEN old.note IS NOT NULL BEGIN
+            INSERT INTO session_notes (session_notes, rowid, note) VALUES ('delete', old.id, old.note);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER session_notes_update AFTER UPDATE OF note ON sessions BEGIN
+            INSERT INTO session_notes (session_notes, rowid, note)
+            SELECT 'delete', old.id, old.note WHERE old.note IS NOT NULL;
+            INSERT INTO session_notes (rowid, note) SELECT new.id, new.note WHERE new.note IS NOT NULL;
+        END
+    """)
+
+def migration_session_tags(conn):
+    """Add free-form tags per session (many-to-many), exposed to exports as session_records.tags"""
+    conn.execute("""
+        CREATE TABLE tags (
+            id INTEGER PRIMARY KEY,
+            dimension TEXT NOT NULL COLLATE NOCASE,  -- "course" of "course:calc2"; '' for a plain tag
+            value TEXT NOT NULL COLLATE NOCASE,
+            UNIQUE (dimension, value)
+        )
+    """)
+    # The primary key serves "tags of a session", the index "sessions with a
+    # tag" already in session order, which is what INTERSECT merges on
+    conn.execute("""
+        CREATE TABLE session_tags (
+            session_id INTEGER NOT NULL,
+            tag_id INTEGER NOT NULL,
+            PRIMARY KEY (session_id, tag_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX idx_session_tags_tag ON session_tags (tag_id, session_id)")
+    # Sessions and focused minutes per tag and day, kept by the triggers
+    # below, so unfiltered facets never touch the sessions table
+    conn.execute("""
+        CREATE TABLE tag_totals (
+            day INTEGER NOT NULL,
+            tag_id INTEGER NOT NULL,
+            sessions INTEGER NOT NULL,
+            minutes INTEGER NOT NULL,
+            PRIMARY KEY (day, tag_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TRIGGER session_tags_insert AFTER INSERT ON session_tags BEGIN
+            INSERT INTO tag_totals (day, tag_id, sessions, minutes)
+            SELECT day, new.tag_id, 1, completed FROM sessions WHERE id = new.session_id
+            ON CONFLICT (day, tag_id) DO UPDATE SET sessions = sessions + 1, minutes = minutes + excluded.minutes;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER session_tags_remove AFTER DELETE ON session_tags BEGIN
+            UPDATE tag_totals SET sessions = sessions - 1,
+                                  minutes = minutes - (SELECT completed FROM sessions WHERE id = old.session_id)
+            WHERE day = (SELECT day FROM sessions WHERE id = old.session_id) AND tag_id = old.tag_id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER sessions_tag_totals AFTER UPDATE OF day, completed ON sessions
+        WHEN (old.day, old.completed) IS NOT (new.day, new.completed) BEGIN
+            UPDATE tag_totals SET sessions = sessions - 1, minutes = minutes - old.completed
+            WHERE day = old.day AND tag_id IN (SELECT tag_id FROM session_tags WHERE session_id = old.id);
+            INSERT INTO tag_totals (day, tag_id, sessions, minutes)
+            SELECT new.day, tag_id, 1, new.completed FROM session_tags WHERE session_id = new.id
+            ON CONFLICT (day, tag_id) DO UPDATE SET sessions = sessions + 1, minutes = minutes + excluded.minutes;
+        END
+    """)
+    # Deleting a session (History, compaction, sync) takes its tags along;
+    # BEFORE, so the tag_totals trigger can still read the session's day
+    conn.execute("""
+        CREATE TRIGGER session_tags_delete BEFORE DELETE ON sessions BEGIN
+            DELETE FROM session_tags WHERE session_id = old.id;
+        END
+    """)
+    conn.execute("DROP VIEW session_records")
+    conn.execute("""
+        CREATE VIEW session_records AS
+        SELECT s.id, s.day, s.date, c.name AS task_category, s.duration, s.completed,
+               s.start_time, s.end_time, s.paused, s.note,
+               (SELECT group_concat(CASE t.dimension WHEN '' THEN t.value ELSE t.dimension || ':' || t.value END, ' ')
+                FROM session_tags st JOIN tags t ON t.id = st.tag_id WHERE st.session_id = s.id) AS tags
+        FROM sessions s JOIN categories c ON c.id = s.category_id
+    """)
+
+# Sessions that arrive without a uuid get one derived from their natural key
+SESSION_KEY_NAMESPACE = uuid.UUID("72db7b4f-edf7-4ee7-9a56-48db74bb5b08")
+SESSION_KEY_HASH = hashlib.sha1(SESSION_KEY_NAMESPACE.bytes)
+
+def session_key_uuid(start_ts, category):
+    """Stable uuid hex for a session from its (start_ts, category name) natural key.
+
+    Sessions from before uuids, imported rows and older devices' change-sets
+    get the same uuid on every device. Registered as an SQL function of the
+    same name where the SQL needs it.
+    """
+    # uuid.uuid5(SESSION_KEY_NAMESPACE, ...).hex without building a UUID; imports call this per row
+    digest = SESSION_KEY_HASH.copy()
+    digest.update(f"{start_ts}|{category}".encode())
+    digest = digest.hexdigest()
+    return f"{digest[:12]}5{digest[13:16]}{'89ab'[int(digest[16], 16) & 3]}{digest[17:32]}"
+
+def migration_session_uuids(conn):
+    """Give every session a stable uuid to sync on, and keep tombstones of deleted sessions in sync_log"""
+    conn.create_function("session_key_uuid", 2, session_key_uuid, deterministic=True)
+    conn.execute("ALTER TABLE sessions ADD COLUMN uuid TEXT")
+    # Sync matched sessions by (start, category) until now, so a uuid
+    # derived from that key is the same on every device that has the session
+    conn.execute("""
+        UPDATE sessions SET uuid = session_key_uuid(start_ts, (SELECT name FROM categories c WHERE c.id = category_id))
+    """)
+    conn.execute("CREATE UNIQUE INDEX idx_sessions_uuid ON sessions (uuid)")
+
+    for trigger in ("insert", "update", "delete"):
+        conn.execute(f"DROP TRIGGER sync_sessions_{trigger}")
+    # session_id is NULL for a tombstone: a deleted session whose stamp still travels
+    conn.execute("""
+        CREATE TABLE sync_log_new (
+            uuid TEXT PRIMARY KEY,
+            session_id INTEGER UNIQUE,
+            clock INTEGER NOT NULL,
+            device TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        INSERT INTO sync_log_new (uuid, session_id, clock, device)
+        SELECT s.uuid, l.session_id, l.clock, l.device FROM sync_log l JOIN sessions s ON s.id = l.session_id
+    """)
+    conn.execute("DROP TABLE sync_log")
+    conn.execute("ALTER TABLE sync_log_new RENAME TO sync_log")
+    conn.execute("CREATE INDEX idx_sync_log_device ON sync_log (device, clock)")
+
+    # Sessions started here get a random uuid
+    conn.execute("""
+        CREATE TRIGGER sync_sessions_insert AFTER INSERT ON sessions
+        WHEN (SELECT merging FROM sync_state) = 0
+        BEGIN
+            UPDATE sessions SET uuid = lower(hex(randomblob(16))) WHERE id = new.id AND uuid IS NULL;
+            UPDATE sync_state SET clock = clock + 1;
+            INSERT OR REPLACE INTO sync_log (uuid, session_id, clock, device)
+            SELECT (SELECT uuid FROM sessions WHERE id = new.id), new.id, clock, device FROM sync_state;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER sync_sessions_update
+        AFTER UPDATE OF category_id, duration, completed, end_ts, paused ON sessions
+        WHEN (SELECT merging FROM sync_state) = 0
+        BEGIN
+            UPDATE sync_state SET clock = clock + 1;
+            INSERT OR REPLACE INTO sync_log (uuid, session_id, clock, device)
+            SELECT new.uuid, new.id, clock, device FROM sync_state;
+        END
+    """)
+    # Archiving and merges drop the row; delete_session() writes the tombstone
+    conn.execute("""
+        CREATE TRIGGER sync_sessions_delete AFTER DELETE ON sessions
+        BEGIN DELETE FROM sync_log WHERE session_id = old.id; END
+    """)
+
+def migration_sync_note_edits(conn):
+    """Stamp note edits for sync like the other session columns"""
+    # Until now a note changed on its own (History view) never left the device
+    conn.execute("DROP TRIGGER sync_sessions_update")
+    conn.execute("""
+        CREATE TRIGGER sync_sessions_update
+        AFTER UPDATE OF category_id, duration, completed, end_ts, paused, note ON sessions
+        WHEN (SELECT merging FROM sync_state) = 0
+        BEGIN
+            UPDATE sync_state SET clock = clock + 1;
+            INSERT OR REPLACE INTO sync_log (uuid, session_id, clock, device)
+            SELECT new.uuid, new.id, clock, device FROM sync_state;
+        END
+    """)
+
+# Applied in order; PRAGMA user_version records how many have run
+SCHEMA_MIGRATIONS = [
+    migration_session_events,
+    migration_session_natural_key,
+    migration_daily_totals,
+    migration_integer_times,
+    migration_categories,
+    migration_sync_log,
+    migration_goal_history,
+    migration_hour_buckets,
+    migration_session_notes,
+    migration_session_tags,
+    migration_session_uuids,
+    migration_sync_note_edits,
+]
+
+def migrate_database(conn):
+    """Bring the schema up to date, one transaction per migration"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, migration in enumerate(SCHEMA_MIGRATIONS[version:], start=version + 1):
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    if version < len(SCHEMA_MIGRATIONS) and conn.execute("PRAGMA freelist_count").fetchone()[0]:
+        # Table rebuilds leave the old pages on the freelist
+        conn.executescript("PRAGMA incremental_vacuum;")
+
+def project_session_events(events):
+    """Fold (kind, ts, elapsed) events into (focus_seconds, paused_seconds, end_ts)"""
+    focus_seconds = paused_seconds = 0
+    pause_started = end_ts = None
+    for kind, ts, elapsed in events:
+        focus_seconds = max(focus_seconds, elapsed)
+        if kind == EVENT_PAUSE:
+            pause_started = ts
+        elif kind in (EVENT_RESUME, EVENT_STOP) and pause_started is not None:
+            paused_seconds += ts - pause_started
+            pause_started = None
+        if kind == EVENT_STOP:
+            end_ts = ts
+    return focus_seconds, paused_seconds, end_ts
+
+def refresh_session_projection(conn, session_id):
+    """Re-derive a sessions row (completed, paused, end_ts) from its events"""
+    events = conn.execute(
+        "SELECT kind, ts, elapsed FROM session_events WHERE session_id = ? ORDER BY id",
+        (session_id,)
+    ).fetchall()
+    if not events:
+        return
+    focus_seconds, paused_seconds, end_ts = project_session_events(events)
+    conn.execute(
+        "UPDATE sessions SET completed = ?, paused = ?, end_ts = ? WHERE id = ?",
+        (focus_seconds // 60, paused_seconds,
+         timestamp_to_local_seconds(end_ts) if end_ts is not None else None, session_id)
+    )
+    row = conn.execute("SELECT day FROM sessions WHERE id = ?", (session_id,)).fetchone()
+    if row:
+        refresh_daily_totals(conn, [row[0]])
+
+# Focus runs from these events until the next one
+FOCUS_EVENT_KINDS = (EVENT_START, EVENT_RESUME, EVENT_CHECKPOINT)
+
+def focus_intervals(events, previous=None):
+    """(start, end) unix-second spans of focus between consecutive (kind, ts, elapsed) events.
+
+    `previous` is the last event already accounted for. The focused
+    seconds (elapsed delta) are placed at the end of each gap, so time
+    the timer wasn't counting (a suspended laptop) is left out.
+    """
+    for event in events:
+        _, ts, elapsed = event
+        if previous is not None and previous[0] in FOCUS_EVENT_KINDS:
+            focused = min(elapsed - previous[2], ts - previous[1])
+            if focused > 0:
+                yield ts - focused, ts
+        previous = event
+
+def add_hour_buckets(conn, intervals, sign=1):
+    """Add (category_id, start, end) focus spans to hour_buckets, split at local hour boundaries (no commit)"""
+    buckets = {}
+    for category_id, start, end in intervals:
+        offset = timestamp_to_local_seconds(start) - start
+        start, end = start + offset, end + offset
+        while start < end:
+            boundary = min(end, (start // 3600 + 1) * 3600)
+            key = (start // 86400, start % 86400 // 3600, category_id)
+            buckets[key] = buckets.get(key, 0) + boundary - start
+            start = boundary
+    conn.executemany("""
+        INSERT INTO hour_buckets (day, hour, category_id, seconds) VALUES (?, ?, ?, ?)
+        ON CONFLICT (day, hour, category_id) DO UPDATE SET seconds = seconds + excluded.seconds
+    """, [key + (sign * seconds,) for key, seconds in buckets.items()])
+    if sign < 0:
+        conn.execute("DELETE FROM hour_buckets WHERE seconds <= 0")
+
+def replay_hour_buckets(conn, after_id=None, session_ids=(), sign=1):
+    """Add (or with sign=-1 take back) the whole event logs of sessions rows (id > after_id or in session_ids)"""
+    floor = after_id if after_id is not None else sys.maxsize
+    # One query per condition: OR-ing them makes SQLite scan every session
+    query = """
+        SELECT s.id, s.category_id, e.kind, e.ts, e.elapsed
+        FROM sessions s JOIN session_events e ON e.session_id = s.id
+        WHERE {} ORDER BY s.id, e.id
+    """
+
+    def rows():
+        yield from conn.execute(query.format("s.id IN (SELECT value FROM json_each(?)) AND s.id <= ?"),
+                                (json.dumps(list(session_ids)), floor))
+        if after_id is not None:
+            yield from conn.execute(query.format("s.id > ?"), (floor,))
+
+    add_hour_buckets(conn, (
+        (category_id, start, end)
+        for (_, category_id), events in groupby(rows(), key=lambda row: row[:2])
+        for start, end in focus_intervals(event[2:] for event in events)
+    ), sign)
+
+def add_event_hour_buckets(conn, events):
+    """Add the focus ending at new (session_id, kind, ts, elapsed) events, before they are inserted (no commit)"""
+    intervals = []
+    for session_id, session_events in groupby(sorted(events, key=lambda event: event[0]), key=lambda event: event[0]):
+        row = conn.execute("""
+            SELECT s.category_id, e.kind, e.ts, e.elapsed
+            FROM sessions s LEFT JOIN session_events e ON e.session_id = s.id
+            WHERE s.id = ? ORDER BY e.id DESC LIMIT 1
+        """, (session_id,)).fetchone()
+        if row is None:
+            continue
+        previous = row[1:] if row[1] is not None else None
+        intervals.extend((row[0], start, end)
+                         for start, end in focus_intervals((event[1:] for event in session_events), previous))
+    add_hour_buckets(conn, intervals)
+
+def hourly_focus_by_date(conn):
+    """{YYYY-MM-DD: [focused minutes in each local hour 0-23]} from hour_buckets, for the heatmap"""
+    hours = {}
+    for date, hour, seconds in conn.execute("""
+        SELECT date(day * 86400, 'unixepoch'), hour, SUM(seconds)
+        FROM hour_buckets GROUP BY day, hour
+    """):
+        hours.setdefault(date, [0] * 24)[hour] = round(seconds / 60)
+    return hours
+
+# Third-party files the analytics page loads, pinned to exact versions. They
+# are committed in vendor/ next to graph.html (`python FocusPro.py fetch-assets`
+# downloads them again) and copied next to analytics.html, so the page never
+# waits on the network.
+ANALYTICS_ASSETS_DIR = "vendor"
+# sha256 of every asset ("<digest>  <name>" lines, as sha256sum writes), committed
+# next to FocusPro.py; `fetch-assets --pin` records them for new versions
+ANALYTICS_ASSETS_MANIFEST = "vendor.sha256"
+ANALYTICS_ASSETS = {
+    "chart.umd.js": "https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.js",
+    "flatpickr.min.js": "https://cdn.jsdelivr.net/npm/flatpickr@4.6.13/dist/flatpickr.min.js",
+    "flatpickr.min.css": "https://cdn.jsdelivr.net/npm/flatpickr@4.6.13/dist/flatpickr.min.css",
+    "bootstrap.min.css": "https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css",
+}
+
+def install_analytics_assets(source_dir, dest_dir, hashes):
+    """Copy the bundled analytics assets to dest_dir; returns the names not installed
+
+    Each file must match its sha256 in `hashes` (read_asset_hashes of the
+    ANALYTICS_ASSETS_MANIFEST), in dest_dir or in the bundle. One that is
+    missing, unpinned or different is refused and removed from dest_dir,
+    so the page loads the CDN copy instead of a file nobody checked.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    refused = []
+    for name in ANALYTICS_ASSETS:
+        source, dest = os.path.join(source_dir, name), os.path.join(dest_dir, name)
+        pinned = hashes.get(name)
+        if pinned is not None and os.path.exists(dest) and file_sha256(dest) == pinned:
+            continue
+        if pinned is not None and os.path.exists(source) and file_sha256(source) == pinned:
+            shutil.copyfile(source, dest + ".part")
+            os.replace(dest + ".part", dest)
+            continue
+        refused.append(name)
+        if os.path.exists(dest):
+            os.remove(dest)
+    return refused
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_asset_hashes(path):
+    """{name: sha256} from an ANALYTICS_ASSETS_MANIFEST file; empty if there is none"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return {name.lstrip("*"): digest.lower()
+                for digest, _, name in (line.strip().partition("  ") for line in f) if name}
+
+def fetch_analytics_assets(dest_dir, hashes, force=False):
+    """Download the pinned analytics assets into dest_dir (for packaging); returns the names fetched.
+
+    Every file, downloaded or already there, must match its sha256 in
+    `hashes`; a missing or different digest raises ValueError and leaves no
+    file behind. hashes=None skips the check, for pinning new versions.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+
+    def check(path, name):
+        if hashes is None:
+            return
+        if name not in hashes:
+            raise ValueError(f"{name} has no pinned sha256 in {ANALYTICS_ASSETS_MANIFEST}")
+        if file_sha256(path) != hashes[name]:
+            raise ValueError(f"{name} does not match its pinned sha256")
+
+    fetched = []
+    for name, url in ANALYTICS_ASSETS.items():
+        dest = os.path.join(dest_dir, name)
+        if os.path.exists(dest) and not force:
+            check(dest, name)
+            continue
+        with urllib.request.urlopen(url, timeout=30) as response, open(dest + ".part", "wb") as f:
+            shutil.copyfileobj(response, f)
+        try:
+            check(dest + ".part", name)
+        except ValueError:
+            os.remove(dest + ".part")
+            raise
+        os.replace(dest + ".part", dest)
+        fetched.append(name)
+    return fetched
+
+class ReportCancelled(Exception):
+    """The analytics report was cancelled before it was written"""
+
+# Rows fetched and serialized per step of build_analytics_report; between
+# steps the worker checks for cancellation and lets the Tk thread run
+ANALYTICS_CHUNK_ROWS = 2000
+
+def build_analytics_report(conn, template_path, out_path, colors, daily_goal, progress=None, cancel=None):
+    """Write the analytics page for conn's history to out_path.
+
+    Returns (out_path, missing): missing names the ANALYTICS_ASSETS that
+    were not bundled or did not match ANALYTICS_ASSETS_MANIFEST, which the
+    page then loads from the CDN. Meant for a
+    worker thread with its own connection. progress(fraction)
+    is called after each step and `cancel` (a threading.Event) is checked
+    between steps, raising ReportCancelled. The page is written to a
+    temporary file and renamed, so a cancelled or failed build never
+    leaves a half-written page behind.
+    """
+    def step(fraction):
+        if cancel is not None and cancel.is_set():
+            raise ReportCancelled()
+        if progress is not None:
+            progress(fraction)
+
+    total = conn.execute("SELECT COUNT(*) FROM daily_totals").fetchone()[0]
+    cursor = conn.execute("""
+        SELECT d.date, c.name, d.minutes
+        FROM daily_totals d JOIN categories c ON c.id = d.category_id
+        ORDER BY d.day
+    """)
+    # Serialized chunk by chunk: one json.dumps over the whole history
+    # would hold the GIL, and so the Tk thread, until it finished
+    chunks, done = [], 0
+    while True:
+        rows = cursor.fetchmany(ANALYTICS_CHUNK_ROWS)
+        if not rows:
+            break
+        chunks.append(json.dumps([{
+            'date': date,  # Keep as YYYY-MM-DD for filtering
+            'display_date': date,  # For default display
+            'hours': round(minutes / 60, 2) if minutes else 0,
+            'category': category
+        } for date, category, minutes in rows])[1:-1])
+        done += len(rows)
+        step(0.8 * done / max(total, 1))
+
+    hourly = json.dumps(hourly_focus_by_date(conn), separators=(",", ":"))
+    step(0.85)
+    tag_names, tag_sets, tag_totals = tagged_totals(conn)
+    step(0.9)
+    # [date, "HH:MM", category, focused minutes, note] of sessions with a note;
+    # "</" is escaped so a note can't close the page's <script>
+    notes = json.dumps([list(row) for row in conn.execute("""
+        SELECT date, substr(start_time, 12, 5), task_category, completed, note
+        FROM session_records WHERE note IS NOT NULL ORDER BY day, id
+    """)], separators=(",", ":")).replace("</", "<\\/")
+    step(0.92)
+
+    # Get date range for default view (last 7 days)
+    end_date = datetime.date.today()
+    start_date = end_date - datetime.timedelta(days=6)
+
+    if not os.path.exists(template_path):
+        raise FileNotFoundError(f"Missing graph.html at {template_path}")
+    with open(template_path, "r") as f:
+        html_template = f.read()
+
+    # Inject data and configuration
+    html = html_template.replace(
+        '/*DATA_PLACEHOLDER*/',
+        f"""
+            const allGraphData = [{",".join(chunk for chunk in chunks if chunk)}];
+            const categoryColors = {json.dumps(colors)};
+            const hourlyFocus = {hourly};
+            const sessionNotes = {notes};
+            const tagNames = {json.dumps(tag_names)};
+            const tagSets = {json.dumps(tag_sets, separators=(",", ":"))};
+            const taggedTotals = {json.dumps(tag_totals, separators=(",", ":"))};
+            const dailyGoal = {daily_goal};
+            const defaultStartDate = "{start_date.isoformat()}";
+            const defaultEndDate = "{end_date.isoformat()}";
+            """
+    )
+    step(0.95)
+    missing = install_analytics_assets(
+        os.path.join(os.path.dirname(template_path), ANALYTICS_ASSETS_DIR),
+        os.path.join(os.path.dirname(out_path), ANALYTICS_ASSETS_DIR),
+        read_asset_hashes(os.path.join(os.path.dirname(template_path), ANALYTICS_ASSETS_MANIFEST))
+    )
+    partial = out_path + ".part"
+    with open(partial, "w") as f:
+        f.write(html)
+    os.replace(partial, out_path)
+    return out_path, missing
+
+def refresh_daily_totals(conn, days):
+    """Recompute daily_totals for the given epoch days: archived part + live sessions rows"""
+    changed_days = days
+    days = json.dumps(sorted(set(days)))
+    conn.execute("""
+        UPDATE daily_totals SET minutes = archived_minutes, sessions = archived_sessions
+        WHERE day IN (SELECT value FROM json_each(?))
+    """, (days,))
+    conn.execute("""
+        INSERT INTO daily_totals (day, category_id, minutes, sessions)
+        SELECT day, category_id, SUM(completed), COUNT(*)
+        FROM sessions WHERE day IN (SELECT value FROM json_each(?))
+        GROUP BY day, category_id
+        ON CONFLICT (day, category_id) DO UPDATE SET
+            minutes = minutes + excluded.minutes,
+            sessions = sessions + excluded.sessions
+    """, (days,))
+    conn.execute("DELETE FROM daily_totals WHERE sessions = 0 AND minutes = 0")
+    # Imports and syncs can change days that are already closed
+    update_goal_met(conn, changed_days)
+
+def goal_for_day(conn, day):
+    """Daily goal in minutes in effect on an epoch day"""
+    row = conn.execute(
+        "SELECT minutes FROM goal_history WHERE effective_day <= ? ORDER BY effective_day DESC LIMIT 1", (day,)
+    ).fetchone()
+    return row[0] if row else DEFAULT_DAILY_GOAL_HOURS * 60
+
+def set_daily_goal(conn, minutes, day):
+    """Change the goal from `day` on; earlier days keep the goal they had (no commit)"""
+    conn.execute("INSERT OR REPLACE INTO goal_history (effective_day, minutes) VALUES (?, ?)", (day, minutes))
+
+def goal_closed_through(conn):
+    row = conn.execute("SELECT value FROM settings WHERE key = 'goal_closed_through'").fetchone()
+    return int(row[0]) if row else -1
+
+def update_goal_met(conn, days):
+    """Recompute the goal-met bits of the given days that are closed (no commit)"""
+    closed_through = goal_closed_through(conn)
+    days = sorted({day for day in days if day <= closed_through})
+    if not days:
+        return
+    rows = conn.execute("""
+        SELECT d.value, COALESCE(SUM(t.minutes), 0) >= COALESCE(
+            (SELECT g.minutes FROM goal_history g WHERE g.effective_day <= d.value
+             ORDER BY g.effective_day DESC LIMIT 1), ?)
+        FROM json_each(?) d LEFT JOIN daily_totals t ON t.day = d.value
+        GROUP BY d.value
+    """, (DEFAULT_DAILY_GOAL_HOURS * 60, json.dumps(days))).fetchall()
+    by_year = {}
+    for day, met in rows:
+        by_year.setdefault(day_to_date(day).year, []).append((day, met))
+    for year, flags in by_year.items():
+        row = conn.execute("SELECT bits FROM goal_met WHERE year = ?", (year,)).fetchone()
+        bits = bytearray(row[0] if row else bytes(46))
+        year_start = epoch_day(datetime.date(year, 1, 1))
+        for day, met in flags:
+            index = day - year_start
+            if met:
+                bits[index >> 3] |= 1 << (index & 7)
+            else:
+                bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+        conn.execute("INSERT OR REPLACE INTO goal_met (year, bits) VALUES (?, ?)", (year, bytes(bits)))
+
+def close_goal_days(conn, today=None):
+    """Record goal-met bits for the days that ended since the last call (commits if any did)"""
+    yesterday = epoch_day(today or datetime.date.today()) - 1
+    closed_through = goal_closed_through(conn)
+    if closed_through >= yesterday:
+        return
+    conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('goal_closed_through', ?)", (str(yesterday),))
+    update_goal_met(conn, range(closed_through + 1, yesterday + 1))
+    conn.commit()
+
+class GoalBitmap:
+    """Goal-met flags of closed days as one Python int: bit n is epoch day n.
+
+    Loaded from the few goal_met rows in one query; every question below
+    is a handful of big-int operations.
+    """
+
+    def __init__(self, bits=0):
+        self.bits = bits
+
+    @classmethod
+    def load(cls, conn):
+        bits = 0
+        for year, blob in conn.execute("SELECT year, bits FROM goal_met"):
+            bits |= int.from_bytes(blob, "little") << epoch_day(datetime.date(year, 1, 1))
+        return cls(bits)
+
+    def met(self, day):
+        return bool(self.bits >> day & 1)
+
+    def streak(self, end_day):
+        """Consecutive goal-met days ending on end_day"""
+        misses = ~self.bits & ((1 << (end_day + 1)) - 1)
+        return end_day - (misses.bit_length() - 1)
+
+    def best_streak(self):
+        """Longest run of goal-met days"""
+        # Hop from run to run: skip the misses, then measure the run of ones
+        bits, best = self.bits, 0
+        while bits:
+            bits >>= (bits & -bits).bit_length() - 1
+            run = (bits + 1 & ~bits).bit_length() - 1
+            best = max(best, run)
+            bits >>= run
+        return best
+
+    def hit_rate(self, start_day, end_day):
+        """Share of days in [start_day, end_day] on which the goal was met"""
+        span = end_day - start_day + 1
+        window = self.bits >> start_day & ((1 << span) - 1)
+        return bin(window).count("1") / span if span > 0 else 0.0
+
+    def calendar(self, start_day, end_day):
+        """Goal-met flag for every day in [start_day, end_day], for heatmaps"""
+        window = self.bits >> start_day
+        return [bool(window >> offset & 1) for offset in range(end_day - start_day + 1)]
+
+class TodayCounter:
+    """Today's focused minutes for the daily ring, kept in memory.
+
+    reconcile() reads today's persisted total in one query, less what the
+    live session has already projected into it; minutes() adds the live
+    session's focused seconds on top without touching the database. Like
+    daily_totals, a session counts toward the day it started.
+    """
+
+    def __init__(self):
+        self.day = None
+        self.persisted = 0
+        self.session_day = None
+
+    def reconcile(self, conn, session_id=None, today=None):
+        """Re-read today's total from daily_totals; session_id is the live session, if any"""
+        day = epoch_day(today or datetime.date.today())
+        total, session_day, projected = conn.execute("""
+            SELECT COALESCE((SELECT SUM(minutes) FROM daily_totals WHERE day = ?), 0),
+                   (SELECT day FROM sessions WHERE id = ?),
+                   (SELECT completed FROM sessions WHERE id = ?)
+        """, (day, session_id, session_id)).fetchone()
+        self.day = day
+        self.session_day = session_day
+        self.persisted = total - (projected if session_day == day else 0)
+
+    def stale(self, today=None):
+        """True once the day it was reconciled on has ended"""
+        return self.day != epoch_day(today or datetime.date.today())
+
+    def minutes(self, live_seconds=0):
+        """Persisted minutes plus the live session's"""
+        return self.persisted + (live_seconds // 60 if self.session_day == self.day else 0)
+
+class RollingStats:
+    """Rolling 7/30-day averages and forecasts, kept as running sums.
+
+    Holds the totals of the last WINDOW closed days (ending yesterday) in a
+    ring buffer, with their per-hour seconds from hour_buckets. load()
+    reads the window once; afterwards advance() moves it one day at a time
+    and set_day() corrects a day that was edited, each adjusting the sums
+    by the difference instead of re-adding the window.
+    """
+    WINDOW = 30
+    SHORT = 7
+
+    def __init__(self):
+        self.today = None
+
+    @staticmethod
+    def read_day(conn, day):
+        """(minutes, [seconds in each hour 0-23]) of one day"""
+        minutes = conn.execute("SELECT COALESCE(SUM(minutes), 0) FROM daily_totals WHERE day = ?",
+                               (day,)).fetchone()[0]
+        hours = [0] * 24
+        for hour, seconds in conn.execute(
+                "SELECT hour, SUM(seconds) FROM hour_buckets WHERE day = ? GROUP BY hour", (day,)):
+            hours[hour] = seconds
+        return minutes, hours
+
+    def load(self, conn, today=None):
+        """Read the whole window ending the day before `today`"""
+        self.today = epoch_day(today or datetime.date.today())
+        first = self.today - self.WINDOW
+        self.daily = [0] * self.WINDOW  # minutes, slot day % WINDOW
+        self.hourly = [[0] * 24 for _ in range(self.WINDOW)]
+        for day, minutes in conn.execute("""
+            SELECT day, SUM(minutes) FROM daily_totals WHERE day >= ? AND day < ? GROUP BY day
+        """, (first, self.today)):
+            self.daily[day % self.WINDOW] = minutes
+        for day, hour, seconds in conn.execute("""
+            SELECT day, hour, SUM(seconds) FROM hour_buckets WHERE day >= ? AND day < ? GROUP BY day, hour
+        """, (first, self.today)):
+            self.hourly[day % self.WINDOW][hour] = seconds
+        self.sum_long = sum(self.daily)
+        self.sum_short = sum(self.daily[day % self.WINDOW] for day in range(self.today - self.SHORT, self.today))
+        self.hour_sums = [sum(hours[hour] for hours in self.hourly) for hour in range(24)]
+        # Every closed day of this month is inside the window (WINDOW >= 30)
+        self.month_start = epoch_day(day_to_date(self.today).replace(day=1))
+        self.month_closed = sum(self.daily[day % self.WINDOW] for day in range(self.month_start, self.today))
+
+    def invalidate(self):
+        """Reload on the next advance(), e.g. after an import changed many days"""
+        self.today = None
+
+    def set_day(self, day, minutes, hours):
+        """Replace the totals of a closed day inside the window"""
+        if not self.today - self.WINDOW <= day < self.today:
+            return
+        slot = day % self.WINDOW
+        delta = minutes - self.daily[slot]
+        self.sum_long += delta
+        if day >= self.today - self.SHORT:
+            self.sum_short += delta
+        if day >= self.month_start:
+            self.month_closed += delta
+        old_hours = self.hourly[slot]
+        for hour in range(24):
+            self.hour_sums[hour] += hours[hour] - old_hours[hour]
+        self.daily[slot], self.hourly[slot] = minutes, hours
+
+    def update_day(self, conn, day):
+        """Re-read one day after an edit (two indexed queries)"""
+        if self.today is not None:
+            self.set_day(day, *self.read_day(conn, day))
+
+    def advance(self, conn, today=None):
+        """Move the window so it ends yesterday, reading only the days that closed since"""
+        today = epoch_day(today or datetime.date.today())
+        if self.today is None or not 0 <= today - self.today <= self.WINDOW:
+            self.load(conn, day_to_date(today))
+            return
+        while self.today < today:
+            closing = self.today
+            minutes, hours = self.read_day(conn, closing)
+            # The ring slot of the day leaving the window is the closing day's
+            slot = closing % self.WINDOW
+            self.sum_long += minutes - self.daily[slot]
+            self.sum_short += minutes - self.daily[(closing - self.SHORT) % self.WINDOW]
+            old_hours = self.hourly[slot]
+            for hour in range(24):
+                self.hour_sums[hour] += hours[hour] - old_hours[hour]
+            self.daily[slot], self.hourly[slot] = minutes, hours
+            self.today += 1
+            if day_to_date(self.today).day == 1:
+                self.month_start, self.month_closed = self.today, 0
+            else:
+                self.month_closed += minutes
+
+    def averages(self):
+        """(7-day, 30-day) average minutes per day"""
+        return self.sum_short / self.SHORT, self.sum_long / self.WINDOW
+
+    def projected(self, today_minutes, now=None):
+        """Today's minutes so far plus what the last 30 days averaged in the rest of the day"""
+        now = now or datetime.datetime.now()
+        left_of_hour = 1 - (now.minute * 60 + now.second) / 3600
+        rest = self.hour_sums[now.hour] * left_of_hour + sum(self.hour_sums[now.hour + 1:])
+        return today_minutes + rest / 60 / self.WINDOW
+
+    def days_to_month_goal(self, goal_minutes, today_minutes, now=None):
+        """Days counting today until this month reaches goal_minutes at the 7-day pace.
+
+        0 if already reached, 1 if today's projection gets there, None if
+        the pace is zero.
+        """
+        if self.month_closed + today_minutes >= goal_minutes:
+            return 0
+        left = goal_minutes - self.month_closed - self.projected(today_minutes, now)
+        if left <= 0:
+            return 1
+        pace = self.sum_short / self.SHORT
+        return 1 + math.ceil(left / pace) if pace > 0 else None
+
+def close_abandoned_sessions(conn):
+    """Stop sessions left open by a crash or kill at their last recorded event"""
+    rows = conn.execute("""
+        SELECT e.session_id, e.ts, e.elapsed FROM session_events e
+        WHERE e.id = (SELECT MAX(id) FROM session_events WHERE session_id = e.session_id)
+        AND e.kind != ?
+    """, (EVENT_STOP,)).fetchall()
+    conn.executemany(
+        "INSERT INTO session_events (session_id, kind, ts, elapsed) VALUES (?, ?, ?, ?)",
+        [(session_id, EVENT_STOP, ts, elapsed) for session_id, ts, elapsed in rows]
+    )
+    for session_id, _, _ in rows:
+        refresh_session_projection(conn, session_id)
+    conn.commit()
+
+class SessionLog:
+    """Buffered writer for the append-only session_events table.
+
+    record() only appends to an in-memory buffer; flush() inserts everything
+    buffered in one transaction and re-derives the sessions rows passed in
+    `project`. Safe to call from the timer thread and the Tk thread.
+    """
+
+    def __init__(self, conn, clock=None):
+        self.conn = conn
+        self.clock = clock or Clock()
+        self.lock = threading.Lock()
+        self.pending = []
+
+    def record(self, session_id, kind, elapsed, ts=None):
+        with self.lock:
+            self.pending.append((session_id, kind, int(ts if ts is not None else self.clock.time()), int(elapsed)))
+
+    def flush(self, project=()):
+        with self.lock:
+            events, self.pending = self.pending, []
+            if not events and not project:
+                return
+            try:
+                add_event_hour_buckets(self.conn, events)
+                self.conn.executemany(
+                    "INSERT INTO session_events (session_id, kind, ts, elapsed) VALUES (?, ?, ?, ?)",
+                    events
+                )
+                for session_id in project:
+                    refresh_session_projection(self.conn, session_id)
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                self.pending[:0] = events  # Keep them for the next flush
+                print(f"Database error: {e}")
+
+class CategoryCache:
+    """In-memory name <-> id lookup over the categories table.
+
+    Sessions and daily_totals only store category ids; names, colors and
+    the archived flag live in one row each, so a rename is a single UPDATE.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.reload()
+
+    def reload(self):
+        self.rows = self.conn.execute("SELECT id, name, color, archived FROM categories ORDER BY id").fetchall()
+        self.ids = {name: category_id for category_id, name, _, _ in self.rows}
+
+    def names(self, include_archived=False):
+        return [name for _, name, _, archived in self.rows if include_archived or not archived]
+
+    def colors(self):
+        """{name: color} for every category, archived ones included (they still have history)"""
+        return {name: color for _, name, color, _ in self.rows}
+
+    def id_for(self, name, create=True):
+        """Id of the named category, adding it if it is new and create is set (no commit)"""
+        category_id = self.ids.get(name)
+        if category_id is None and create:
+            category_id = self.conn.execute("INSERT INTO categories (name) VALUES (?)", (name,)).lastrowid
+            self.rows.append((category_id, name, DEFAULT_CATEGORY_COLOR, 0))
+            self.ids[name] = category_id
+        return category_id
+
+    def rename(self, name, new_name):
+        """Rename a category; raises sqlite3.IntegrityError if new_name is taken"""
+        self.conn.execute("UPDATE categories SET name = ? WHERE id = ?", (new_name, self.ids[name]))
+        self.conn.commit()
+        self.reload()
+
+    def set_archived(self, name, archived=True):
+        """Hide (or restore) a category in the task selector; its history is kept"""
+        self.conn.execute("UPDATE categories SET archived = ? WHERE id = ?", (int(archived), self.ids[name]))
+        self.conn.commit()
+        self.reload()
+
+def connect_database(db_path):
+    """Open (creating if needed) a FocusPro database with an up-to-date schema"""
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+
+    # Takes effect immediately on a new database; existing ones need a VACUUM below
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+    # Create tables if they do not exist
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            task_category TEXT NOT NULL,
+            duration INTEGER NOT NULL,
+            completed INTEGER NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
+
+    conn.commit()
+
+    migrate_database(conn)
+
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # One-time rebuild so freed pages can be returned with incremental_vacuum
+        conn.execute("VACUUM")
+    return conn
+
+def stamp_new_sessions(conn, after_id):
+    """Give sessions rows with id > after_id one shared sync stamp and re-enable the triggers.
+
+    Bulk writers set sync_state.merging first; one statement here is much
+    cheaper than a trigger firing per row. Rows inserted without a uuid get
+    a random one.
+    """
+    conn.execute("UPDATE sessions SET uuid = lower(hex(randomblob(16))) WHERE id > ? AND uuid IS NULL", (after_id,))
+    conn.execute("UPDATE sync_state SET clock = clock + 1")
+    conn.execute("""
+        INSERT OR REPLACE INTO sync_log (uuid, session_id, clock, device)
+        SELECT s.uuid, s.id, st.clock, st.device FROM sessions s, sync_state st WHERE s.id > ?
+    """, (after_id,))
+    conn.execute("UPDATE sync_state SET merging = 0")
+
+def rebuild_derived_data(conn, after_id=0):
+    """Rebuild data derived from sessions rows after a bulk change to rows with id > after_id (no commit)"""
+    backfill_session_events(conn, after_id)
+    replay_hour_buckets(conn, after_id)
+    days = [row[0] for row in conn.execute("SELECT DISTINCT day FROM sessions WHERE id > ?", (after_id,))]
+    refresh_daily_totals(conn, days)
+
+def edit_session(conn, session_id, category_id, minutes, note=None):
+    """Correct a finished session's category, focused minutes and note, updating only its derived data"""
+    row = conn.execute("SELECT day FROM sessions WHERE id = ?", (session_id,)).fetchone()
+    if row is None:
+        return
+    replay_hour_buckets(conn, session_ids=[session_id], sign=-1)
+    conn.execute("UPDATE sessions SET category_id = ?, completed = ?, note = ? WHERE id = ?",
+                 (category_id, minutes, note or None, session_id))
+    # Its event log no longer matches; synthesize one from the corrected row
+    conn.execute("DELETE FROM session_events WHERE session_id = ?", (session_id,))
+    backfill_session_events(conn, sys.maxsize, [session_id])
+    replay_hour_buckets(conn, session_ids=[session_id])
+    refresh_daily_totals(conn, [row[0]])
+    conn.commit()
+
+def delete_session(conn, session_id):
+    """Delete a session, take it out of the derived data and leave a tombstone for sync"""
+    row = conn.execute("SELECT day, uuid FROM sessions WHERE id = ?", (session_id,)).fetchone()
+    if row is None:
+        return
+    replay_hour_buckets(conn, session_ids=[session_id], sign=-1)
+    conn.execute("DELETE FROM session_events WHERE session_id = ?", (session_id,))
+    conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+    conn.execute("UPDATE sync_state SET clock = clock + 1")
+    conn.execute("""
+        INSERT OR REPLACE INTO sync_log (uuid, session_id, clock, device)
+        SELECT ?, NULL, clock, device FROM sync_state
+    """, (row[1],))
+    refresh_daily_totals(conn, [row[0]])
+    conn.commit()
+
+class SessionPager:
+    """Newest-first sessions in fixed-size pages, fetched with keyset pagination.
+
+    Page n is read as "the next page_size rows after the (day, id) key
+    that ended page n - 1", an index range scan on idx_sessions_day (whose
+    entries end in the rowid) that costs the same at any depth. Start keys
+    are remembered, so scrolling back never rescans; a jump skips from the
+    nearest known key along the covering index. Only a few pages of rows
+    are held in memory.
+    """
+
+    FIRST_KEY = (sys.maxsize, sys.maxsize)
+
+    def __init__(self, conn, page_size=50, cached_pages=8):
+        self.conn = conn
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        self.reset()
+
+    def reset(self):
+        self.count = self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        self.starts = {0: self.FIRST_KEY}  # page number -> key the page begins after
+        self.pages = {}  # page number -> rows, least recently used first
+
+    def start_key(self, number):
+        """Key page `number` begins after, or None past the end"""
+        if number not in self.starts:
+            known = max(n for n in self.starts if n < number)
+            row = self.conn.execute("""
+                SELECT day, id FROM sessions WHERE (day, id) < (?, ?)
+                ORDER BY day DESC, id DESC LIMIT 1 OFFSET ?
+            """, self.starts[known] + ((number - known) * self.page_size - 1,)).fetchone()
+            if row is None:
+                return None
+            self.starts[number] = row
+        return self.starts[number]
+
+    def page(self, number):
+        rows = self.pages.pop(number, None)
+        if rows is None:
+            key = self.start_key(number)
+            rows = [] if key is None else self.conn.execute("""
+                SELECT s.id, s.day, s.date, c.name, s.duration, s.completed, s.start_time, s.paused, s.note
+                FROM sessions s JOIN categories c ON c.id = s.category_id
+                WHERE (s.day, s.id) < (?, ?)
+                ORDER BY s.day DESC, s.id DESC LIMIT ?
+            """, key + (self.page_size,)).fetchall()
+            if len(rows) == self.page_size:
+                self.starts[number + 1] = (rows[-1][1], rows[-1][0])
+            while len(self.pages) >= self.cached_pages:
+                del self.pages[next(iter(self.pages))]
+        self.pages[number] = rows
+        return rows
+
+    def rows(self, start, count):
+        """Rows start .. start + count - 1 (fewer at the end)"""
+        rows = []
+        number, offset = divmod(start, self.page_size)
+        while len(rows) < count:
+            page = self.page(number)
+            rows.extend(page[offset:offset + count - len(rows)])
+            if len(page) < self.page_size:
+                break
+            number, offset = number + 1, 0
+        return rows
+
+    def forget_from(self, session_key):
+        """Drop pages from the one holding (day, id) on, after an edit or delete there"""
+        # Page n holds the keys below starts[n]; earlier pages are unaffected
+        keep = {n for n, key in self.starts.items() if key > session_key}
+        number = max(keep)
+        self.starts = {n: key for n, key in self.starts.items() if n <= number}
+        self.pages = {n: rows for n, rows in self.pages.items() if n < number}
+        self.count = self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+def note_search_query(text):
+    """FTS5 query for what a user typed: every word, as a prefix, in any order.
+
+    Each word is quoted, so characters FTS5 treats as syntax ("#312",
+    "c++", a stray quote) are searched for instead of raising errors.
+    """
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in text.split())
+
+# Above this many matches search results are newest first instead of ranked
+RANKED_NOTE_MATCHES = 2000
+
+def search_notes(conn, text, limit=100):
+    """Sessions whose note matches `text`, best match first (rows shaped like SessionPager's)
+
+    Ranking scores every match, which for a word in a third of a million
+    notes takes most of a second; such searches list the newest matches
+    instead, which FTS5 can stream straight from the index.
+    """
+    query = note_search_query(text)
+    if not query:
+        return []
+    matches = conn.execute(
+        "SELECT COUNT(*) FROM (SELECT rowid FROM session_notes WHERE session_notes MATCH ? LIMIT ?)",
+        (query, RANKED_NOTE_MATCHES + 1)
+    ).fetchone()[0]
+    order = "n.rank" if matches <= RANKED_NOTE_MATCHES else "n.rowid DESC"
+    # The FTS index yields the rowids; sessions and categories are primary-key lookups
+    return conn.execute(f"""
+        SELECT s.id, s.day, s.date, c.name, s.duration, s.completed, s.start_time, s.paused, s.note
+        FROM session_notes n
+        JOIN sessions s ON s.id = n.rowid
+        JOIN categories c ON c.id = s.category_id
+        WHERE session_notes MATCH ?
+        ORDER BY {order} LIMIT ?
+    """, (query, limit)).fetchall()
+
+def lttb(values, threshold):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps of an evenly spaced series.
+
+    The first and last points are always kept; the rest are split into
+    threshold - 2 buckets, and from each the point forming the largest
+    triangle with the previous kept point and the next bucket's average is
+    kept. Peaks and dips survive, unlike with plain averaging.
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    bucket = (n - 2) / (threshold - 2)
+    keep = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * bucket) + 1, int((i + 1) * bucket) + 1
+        next_end = min(int((i + 2) * bucket) + 1, n)
+        avg_x = (end + next_end - 1) / 2
+        avg_y = sum(values[end:next_end]) / (next_end - end)
+        ay = values[a]
+        dx, dy = a - avg_x, avg_y - ay
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            # Twice the triangle's area; the constant factor doesn't change the pick
+            area = abs(dx * (values[j] - ay) - (a - j) * dy)
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+        a = best
+    keep.append(n - 1)
+    return keep
+
+class DailySeries:
+    """Focused minutes per day for each category and in total, loaded in one query.
+
+    Every day from the first session to today has a slot, so a day range is
+    a list slice: panning and zooming the chart never touch the database.
+    Downsampled ranges are cached, so flipping between ranges is free.
+    """
+    CACHED_RANGES = 32
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.load()
+
+    def load(self):
+        rows = self.conn.execute("""
+            SELECT d.day, c.name, d.minutes
+            FROM daily_totals d JOIN categories c ON c.id = d.category_id
+        """).fetchall()
+        today = epoch_day(datetime.date.today())
+        self.first_day = min((row[0] for row in rows), default=today)
+        length = max(today, max((row[0] for row in rows), default=today)) - self.first_day + 1
+        self.total = [0] * length
+        self.categories = {}  # name -> minutes per day
+        for day, name, minutes in rows:
+            index = day - self.first_day
+            if name not in self.categories:
+                self.categories[name] = [0] * length
+            self.categories[name][index] += minutes
+            self.total[index] += minutes
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.total)
+
+    def downsampled(self, start, end, points):
+        """{series name: [(index, minutes)]} for indices start..end-1, at most `points` per series
+
+        "Total" is the sum of all categories.
+        """
+        key = (start, end, points)
+        result = self.cache.get(key)
+        if result is None:
+            result = {}
+            for name, values in (("Total", self.total), *self.categories.items()):
+                window = values[start:end]
+                result[name] = [(start + i, window[i]) for i in lttb(window, points)]
+            if len(self.cache) >= self.CACHED_RANGES:
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[key] = result
+        return result
+
+def parse_tags(text):
+    """[(dimension, value)] from typed tags: "course:calc2, project:thesis library" (no dimension: '')"""
+    tags, seen = [], set()
+    for word in (text or "").replace(",", " ").split():
+        dimension, _, value = word.rpartition(":")
+        # Tags compare case-insensitively; the first spelling typed is kept
+        if value and (dimension.lower(), value.lower()) not in seen:
+            seen.add((dimension.lower(), value.lower()))
+            tags.append((dimension.lower(), value))
+    return tags
+
+def tag_name(dimension, value):
+    return f"{dimension}:{value}" if dimension else value
+
+def tag_ids(conn, tags, create=False):
+    """{(dimension, value): id} for tags that exist; create=True adds the missing ones (no commit)"""
+    if create:
+        conn.executemany("INSERT OR IGNORE INTO tags (dimension, value) VALUES (?, ?)", tags)
+    ids = {}
+    for dimension, value in tags:
+        row = conn.execute("SELECT id FROM tags WHERE dimension = ? AND value = ?", (dimension, value)).fetchone()
+        if row:
+            ids[(dimension, value)] = row[0]
+    return ids
+
+def set_session_tags(conn, session_id, text):
+    """Replace a session's tags with the ones in `text` (no commit)"""
+    ids = tag_ids(conn, parse_tags(text), create=True)
+    conn.execute("DELETE FROM session_tags WHERE session_id = ?", (session_id,))
+    conn.executemany("INSERT INTO session_tags (session_id, tag_id) VALUES (?, ?)",
+                     [(session_id, tag_id) for tag_id in ids.values()])
+
+def tag_facets(conn, text="", start_day=None, end_day=None):
+    """Totals of the sessions carrying every tag in `text`, and facet counts of all their tags.
+
+    Returns (sessions, minutes, {tag name: (sessions, minutes)}), counted
+    in one query. With tags, the matching sessions come from intersecting each
+    tag's index range, and one GROUP BY over their session_tags rows
+    counts every facet. Without, the totals come from the daily_totals and
+    tag_totals rollups, whatever the size of the history. Archived
+    sessions have no tags and are not counted.
+    """
+    wanted = parse_tags(text)
+    ids = tag_ids(conn, wanted)
+    if len(ids) < len(wanted):
+        return 0, 0, {}  # A tag nobody used yet matches nothing
+    days = (start_day if start_day is not None else -(1 << 40), end_day if end_day is not None else 1 << 40)
+    if ids:
+        id_range = (-(1 << 62), 1 << 62)
+        if start_day is not None or end_day is not None:
+            # Sessions are mostly numbered in day order, so the ids of the
+            # range's sessions narrow each tag's index scan too
+            low, high = conn.execute("SELECT MIN(id), MAX(id) FROM sessions WHERE day BETWEEN ? AND ?", days).fetchone()
+            if low is None:
+                return 0, 0, {}
+            id_range = (low, high)
+        matched = " INTERSECT ".join(
+            ["SELECT session_id FROM session_tags WHERE tag_id = ? AND session_id BETWEEN ? AND ?"] * len(ids))
+        # CROSS JOIN keeps the (usually few) matched sessions as the outer loop
+        query = f"""
+            WITH matched (id, minutes) AS (
+                SELECT id, completed FROM sessions WHERE id IN ({matched}) AND day BETWEEN ? AND ?
+            )
+            SELECT NULL, COUNT(*), COALESCE(SUM(minutes), 0) FROM matched
+            UNION ALL
+            SELECT * FROM (
+                SELECT st.tag_id, COUNT(*), SUM(m.minutes)
+                FROM matched m CROSS JOIN session_tags st ON st.session_id = m.id
+                GROUP BY st.tag_id
+            )
+        """
+        params = (*(value for tag_id in ids.values() for value in (tag_id, *id_range)), *days)
+    else:
+        query = """
+            SELECT NULL, COALESCE(SUM(sessions - archived_sessions), 0), COALESCE(SUM(minutes - archived_minutes), 0)
+            FROM daily_totals WHERE day BETWEEN ? AND ?
+            UNION ALL
+            SELECT * FROM (
+                SELECT tag_id, SUM(sessions), SUM(minutes) FROM tag_totals
+                WHERE day BETWEEN ? AND ? GROUP BY tag_id HAVING SUM(sessions) > 0
+            )
+        """
+        params = days * 2
+    rows = conn.execute(query, params).fetchall()
+    names = {tag_id: tag_name(dimension, value) for tag_id, dimension, value in conn.execute(
+        "SELECT id, dimension, value FROM tags WHERE id IN (SELECT value FROM json_each(?))",
+        (json.dumps([row[0] for row in rows[1:]]),))}
+    sessions, minutes = rows[0][1:]
+    return sessions, minutes, {names[tag_id]: (count, total) for tag_id, count, total in rows[1:]}
+
+def tagged_totals(conn):
+    """Minutes of tagged sessions per (date, category, tag combination), for the analytics page.
+
+    Returns (tag names, tag sets as lists of indices into the names,
+    [(date, category, set index, minutes)]). Sessions rarely combine more
+    than a few tags, so there are far fewer sets than sessions and the
+    page can filter on any tag combination without per-session data.
+    """
+    rows = conn.execute("""
+        SELECT s.date, c.name, t.tag_ids, SUM(s.completed)
+        FROM (SELECT session_id, group_concat(tag_id) AS tag_ids FROM session_tags GROUP BY session_id) t
+        CROSS JOIN sessions s ON s.id = t.session_id
+        JOIN categories c ON c.id = s.category_id
+        GROUP BY s.day, s.category_id, t.tag_ids
+        ORDER BY s.day
+    """).fetchall()
+    names, indices = [], {}
+    for tag_id, dimension, value in conn.execute(
+            "SELECT id, dimension, value FROM tags WHERE id IN (SELECT tag_id FROM session_tags) ORDER BY dimension, value"):
+        indices[tag_id] = len(names)
+        names.append(tag_name(dimension, value))
+    sets, set_index, by_text, totals = [], {}, {}, []
+    for date, category, tag_ids, minutes in rows:
+        number = by_text.get(tag_ids)
+        if number is None:
+            # group_concat order is unspecified, so one combination can come out in several orders
+            key = tuple(sorted(indices[int(tag_id)] for tag_id in tag_ids.split(",")))
+            if key not in set_index:
+                set_index[key] = len(sets)
+                sets.append(list(key))
+            number = by_text[tag_ids] = set_index[key]
+        totals.append((date, category, number, minutes))
+    return names, sets, totals
+
+# Columns moved by import/export, in file order
+SESSION_EXPORT_COLUMNS = ("date", "task_category", "duration", "completed", "start_time", "end_time", "paused", "note",
+                          "tags")
+EXPORT_FORMATS = ("csv", "jsonl", "sqlite")
+
+def format_from_path(path):
+    """Pick an import/export format from a file extension"""
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext in ("db", "sqlite", "sqlite3"):
+        return "sqlite"
+    if ext in ("json", "jsonl", "ndjson"):
+        return "jsonl"
+    return "csv"
+
+def iter_session_rows(conn, table="session_records", batch_size=5000):
+    """Stream session rows (SESSION_EXPORT_COLUMNS) in constant memory"""
+    cursor = conn.execute(f"SELECT {', '.join(SESSION_EXPORT_COLUMNS)} FROM {table} ORDER BY start_time")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+
+def export_sessions(conn, path, fmt=None, db_path=None):
+    """Write all sessions to path as csv, jsonl or a standalone SQLite file; returns the row count.
+
+    With db_path, rows moved to the yearly archives next to it are included.
+    """
+    fmt = fmt or format_from_path(path)
+    conn.commit()
+    if db_path:
+        attach_archives(conn, db_path)
+        source = "all_sessions"
+    else:
+        source = "main.session_records"
+    try:
+        return write_session_export(conn, path, fmt, source)
+    finally:
+        if db_path:
+            detach_archives(conn)
+
+def write_session_export(conn, path, fmt, source):
+    count = 0
+    if fmt == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(SESSION_EXPORT_COLUMNS)
+            for row in iter_session_rows(conn, source):
+                writer.writerow(row)
+                count += 1
+    elif fmt == "jsonl":
+        with open(path, "w", encoding="utf-8") as f:
+            for row in iter_session_rows(conn, source):
+                f.write(json.dumps(dict(zip(SESSION_EXPORT_COLUMNS, row))) + "\n")
+                count += 1
+    elif fmt == "sqlite":
+        if os.path.exists(path):
+            os.remove(path)
+        conn.execute("ATTACH DATABASE ? AS export", (path,))
+        try:
+            conn.execute("""
+                CREATE TABLE export.sessions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date TEXT NOT NULL,
+                    task_category TEXT NOT NULL,
+                    duration INTEGER NOT NULL,
+                    completed INTEGER NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT,
+                    paused INTEGER NOT NULL DEFAULT 0,
+                    note TEXT,
+                    tags TEXT
+                )
+            """)
+            columns = ", ".join(SESSION_EXPORT_COLUMNS)
+            count = conn.execute(
+                f"INSERT INTO export.sessions ({columns}) SELECT {columns} FROM {source} ORDER BY start_time"
+            ).rowcount
+            conn.commit()
+        finally:
+            conn.execute("DETACH DATABASE export")
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return count
+
+def read_session_records(path, fmt):
+    """Yield raw SESSION_EXPORT_COLUMNS tuples from a csv or jsonl import file (None where a value is missing)"""
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            # Columns the file lacks point past its last one; as with DictReader, short
+            # rows are padded with None and extra fields are dropped
+            width = len(header)
+            pick = itemgetter(*(header.index(column) if column in header else width
+                                for column in SESSION_EXPORT_COLUMNS))
+            padding = [None] * (width + 1)
+            for row in reader:
+                if row:
+                    yield pick(row[:width] + padding)
+    elif fmt == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield tuple(map(json.loads(line).get, SESSION_EXPORT_COLUMNS))
+    else:
+        raise ValueError(f"Unknown import format: {fmt}")
+
+def as_int(value):
+    """Lenient int() for imported values; blanks and junk become 0"""
+    if isinstance(value, int):
+        return value
+    try:
+        return int(float(value)) if value not in (None, "") else 0
+    except (TypeError, ValueError):
+        return 0
+
+# ISO dates and times as SQLite's date functions read them: date, optional time and offset
+SQLITE_TIME_PATTERN = re.compile(r"(\d{4})-(\d\d)-(\d\d)(?:[ T](\d\d):(\d\d)(?::(\d\d)(?:\.\d+)?)?)?(?:Z|[+-]\d\d:\d\d)?")
+
+def readable_time(value):
+    """Whether SQLite can turn `value` into a day or timestamp (a NULL would break the NOT NULL columns)"""
+    match = SQLITE_TIME_PATTERN.fullmatch(value) if isinstance(value, str) else None
+    if not match:
+        return False
+    try:
+        datetime.datetime(*(int(part or 0) for part in match.groups()))
+    except ValueError:
+        return False
+    return True
+
+def normalize_session_record(record):
+    """Coerce an imported dict into a SESSION_EXPORT_COLUMNS tuple.
+
+    None if the row cannot become a session: no start_time, or a start_time,
+    end_time or date that SQLite cannot read.
+    """
+    start_time = record.get("start_time")
+    if not readable_time(start_time):
+        return None
+    if any(record.get(column) and not readable_time(record[column]) for column in ("end_time", "date")):
+        return None
+    return (
+        record.get("date") or start_time[:10],
+        record.get("task_category") or "General",
+        as_int(record.get("duration")),
+        as_int(record.get("completed")),
+        start_time,
+        record.get("end_time") or None,
+        as_int(record.get("paused")),
+        record.get("note") or None,
+        record.get("tags") or None,
+    )
+
+def drop_archived_duplicates(conn, years, after_id):
+    """Delete sessions rows (id > after_id) that the attached yearly archives already hold"""
+    for year in years:
+        conn.execute(f"""
+            DELETE FROM main.sessions WHERE id > ? AND EXISTS (
+                SELECT 1 FROM archive_{year}.sessions a JOIN main.categories c ON c.name = a.task_category
+                WHERE a.start_time = sessions.start_time AND c.id = sessions.category_id
+            )
+        """, (after_id,))
+
+# Staged import rows SQLite can't turn into a session: no start_time, or a
+# start_time, end_time or date its date functions can't read (NULL start_ts/day)
+UNREADABLE_IMPORT_ROW = """
+    (start_time GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' AND strftime('%s', start_time) IS NOT NULL
+     AND (NULLIF(end_time, '') IS NULL
+          OR (end_time GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' AND strftime('%s', end_time) IS NOT NULL))
+     AND (NULLIF(date, '') IS NULL
+          OR (date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' AND julianday(date) IS NOT NULL))) IS NOT 1
+"""
+
+def lenient_int_sql(column):
+    """SQL for as_int(): blanks, NULLs and junk become 0, decimals are truncated"""
+    return f"COALESCE(CAST(CAST({column} AS REAL) AS INTEGER), 0)"
+
+def stage_session_records(conn, path, fmt):
+    """Copy an import file's rows, unconverted, into temp.import_staging (SESSION_EXPORT_COLUMNS)"""
+    conn.execute(f"CREATE TEMP TABLE import_staging ({', '.join(SESSION_EXPORT_COLUMNS)})")
+    if fmt == "sqlite":
+        # Attached as import_src by import_sessions (ATTACH can't run mid-transaction);
+        # databases with a categories table keep the names in session_records
+        has_view = conn.execute(
+            "SELECT 1 FROM import_src.sqlite_master WHERE type = 'view' AND name = 'session_records'"
+        ).fetchone()
+        table = "session_records" if has_view else "sessions"
+        # Databases from before notes or tags lack those columns
+        columns = [column if has_column(conn, "import_src", table, column) else "NULL"
+                   for column in SESSION_EXPORT_COLUMNS]
+        conn.execute(f"INSERT INTO import_staging SELECT {', '.join(columns)} FROM import_src.{table} ORDER BY id")
+    else:
+        conn.executemany(f"INSERT INTO import_staging VALUES ({', '.join('?' * len(SESSION_EXPORT_COLUMNS))})",
+                         read_session_records(path, fmt))
+
+def import_sessions(conn, path, fmt=None, db_path=None):
+    """Bulk-import sessions in one transaction, skipping rows already present.
+
+    Rows are staged as they are, then checked, converted and inserted in a
+    few set-based statements. They are deduplicated on the
+    (start_time, task_category) natural key, including against the yearly
+    archives next to db_path, and derived data is rebuilt once at the end.
+    Rows with no readable start_time, end_time or date are counted apart.
+    Returns (inserted, skipped, invalid).
+    """
+    fmt = fmt or format_from_path(path)
+    conn.create_function("session_key_uuid", 2, session_key_uuid, deterministic=True)
+    conn.commit()
+    if fmt == "sqlite":
+        # Only SELECTed from; works for any FocusPro database version
+        conn.execute("ATTACH DATABASE ? AS import_src", (path,))
+    archives = archive_paths(db_path) if db_path else {}
+    if archives:
+        attach_archives(conn, db_path)
+    try:
+        conn.execute("BEGIN")
+        try:
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM sessions").fetchone()[0]
+            conn.execute("UPDATE sync_state SET merging = 1")
+            stage_session_records(conn, path, fmt)
+            invalid = conn.execute(f"DELETE FROM import_staging WHERE {UNREADABLE_IMPORT_ROW}").rowcount
+            seen = conn.execute("SELECT COUNT(*) FROM import_staging").fetchone()[0]
+            conn.execute("UPDATE import_staging SET task_category = 'General' WHERE NULLIF(task_category, '') IS NULL")
+            conn.execute("INSERT OR IGNORE INTO categories (name) SELECT DISTINCT task_category FROM import_staging")
+            # Text dates/times are converted to the integer columns in SQL. The
+            # uuid comes from the natural key, so the same file imported on two
+            # devices syncs as the same sessions; a row whose uuid an edited
+            # session already carries is that session, and is skipped too
+            conn.execute(f"""
+                INSERT OR IGNORE INTO sessions (day, category_id, duration, completed, start_ts, end_ts, paused, note,
+                                                uuid)
+                SELECT CAST(julianday(COALESCE(NULLIF(i.date, ''), substr(i.start_time, 1, 10))) - 2440587.5
+                            AS INTEGER),
+                       c.id, {lenient_int_sql("i.duration")}, {lenient_int_sql("i.completed")}, i.start_ts,
+                       CAST(strftime('%s', NULLIF(i.end_time, '')) AS INTEGER),
+                       {lenient_int_sql("i.paused")}, NULLIF(i.note, ''), session_key_uuid(i.start_ts, c.name)
+                FROM (SELECT *, rowid AS row, CAST(strftime('%s', start_time) AS INTEGER) AS start_ts
+                      FROM import_staging) i
+                JOIN categories c ON c.name = i.task_category
+                ORDER BY i.row
+            """)
+            drop_archived_duplicates(conn, archives, last_id)
+            # Only sessions this import added get tags; existing ones keep theirs
+            tagged = [(session_id, parse_tags(tags)) for session_id, tags, _ in conn.execute("""
+                SELECT s.id, i.tags, MIN(i.rowid)
+                FROM import_staging i JOIN categories c ON c.name = i.task_category
+                JOIN main.sessions s
+                  ON s.start_ts = CAST(strftime('%s', i.start_time) AS INTEGER) AND s.category_id = c.id
+                WHERE i.tags <> '' AND s.id > ?
+                GROUP BY s.id
+            """, (last_id,)).fetchall()]
+            # In file order, so the first spelling of a tag is the one kept
+            ids = tag_ids(conn, list(dict.fromkeys(tag for _, tags in tagged for tag in tags)), create=True)
+            conn.executemany("INSERT INTO session_tags (session_id, tag_id) VALUES (?, ?)",
+                             [(session_id, ids[tag]) for session_id, tags in tagged for tag in tags])
+            inserted = conn.execute("SELECT COUNT(*) FROM main.sessions WHERE id > ?", (last_id,)).fetchone()[0]
+            stamp_new_sessions(conn, last_id)
+            rebuild_derived_data(conn, last_id)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("DROP TABLE IF EXISTS temp.import_staging")
+    finally:
+        if fmt == "sqlite":
+            conn.execute("DETACH DATABASE import_src")
+        if archives:
+            detach_archives(conn)
+    return inserted, seen - inserted, invalid
+
+ARCHIVE_DIR_NAME = "archive"
+DEFAULT_RETENTION_MONTHS = 0  # Raw rows older than this many months are archived; 0 (the default) keeps everything
+# Sessions moved per transaction. The pause between batches outlasts SQLite's busy-handler
+# sleep, so a session's own write gets the lock after at most one batch
+COMPACT_BATCH_SESSIONS = 2000
+COMPACT_BATCH_PAUSE = 0.1
+COMPACT_VACUUM_PAGES = 2048
+
+def archive_dir_for(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), ARCHIVE_DIR_NAME)
+
+def archive_paths(db_path):
+    """{year: path} of the yearly archive databases next to db_path"""
+    archive_dir = archive_dir_for(db_path)
+    paths = {}
+    if os.path.isdir(archive_dir):
+        for name in sorted(os.listdir(archive_dir)):
+            stem, ext = os.path.splitext(name)
+            if ext == ".db" and stem.startswith("focuspro-") and stem[9:].isdigit():
+                paths[int(stem[9:])] = os.path.join(archive_dir, name)
+    return paths
+
+def has_column(conn, schema, table, column):
+    return any(row[1] == column for row in conn.execute(f"PRAGMA {schema}.table_info({table})"))
+
+def attach_archives(conn, db_path):
+    """ATTACH every yearly archive and expose main + archived rows as temp.all_sessions.
+
+    Deep-history queries use all_sessions; call detach_archives() afterwards.
+    """
+    selects = [f"SELECT {', '.join(SESSION_EXPORT_COLUMNS)} FROM main.session_records"]
+    for year, path in archive_paths(db_path).items():
+        schema = f"archive_{year}"
+        conn.execute("ATTACH DATABASE ? AS ?", (path, schema))
+        # Archives from before notes or tags existed lack those columns until compacted into again
+        columns = [column if has_column(conn, schema, "sessions", column) else f"NULL AS {column}"
+                   for column in SESSION_EXPORT_COLUMNS]
+        selects.append(f"SELECT {', '.join(columns)} FROM {schema}.sessions")
+    conn.execute("DROP VIEW IF EXISTS temp.all_sessions")
+    conn.execute(f"CREATE TEMP VIEW all_sessions AS {' UNION ALL '.join(selects)}")
+
+def detach_archives(conn):
+    conn.execute("DROP VIEW IF EXISTS temp.all_sessions")
+    for _, name, _ in conn.execute("PRAGMA database_list").fetchall():
+        if name.startswith("archive_"):
+            conn.execute(f"DETACH DATABASE {name}")
+
+def compact_old_sessions(conn, db_path, retention_months, today=None):
+    """Move raw sessions older than retention_months into yearly archive files.
+
+    Their minutes stay in daily_totals (as archived_minutes), so analytics
+    are unchanged. Sessions move COMPACT_BATCH_SESSIONS at a time, each
+    batch its own transaction, so the write lock is never held for long.
+    Freed pages are returned with incremental_vacuum, COMPACT_VACUUM_PAGES
+    at a time. Returns the number of sessions moved.
+    """
+    if retention_months <= 0:
+        return 0
+    today = today or datetime.date.today()
+    cutoff = epoch_day(today - relativedelta(months=retention_months))
+    conn.commit()
+
+    years = sorted({day_to_date(row[0]).year for row in conn.execute(
+        "SELECT DISTINCT day FROM sessions WHERE day < ?", (cutoff,)
+    )})
+    moved = 0
+    for year in years:
+        path = os.path.join(archive_dir_for(db_path), f"focuspro-{year}.db")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn.execute("ATTACH DATABASE ? AS archive", (path,))
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS archive.sessions (
+                    id INTEGER PRIMARY KEY,
+                    date TEXT NOT NULL,
+                    task_category TEXT NOT NULL,
+                    duration INTEGER NOT NULL,
+                    completed INTEGER NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT,
+                    paused INTEGER NOT NULL DEFAULT 0,
+                    note TEXT,
+                    tags TEXT,
+                    UNIQUE (start_time, task_category)
+                )
+            """)
+            for column in ("note", "tags"):
+                if not has_column(conn, "archive", "sessions", column):
+                    # Archive written before the column existed
+                    conn.execute(f"ALTER TABLE archive.sessions ADD COLUMN {column} TEXT")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS archive.session_events (
+                    id INTEGER PRIMARY KEY,
+                    session_id INTEGER NOT NULL,
+                    kind INTEGER NOT NULL,
+                    ts INTEGER NOT NULL,
+                    elapsed INTEGER NOT NULL
+                )
+            """)
+            old = "day < :cutoff AND day >= :year_start AND day < :year_end"
+            params = {
+                "cutoff": cutoff,
+                "year_start": epoch_day(datetime.date(year, 1, 1)),
+                "year_end": epoch_day(datetime.date(year + 1, 1, 1)),
+                "limit": COMPACT_BATCH_SESSIONS,
+            }
+            while True:
+                # IMMEDIATE: take the write lock up front rather than upgrade to it mid-batch
+                conn.execute("BEGIN IMMEDIATE")
+                batch = conn.execute(f"SELECT id, day FROM sessions WHERE {old} ORDER BY day, id LIMIT :limit",
+                                     params).fetchall()
+                if not batch:
+                    conn.rollback()
+                    break
+                days = sorted({day for _, day in batch})
+                params["ids"] = json.dumps([session_id for session_id, _ in batch])
+                selected = "id IN (SELECT value FROM json_each(:ids))"
+
+                # Rows already archived (e.g. re-imported) are counted there already
+                duplicates = [row[0] for row in conn.execute(f"""
+                    SELECT id FROM sessions WHERE {selected} AND EXISTS (
+                        SELECT 1 FROM archive.sessions a JOIN main.categories c ON c.name = a.task_category
+                        WHERE a.start_time = sessions.start_time AND c.id = sessions.category_id
+                    )
+                """, params)]
+                replay_hour_buckets(conn, session_ids=duplicates, sign=-1)
+                conn.execute("DELETE FROM sessions WHERE id IN (SELECT value FROM json_each(?))",
+                             (json.dumps(duplicates),))
+                conn.execute(f"""
+                    INSERT INTO daily_totals (day, category_id, archived_minutes, archived_sessions)
+                    SELECT day, category_id, SUM(completed), COUNT(*)
+                    FROM sessions WHERE {selected} GROUP BY day, category_id
+                    ON CONFLICT (day, category_id) DO UPDATE SET
+                        archived_minutes = archived_minutes + excluded.archived_minutes,
+                        archived_sessions = archived_sessions + excluded.archived_sessions
+                """, params)
+                columns = ", ".join(("id",) + SESSION_EXPORT_COLUMNS)
+                conn.execute(f"INSERT INTO archive.sessions ({columns}) SELECT {columns} FROM session_records "
+                             f"WHERE {selected}", params)
+                conn.execute(f"""
+                    INSERT INTO archive.session_events (session_id, kind, ts, elapsed)
+                    SELECT session_id, kind, ts, elapsed FROM session_events
+                    WHERE session_id IN (SELECT id FROM sessions WHERE {selected}) ORDER BY id
+                """, params)
+                conn.execute("DELETE FROM session_events WHERE session_id IN (SELECT value FROM json_each(:ids))",
+                             params)
+                moved += conn.execute(f"DELETE FROM sessions WHERE {selected}", params).rowcount
+                refresh_daily_totals(conn, days)
+                conn.commit()
+                time.sleep(COMPACT_BATCH_PAUSE)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("DETACH DATABASE archive")
+
+    # Freed pages go back in steps as well; executescript steps each pragma to completion
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0] if moved else 0
+    while free:
+        conn.executescript(f"PRAGMA incremental_vacuum({COMPACT_VACUUM_PAGES});")
+        time.sleep(COMPACT_BATCH_PAUSE)
+        free, before = conn.execute("PRAGMA freelist_count").fetchone()[0], free
+        if free >= before:
+            break  # Not an auto_vacuum = INCREMENTAL database yet
+    return moved
+
+BACKUP_DIR_NAME = "backups"
+DEFAULT_BACKUP_KEEP = 7
+BACKUP_INTERVAL_HOURS = 24
+# Small steps with a pause between them: the source is only read-locked
+# while a step runs, so a session's progress write waits at most one step
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_PAUSE = 0.005
+# Writes through other connections restart a stepped copy; after this many
+# restarts the rest is copied in one step, holding writers off for one pass
+BACKUP_MAX_RESTARTS = 3
+
+# A backup written without a label; only these count towards `keep`
+ROUTINE_BACKUP_NAME = re.compile(r"focuspro-\d{8}-\d{6}\.db")
+
+class BackupRestarted(Exception):
+    """A stepped backup was restarted by other writers too often"""
+
+def backup_dir_for(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), BACKUP_DIR_NAME)
+
+def list_backups(db_path):
+    """Backup files next to db_path, newest first"""
+    backup_dir = backup_dir_for(db_path)
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [name for name in os.listdir(backup_dir) if name.startswith("focuspro-") and name.endswith(".db")]
+    return [os.path.join(backup_dir, name) for name in sorted(names, reverse=True)]
+
+def check_database_file(path):
+    """Raise sqlite3.DatabaseError unless path is an intact FocusPro database"""
+    conn = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        # A truncated file reads as an empty database, which passes the check
+        has_sessions = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sessions'").fetchone()
+    finally:
+        conn.close()
+    if result != "ok":
+        raise sqlite3.DatabaseError(f"{os.path.basename(path)} failed the integrity check: {result}")
+    if not has_sessions:
+        raise sqlite3.DatabaseError(f"{os.path.basename(path)} is not a FocusPro database")
+
+def backup_database(conn, dest_path, pages=BACKUP_PAGES_PER_STEP, pause=BACKUP_STEP_PAUSE):
+    """Copy conn's database to dest_path while it stays in use, then verify the copy.
+
+    Uses the SQLite online backup API, so the copy is a consistent snapshot
+    of what is committed. A write through another connection restarts the
+    copy from the first page; past BACKUP_MAX_RESTARTS it is finished in
+    one step instead.
+    """
+    partial = dest_path + ".part"
+    dest = sqlite3.connect(partial)
+    left, restarts = None, 0
+
+    def progress(status, remaining, total):
+        nonlocal left, restarts
+        if left is not None and remaining > left:
+            restarts += 1
+            if restarts > BACKUP_MAX_RESTARTS:
+                raise BackupRestarted()
+        left = remaining
+        time.sleep(pause)
+
+    try:
+        try:
+            conn.backup(dest, pages=pages, progress=progress)
+        except BackupRestarted:
+            conn.backup(dest)
+    finally:
+        dest.close()
+    try:
+        check_database_file(partial)
+    except sqlite3.DatabaseError:
+        os.remove(partial)
+        raise
+    os.replace(partial, dest_path)
+
+def create_backup(conn, db_path, keep=DEFAULT_BACKUP_KEEP, label=""):
+    """Write a verified, timestamped backup and delete all but the newest `keep` unlabelled ones (None: keep all)"""
+    backup_dir = backup_dir_for(db_path)
+    os.makedirs(backup_dir, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(backup_dir, f"focuspro-{stamp}{label}.db")
+    backup_database(conn, path)
+    if keep is not None:
+        # Labelled copies (such as the one a restore makes) are never rotated out
+        routine = [old for old in list_backups(db_path) if ROUTINE_BACKUP_NAME.fullmatch(os.path.basename(old))]
+        for old in routine[max(keep, 1):]:
+            os.remove(old)
+    return path
+
+def backup_age_hours(db_path):
+    """Hours since the newest backup (None if there is none)"""
+    backups = list_backups(db_path)
+    if not backups:
+        return None
+    return (time.time() - os.path.getmtime(backups[0])) / 3600
+
+def restore_backup(conn, db_path, backup_path):
+    """Replace the live database behind conn with a backup, keeping a backup of the current state.
+
+    The backup is verified first, copied in through the backup API (so
+    conn stays usable) and migrated if it predates the current schema.
+    """
+    check_database_file(backup_path)
+    conn.commit()
+    current = create_backup(conn, db_path, keep=None, label="-before-restore")
+
+    def copy_into_live(path):
+        source = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+        try:
+            source.backup(conn)
+        finally:
+            source.close()
+
+    try:
+        copy_into_live(backup_path)
+        migrate_database(conn)
+    except sqlite3.Error:
+        copy_into_live(current)
+        raise
+    # The restored clock is behind what this device already published; as
+    # a new sync device its stamps can't collide with those
+    conn.execute("UPDATE sync_state SET device = ?", (str(uuid.uuid4()),))
+    conn.commit()
+
+SYNC_FILE_PREFIX = "focuspro-sync-"
+
+def change_set_name(device, clock):
+    return f"{SYNC_FILE_PREFIX}{device}-{clock:012d}.jsonl"
+
+def parse_change_set_name(name):
+    """(device, clock) from a change-set file name, or None for other files"""
+    stem, ext = os.path.splitext(name)
+    if ext != ".jsonl" or not stem.startswith(SYNC_FILE_PREFIX):
+        return None
+    device, _, clock = stem[len(SYNC_FILE_PREFIX):].rpartition("-")
+    return (device, int(clock)) if device and clock.isdigit() else None
+
+def export_changes(conn, folder):
+    """Write this device's session changes since its last export as a change-set file in folder.
+
+    Only finished sessions are sent; running ones get a new stamp when they
+    stop. Deleted sessions are sent as {"uuid", "deleted": true} tombstones.
+    Returns (path, rows); path is None when there is nothing new.
+    """
+    conn.commit()
+    # IMMEDIATE: the clock read, the rows and the new watermark must agree
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        device, clock, exported = conn.execute(
+            "SELECT device, clock, exported_clock FROM sync_state"
+        ).fetchone()
+        cursor = conn.execute(f"""
+            SELECT {', '.join('r.' + column for column in SESSION_EXPORT_COLUMNS)}, l.session_id, l.uuid, l.clock
+            FROM sync_log l LEFT JOIN session_records r ON r.id = l.session_id
+            WHERE l.device = ? AND l.clock > ? AND (r.end_time IS NOT NULL OR l.session_id IS NULL)
+            ORDER BY l.clock
+        """, (device, exported))
+        path, count = None, 0
+        rows = cursor.fetchmany(5000)
+        if rows:
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, change_set_name(device, clock))
+            partial = path + ".part"
+            with open(partial, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"device": device, "clock": clock, "since": exported}) + "\n")
+                while rows:
+                    for row in rows:
+                        session_id, session_uuid, row_clock = row[-3:]
+                        if session_id is None:
+                            record = {"uuid": session_uuid, "deleted": True}
+                        else:
+                            record = dict(zip(SESSION_EXPORT_COLUMNS, row))
+                            record["uuid"] = session_uuid
+                        record["clock"] = row_clock
+                        f.write(json.dumps(record) + "\n")
+                        count += 1
+                    rows = cursor.fetchmany(5000)
+            # Readers on other machines never see a half-written file
+            os.replace(partial, path)
+        conn.execute("UPDATE sync_state SET exported_clock = clock")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return path, count
+
+def read_change_set(path):
+    """(header, records) of a change-set file"""
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        return header, [json.loads(line) for line in f if line.strip()]
+
+def merge_changes(conn, folder, db_path=None):
+    """Merge change-sets written by other devices into this database.
+
+    A session is identified by its uuid (derived from the start time and
+    category name for records that carry none), so category edits and
+    deletes reach every device. When both sides changed a session, the
+    higher (clock, device) stamp wins, a tombstone included, so every device
+    converges on the same rows whatever order files arrive in, and
+    re-reading a file changes nothing. Returns the number of sessions
+    added, updated or deleted.
+    """
+    device = conn.execute("SELECT device FROM sync_state").fetchone()[0]
+    applied = set(conn.execute("SELECT device, clock FROM sync_applied").fetchall())
+    pending = []
+    for name in sorted(os.listdir(folder)) if os.path.isdir(folder) else ():
+        parsed = parse_change_set_name(name)
+        if parsed and parsed[0] != device and parsed not in applied:
+            pending.append((parsed[0], parsed[1], os.path.join(folder, name)))
+    if not pending:
+        return 0
+
+    categories = CategoryCache(conn)
+    archives = archive_paths(db_path) if db_path else {}
+    conn.create_function("session_key_uuid", 2, session_key_uuid, deterministic=True)
+    conn.commit()
+    if archives:
+        attach_archives(conn, db_path)
+    try:
+        conn.execute("BEGIN")
+        try:
+            conn.execute("UPDATE sync_state SET merging = 1")
+            conn.execute("""
+                CREATE TEMP TABLE sync_in (
+                    uuid TEXT PRIMARY KEY, day INTEGER, category_id INTEGER, duration INTEGER, completed INTEGER,
+                    start_ts INTEGER, end_ts INTEGER, paused INTEGER, note TEXT, tags TEXT, deleted INTEGER,
+                    clock INTEGER, device TEXT
+                )
+            """)
+            for peer, clock, path in pending:
+                _, records = read_change_set(path)
+                rows = []
+                for record in records:
+                    stamp = (as_int(record.get("clock")), peer)
+                    if record.get("deleted"):
+                        if isinstance(record.get("uuid"), str):
+                            rows.append((record["uuid"],) + (None,) * 11 + (1,) + stamp)
+                        continue
+                    row = normalize_session_record(record)
+                    if row is not None:
+                        session_uuid = record.get("uuid") if isinstance(record.get("uuid"), str) else None
+                        rows.append((session_uuid, row[4], row[1], row[0], categories.id_for(row[1]))
+                                    + row[2:] + (0,) + stamp)
+                # Several files may carry the same session; keep its newest version
+                conn.executemany("""
+                    INSERT INTO sync_in VALUES (
+                        COALESCE(?, session_key_uuid(CAST(strftime('%s', ?) AS INTEGER), ?)),
+                        CAST(julianday(?) - 2440587.5 AS INTEGER), ?, ?, ?,
+                        CAST(strftime('%s', ?) AS INTEGER), CAST(strftime('%s', ?) AS INTEGER), ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (uuid) DO UPDATE SET
+                        day = excluded.day, category_id = excluded.category_id, duration = excluded.duration,
+                        completed = excluded.completed, start_ts = excluded.start_ts, end_ts = excluded.end_ts,
+                        paused = excluded.paused, note = excluded.note, tags = excluded.tags,
+                        deleted = excluded.deleted, clock = excluded.clock, device = excluded.device
+                    WHERE (excluded.clock, excluded.device) > (sync_in.clock, sync_in.device)
+                """, rows)
+                conn.execute("INSERT INTO sync_applied (device, clock) VALUES (?, ?)", (peer, clock))
+            # Versions older than what this device has, live or deleted, lose
+            conn.execute("""
+                DELETE FROM sync_in WHERE (clock, device) <= (SELECT clock, device FROM sync_log l WHERE l.uuid = sync_in.uuid)
+            """)
+
+            # Deletes: take the sessions out of the derived data, keep the tombstones
+            deleted = conn.execute("""
+                SELECT s.id, s.day FROM sync_in i JOIN sessions s ON s.uuid = i.uuid WHERE i.deleted
+            """).fetchall()
+            replay_hour_buckets(conn, session_ids=[row[0] for row in deleted], sign=-1)
+            conn.execute("""
+                DELETE FROM session_events WHERE session_id IN (
+                    SELECT s.id FROM sync_in i JOIN sessions s ON s.uuid = i.uuid WHERE i.deleted
+                )
+            """)
+            conn.execute("DELETE FROM sessions WHERE uuid IN (SELECT uuid FROM sync_in WHERE deleted)")
+            conn.execute("""
+                INSERT OR REPLACE INTO sync_log (uuid, session_id, clock, device)
+                SELECT uuid, NULL, clock, device FROM sync_in WHERE deleted
+            """)
+
+            # Sessions that are new here; one whose natural key is already
+            # taken by a different session is left out
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM sessions").fetchone()[0]
+            conn.execute("""
+                INSERT OR IGNORE INTO sessions (day, category_id, duration, completed, start_ts, end_ts, paused, note, uuid)
+                SELECT day, category_id, duration, completed, start_ts, end_ts, paused, note, uuid
+                FROM sync_in WHERE NOT deleted ORDER BY start_ts
+            """)
+            drop_archived_duplicates(conn, archives, last_id)
+
+            # Sessions both sides have, where the incoming version wins; only
+            # the stamp moves when the values already agree. CROSS JOIN keeps
+            # the (small, unanalyzed) change-set as the outer loop.
+            conn.execute("""
+                CREATE TEMP TABLE sync_won AS
+                SELECT s.id, i.*,
+                       (s.category_id, s.duration, s.completed, s.end_ts, s.paused, s.note)
+                       IS NOT (i.category_id, i.duration, i.completed, i.end_ts, i.paused, i.note) AS changed
+                FROM sync_in i CROSS JOIN sessions s ON s.uuid = i.uuid
+                WHERE s.id <= ? AND NOT i.deleted
+            """, (last_id,))
+            # Their local event log described the old version (and category)
+            won = [row[0] for row in conn.execute("SELECT id FROM sync_won WHERE changed")]
+            replay_hour_buckets(conn, session_ids=won, sign=-1)
+            conn.execute("DELETE FROM session_events WHERE session_id IN (SELECT id FROM sync_won WHERE changed)")
+            # OR IGNORE: a category change onto another session's natural key keeps the old category
+            conn.execute("""
+                UPDATE OR IGNORE sessions SET category_id = w.category_id, duration = w.duration,
+                                              completed = w.completed, end_ts = w.end_ts, paused = w.paused,
+                                              note = w.note
+                FROM sync_won w WHERE sessions.id = w.id AND w.changed
+            """)
+            # Tags travel with the winning version, whether or not the other columns changed
+            for session_id, tags in conn.execute("""
+                SELECT s.id, i.tags FROM sessions s JOIN sync_in i ON s.uuid = i.uuid
+                WHERE s.id > ? AND i.tags IS NOT NULL
+                UNION ALL
+                SELECT id, tags FROM sync_won
+            """, (last_id,)).fetchall():
+                set_session_tags(conn, session_id, tags)
 
-    threading.Thread(target=server_wrapper, daemon=True).start()
+            conn.execute("""
+                INSERT OR REPLACE INTO sync_log (uuid, session_id, clock, device)
+                SELECT s.uuid, s.id, i.clock, i.device FROM sessions s JOIN sync_in i ON s.uuid = i.uuid
+                WHERE s.id > ?
+                UNION ALL
+                SELECT uuid, id, clock, device FROM sync_won
+            """, (last_id,))
+            # Lamport rule: our next stamp must beat everything we have seen
+            conn.execute("""
+                UPDATE sync_state SET merging = 0,
+                    clock = MAX(clock, (SELECT COALESCE(MAX(clock), 0) FROM sync_in))
+            """)
 
-def get_appdata_path():
-    """Get the appropriate user application data directory."""
-    if sys.platform == "win32":
-        return os.path.join(os.environ["APPDATA"], "RemeiniumFocusPro")
-    elif sys.platform == "darwin": # macOS
-        return os.path.join(os.path.expanduser("~/Library/Application Support"), "RemeiniumFocusPro")
-    else: # Linux and other Unix-like systems
-        xdg_data_home = os.environ.get("XDG_DATA_HOME", os.path.join(os.path.expanduser("~"), ".local", "share"))
-        app_data_path = os.path.join(xdg_data_home, "RemeiniumFocusPro")
+            changed = (conn.execute("SELECT COUNT(*) FROM sessions WHERE id > ?", (last_id,)).fetchone()[0]
+                       + len(won) + len(deleted))
+            backfill_session_events(conn, last_id, won)
+            replay_hour_buckets(conn, last_id, won)
+            days = {row[1] for row in deleted}
+            days.update(row[0] for row in conn.execute("SELECT DISTINCT day FROM sync_in WHERE NOT deleted"))
+            refresh_daily_totals(conn, sorted(days))
+            conn.execute("DROP TABLE temp.sync_in")
+            conn.execute("DROP TABLE temp.sync_won")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        if archives:
+            detach_archives(conn)
+    return changed
 
-        os.makedirs(app_data_path, exist_ok=True)
-        return app_data_path
+def sync_folder(conn, folder, db_path=None):
+    """Two-way sync through a shared folder: merge other devices' change-sets, then publish ours.
 
-def open_file(filepath):
-    if sys.platform.startswith("darwin"):  # macOS
-        subprocess.call(('open', filepath))
-    elif sys.platform.startswith("win"):
-        os.startfile(filepath)
-    else:  # Linux
-        subprocess.call(('xdg-open', filepath))
+    Returns (received, sent) session counts.
+    """
+    received = merge_changes(conn, folder, db_path)
+    _, sent = export_changes(conn, folder)
+    return received, sent
+
+def member_totals_sql(version):
+    """SELECT of (day, category, minutes, sessions) rows for a database at schema `version`"""
+    if version >= SCHEMA_MIGRATIONS.index(migration_categories) + 1:
+        return """SELECT d.day AS day, c.name AS category, d.minutes AS minutes, d.sessions AS sessions
+                  FROM daily_totals d JOIN categories c ON c.id = d.category_id"""
+    if version >= SCHEMA_MIGRATIONS.index(migration_integer_times) + 1:
+        return """SELECT day, task_category AS category, minutes, sessions FROM daily_totals"""
+    if version >= SCHEMA_MIGRATIONS.index(migration_daily_totals) + 1:
+        return """SELECT CAST(julianday(date) - 2440587.5 AS INTEGER) AS day, task_category AS category,
+                         minutes, sessions
+                  FROM daily_totals"""
+    return """SELECT CAST(julianday(date) - 2440587.5 AS INTEGER) AS day, task_category AS category,
+                     SUM(completed) AS minutes, COUNT(*) AS sessions
+              FROM sessions GROUP BY date, task_category"""
+
+def member_name(path):
+    """alice.db -> alice; alice/focuspro.db -> alice"""
+    path = pathlib.Path(path)
+    return path.parent.name if path.stem in ("focuspro", "focus_sessions") else path.stem
+
+def aggregate_member_database(path, start_day, end_day):
+    """Partial team-report totals for one member database (runs in a worker process).
+
+    The file is opened read-only (mode=ro) and never migrated, so every
+    FocusPro schema version is read as it is. Errors are reported in the
+    result instead of raised, so one bad file doesn't sink the report.
+    """
+    result = {"member": member_name(path), "path": path, "minutes": 0, "sessions": 0,
+              "daily": {}, "categories": {}, "streak": 0, "error": None}
+    try:
+        conn = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            totals = member_totals_sql(version)
+            rows = conn.execute(f"""
+                SELECT day, category, SUM(minutes), SUM(sessions) FROM ({totals})
+                WHERE day BETWEEN ? AND ? GROUP BY day, category
+            """, (start_day, end_day)).fetchall()
+            if version >= SCHEMA_MIGRATIONS.index(migration_goal_history) + 1:
+                # Each day against the goal in effect on it, as goal_met does
+                goal = """(SELECT g.minutes FROM goal_history g WHERE g.effective_day <= t.day
+                           ORDER BY g.effective_day DESC LIMIT 1)"""
+            else:
+                # Older versions kept one goal, in hours, for every day
+                row = conn.execute("SELECT value FROM settings WHERE key = 'daily_goal'").fetchone()
+                goal = str(int(row[0]) * 60) if row else None
+            met_days = conn.execute(f"""
+                SELECT t.day FROM ({totals}) t WHERE t.day <= ?
+                GROUP BY t.day HAVING SUM(t.minutes) >= COALESCE({goal or 'NULL'}, ?) ORDER BY t.day DESC
+            """, (end_day, DEFAULT_DAILY_GOAL_HOURS * 60))
+            # Consecutive goal-met days ending on end_day (or the day before, if it isn't over yet)
+            expected = None
+            for (day,) in met_days:
+                if expected is None:
+                    if day < end_day - 1:
+                        break
+                    expected = day
+                if day != expected:
+                    break
+                result["streak"] += 1
+                expected -= 1
+        finally:
+            conn.close()
+    except (sqlite3.Error, ValueError) as e:
+        # ValueError: a daily_goal setting that is not a number
+        result["error"] = str(e)
+        return result
+
+    for day, category, minutes, sessions in rows:
+        result["minutes"] += minutes
+        result["sessions"] += sessions
+        result["daily"][day] = result["daily"].get(day, 0) + minutes
+        result["categories"][category] = result["categories"].get(category, 0) + minutes
+    return result
+
+def merge_member_totals(partials):
+    """Combine per-member partial totals into team totals and a leaderboard"""
+    daily, categories = {}, {}
+    for partial in partials:
+        for day, minutes in partial["daily"].items():
+            daily[day] = daily.get(day, 0) + minutes
+        for category, minutes in partial["categories"].items():
+            categories[category] = categories.get(category, 0) + minutes
+    members = [partial for partial in partials if not partial["error"]]
+    return {
+        "minutes": sum(partial["minutes"] for partial in members),
+        "sessions": sum(partial["sessions"] for partial in members),
+        "daily": dict(sorted(daily.items())),
+        "categories": dict(sorted(categories.items(), key=lambda item: -item[1])),
+        "leaderboard": sorted(members, key=lambda partial: (-partial["minutes"], partial["member"])),
+        "errors": [partial for partial in partials if partial["error"]],
+    }
+
+def team_report(paths, start_day, end_day, workers=None):
+    """Aggregate many member databases, one file per task on a process pool"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 2:
+        partials = [aggregate_member_database(path, start_day, end_day) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(aggregate_member_database, paths, repeat(start_day), repeat(end_day),
+                                     chunksize=max(1, len(paths) // (workers * 4))))
+    return merge_member_totals(partials)
+
+def find_member_databases(folder):
+    """*.db files in folder, plus <member>/focuspro.db in its subfolders"""
+    paths = []
+    for entry in sorted(os.scandir(folder), key=lambda entry: entry.name):
+        if entry.is_file() and entry.name.endswith(".db"):
+            paths.append(entry.path)
+        elif entry.is_dir() and os.path.isfile(os.path.join(entry.path, "focuspro.db")):
+            paths.append(os.path.join(entry.path, "focuspro.db"))
+    return paths
 
 # Configure CustomTkinter
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+# User settings: key -> (type, default, check). Stored as text in the settings table;
+# bookkeeping rows such as goal_closed_through are written by their own code paths
+SETTINGS_SCHEMA = {
+    "daily_goal": (int, DEFAULT_DAILY_GOAL_HOURS, lambda hours: 1 <= hours <= 24),
+    "session_duration": (int, 25, lambda minutes: 1 <= minutes <= 240),
+    "selected_task": (str, "", None),
+    "sidebar_collapsed": (bool, True, None),
+    "sync_folder": (str, "", None),
+    "backup_keep": (int, DEFAULT_BACKUP_KEEP, lambda keep: keep >= 1),
+    "retention_months": (int, DEFAULT_RETENTION_MONTHS, lambda months: months >= 0),
+    "monthly_goal": (int, DEFAULT_MONTHLY_GOAL_HOURS, lambda hours: 1 <= hours <= 744),
+}
+
+class SettingsStore:
+    """Typed, cached view of the settings table with write-behind.
+
+    Every setting is read in one query up front and served from memory.
+    set() validates, updates the cache and notifies subscribers at once;
+    the rows are written later, all changes in one transaction, by a flush
+    that `schedule(delay_ms, func)` (Tk's after) runs. Without a scheduler,
+    as in the CLI, set() writes through.
+    """
+
+    FLUSH_DELAY_MS = 500
+
+    def __init__(self, conn, schedule=None):
+        self.conn = conn
+        self.schedule = schedule
+        self.subscribers = {}
+        self.dirty = set()
+        self.flush_pending = False
+        self.reload()
+
+    def reload(self):
+        """Re-read every setting, e.g. after a restore replaced the database"""
+        self.values = {key: default for key, (_, default, _) in SETTINGS_SCHEMA.items()}
+        for key, text in self.conn.execute("SELECT key, value FROM settings"):
+            if key in SETTINGS_SCHEMA:
+                try:
+                    self.values[key] = self.parse(key, text)
+                except ValueError:
+                    pass  # Keep the default for a hand-edited or outdated value
+        self.dirty.clear()
+
+    @staticmethod
+    def parse(key, value):
+        """Convert and validate a value for `key`; raises ValueError if it doesn't fit"""
+        kind, _, check = SETTINGS_SCHEMA[key]
+        if kind is bool and isinstance(value, str):
+            value = value not in ("0", "False", "false", "")
+        value = kind(value)
+        if check is not None and not check(value):
+            raise ValueError(f"Invalid value for {key}: {value!r}")
+        return value
+
+    def get(self, key):
+        return self.values[key]
+
+    def set(self, key, value):
+        """Validate and store a setting; raises ValueError (KeyError for unknown keys)"""
+        value = self.parse(key, value)
+        if value == self.values[key]:
+            return
+        self.values[key] = value
+        self.dirty.add(key)
+        for callback in self.subscribers.get(key, ()):
+            callback(value)
+        if self.schedule is None:
+            self.flush()
+        elif not self.flush_pending:
+            self.flush_pending = True
+            self.schedule(self.FLUSH_DELAY_MS, self.flush)
+
+    def subscribe(self, key, callback):
+        """Call callback(value) whenever `key` changes"""
+        self.subscribers.setdefault(key, []).append(callback)
+
+    def flush(self):
+        """Write every changed setting in one transaction"""
+        self.flush_pending = False
+        if not self.dirty:
+            return
+        rows = [(key, str(int(self.values[key]) if SETTINGS_SCHEMA[key][0] is bool else self.values[key]))
+                for key in self.dirty]
+        try:
+            self.conn.executemany("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", rows)
+            self.conn.commit()
+            self.dirty.clear()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"Database error: {e}")
+
 class TimerApp(ctk.CTkFrame): 
     def resource_path(self, relative_path):
         """Get absolute path to resource, works for dev and PyInstaller"""
@@ -114,7 +3207,7 @@ class TimerApp(ctk.CTkFrame):
             master, 
             fg_color="transparent",
             width=550,
-            height=550
+            height=650
         )
         self.pack_propagate(False)
         self.grid_propagate(False)
@@ -127,18 +3220,18 @@ class TimerApp(ctk.CTkFrame):
             border_width=1,
             border_color="#333333",
             width=500,  
-            height=400
+            height=560
         )
         self.container.pack_propagate(False)
         self.container.pack(expand=True)
         
-        self.remaining_time = 0
-        self.is_running = False
-        self.is_paused = False
-        self.timer_thread = None
+        # All countdowns share one scheduler and one Tk `after` wakeup
+        self.scheduler = TimerScheduler()
+        self.wakeup_id = None
+        self.selected_timer = None
+        self.timer_rows = {}  # name -> (row frame, time label)
         self.sound_channel = None
         self.end_sound = None
-        self.max_time = 0
         
         # Initialize pygame for sound
         pygame.mixer.init()
@@ -237,139 +3330,880 @@ class TimerApp(ctk.CTkFrame):
         )
         self.pause_button.pack(side="left", padx=5)
 
-        self.stop_button = ctk.CTkButton(
-            self.control_frame, 
-            text="Stop", 
-            command=self.stop_timer,
-            state="disabled", 
-            fg_color="#262626", 
-            hover_color="#e3102c", 
-            text_color="#efefef", 
-            width=80,
-            height=35,
-            corner_radius=6
-        )
-        self.stop_button.pack(side="left", padx=5)
+        self.stop_button = ctk.CTkButton(
+            self.control_frame, 
+            text="Stop", 
+            command=self.stop_timer,
+            state="disabled", 
+            fg_color="#262626", 
+            hover_color="#e3102c", 
+            text_color="#efefef", 
+            width=80,
+            height=35,
+            corner_radius=6
+        )
+        self.stop_button.pack(side="left", padx=5)
+
+        self.dismiss_button = ctk.CTkButton(
+            self.control_frame, 
+            text="Dismiss", 
+            command=self.dismiss_sound,
+            state="disabled", 
+            fg_color="#262626", 
+            hover_color="#a751c9", 
+            text_color="#efefef", 
+            width=80,
+            height=35,
+            corner_radius=6
+        )
+        self.dismiss_button.pack(side="left", padx=5)
+
+        # Active timers list
+        self.timer_list = ctk.CTkScrollableFrame(
+            self.container,
+            fg_color="#1f1f1f",
+            corner_radius=8,
+            height=110
+        )
+        self.timer_list.pack(fill="both", expand=True, padx=20, pady=(0, 15))
+
+    def set_custom_duration(self):
+        try:
+            minutes = float(self.duration_entry.get())
+            if minutes > 0:
+                self.start_timer(int(minutes * 60))
+                self.duration_entry.delete(0, 'end')  # Clear the entry after starting
+        except ValueError:
+            pass
+
+    def unique_timer_name(self, duration):
+        """Name a new countdown after its duration, e.g. 10:00 (2)"""
+        minutes, seconds = divmod(duration, 60)
+        base = f"{minutes:02d}:{seconds:02d}"
+        name, n = base, 1
+        while name in self.timer_rows:
+            n += 1
+            name = f"{base} ({n})"
+        return name
+
+    def start_timer(self, duration):
+        """Start a new countdown alongside any that are already running"""
+        name = self.unique_timer_name(duration)
+        self.scheduler.add(name, duration)
+        self.add_timer_row(name)
+        self.select_timer(name)
+        self.schedule_wakeup()
+
+    def add_timer_row(self, name):
+        row = ctk.CTkFrame(self.timer_list, fg_color="transparent")
+        row.pack(fill="x", pady=2)
+        ctk.CTkButton(
+            row,
+            text=name,
+            command=lambda n=name: self.select_timer(n),
+            width=120,
+            height=26,
+            fg_color="#262626",
+            hover_color="#333333",
+            text_color="#efefef"
+        ).pack(side="left", padx=(0, 10))
+        time_label = ctk.CTkLabel(row, text="", text_color="#D4D4D4")
+        time_label.pack(side="left")
+        ctk.CTkButton(
+            row,
+            text="✕",
+            command=lambda n=name: self.remove_timer(n),
+            width=26,
+            height=26,
+            fg_color="#262626",
+            hover_color="#e3102c",
+            text_color="#efefef"
+        ).pack(side="right")
+        self.timer_rows[name] = (row, time_label)
+
+    def remove_timer(self, name):
+        self.scheduler.cancel(name)
+        row, _ = self.timer_rows.pop(name)
+        row.destroy()
+        if name == self.selected_timer:
+            self.select_timer(next(iter(self.timer_rows), None))
+        self.schedule_wakeup()
+
+    def select_timer(self, name):
+        """Show the given countdown in the large label and control buttons"""
+        self.selected_timer = name
+        timer = self.scheduler.timers.get(name)
+        if timer is None:
+            finished = name is not None
+            self.stop_button.configure(state="normal" if finished else "disabled")
+            self.pause_button.configure(state="disabled", text="Pause")
+        else:
+            self.stop_button.configure(state="normal")
+            self.pause_button.configure(state="normal", text="Resume" if timer.paused else "Pause")
+        self.refresh_display()
+
+    def pause_timer(self):
+        timer = self.scheduler.timers.get(self.selected_timer)
+        if timer is None:
+            return
+        if timer.paused:
+            self.scheduler.resume(timer.name)
+            self.pause_button.configure(text="Pause")
+        else:
+            self.scheduler.pause(timer.name)
+            self.pause_button.configure(text="Resume")
+        self.refresh_display()
+        self.schedule_wakeup()
+
+    def schedule_wakeup(self):
+        """Arm the single `after` wakeup for the next deadline or display second"""
+        if self.wakeup_id is not None:
+            self.after_cancel(self.wakeup_id)
+            self.wakeup_id = None
+
+        delay = self.scheduler.next_wakeup_delay()
+        if delay is None:
+            return
+        self.wakeup_id = self.after(max(1, int(delay * 1000)), self.on_wakeup)
+
+    def on_wakeup(self):
+        self.wakeup_id = None
+        for timer in self.scheduler.pop_expired():
+            self.on_timer_finished(timer.name)
+        self.refresh_display()
+        self.schedule_wakeup()
+
+    def format_remaining(self, name):
+        remaining = int(math.ceil(self.scheduler.remaining(name)))
+        minutes, seconds = divmod(remaining, 60)
+        return f"{minutes:02d}:{seconds:02d}"
+
+    def refresh_display(self):
+        """Redraw the row labels and the selected countdown"""
+        for name, (_, time_label) in self.timer_rows.items():
+            if name in self.scheduler.timers:
+                text = self.format_remaining(name)
+                if self.scheduler.timers[name].paused:
+                    text += " ⏸"
+            else:
+                text = "Time's up!"
+            if time_label.cget("text") != text:
+                time_label.configure(text=text)
+
+        name = self.selected_timer
+        timer = self.scheduler.timers.get(name)
+        if timer is not None:
+            self.timer_label.configure(text=self.format_remaining(name))
+            self.progress_bar.set(self.scheduler.remaining(name) / timer.duration if timer.duration else 0.0)
+        elif name is not None:
+            self.timer_label.configure(text="Time's up!")
+            self.progress_bar.set(0.0)
+        else:
+            self.timer_label.configure(text="00:00")
+            self.progress_bar.set(0.0)
+
+    def on_timer_finished(self, name):
+        """Show the finished state for a countdown"""
+        self.dismiss_button.configure(state="normal")
+        self.play_finish_sound()
+        if name == self.selected_timer:
+            self.pause_button.configure(state="disabled")
+        self.lift()
+        self.focus_force() # Try to give the window focus
+
+    def play_finish_sound(self):
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+
+            # Load the sound file once; every finish replays the same Sound
+            if self.end_sound is None:
+                try:
+                    # sound_path = os.path.join(os.path.dirname(__file__), "timer.mp3")
+                    sound_path = self.resource_path('timer.mp3') 
+                    self.end_sound = pygame.mixer.Sound(sound_path)
+                except Exception as e: # Exception අල්ලා ගැනීම වැදගත්.
+                    print(f"Error loading finish sound: {e}") 
+
+            if self.end_sound:
+                self.sound_channel = self.end_sound.play()
+            else:
+                # Fallback to system beep
+                if sys.platform.startswith("win"):
+                    import winsound
+                    winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
+                else:
+                    print('\a')  # ASCII Bell (simple beep on Linux terminals)
+        except Exception as e:
+            print(f"Error playing sound: {e}")
+
+    def stop_timer(self):
+        """Remove the selected countdown"""
+        if self.selected_timer in self.timer_rows:
+            self.remove_timer(self.selected_timer)
+        self.dismiss_sound()
+
+    def dismiss_sound(self):
+        if hasattr(self, 'sound_channel') and self.sound_channel and self.sound_channel.get_busy():
+            self.sound_channel.stop()
+        pygame.mixer.stop()
+        self.dismiss_button.configure(state="disabled")
+        # Clear finished countdowns from the list
+        for name in [n for n in self.timer_rows if n not in self.scheduler.timers]:
+            self.remove_timer(name)
+
+class HistoryView(ctk.CTkFrame):
+    """Scrollable session history with note search and inline edit and delete.
+
+    Only VISIBLE_ROWS row widgets ever exist; scrolling re-fills them from
+    a SessionPager (or the search results), so the cost of a scroll step
+    doesn't grow with the history.
+    """
+
+    # (row field, header, width)
+    COLUMNS = (("date", "Date", 100), ("start", "Start", 60), ("category", "Category", 120),
+               ("minutes", "Focused", 110), ("note", "Note", 230))
+    SEARCH_LIMIT = 500
+
+    VISIBLE_ROWS = 12
+    WHEEL_ROWS = 3
+
+    def __init__(self, master, app):
+        super().__init__(master, corner_radius=12, fg_color="#171717", border_width=1, border_color="#333333")
+        self.app = app
+        self.pager = SessionPager(app.conn)
+        self.results = None  # note search hits, shown instead of the pager
+        self.top = 0
+        self.editing = None  # index of the row being edited
+
+        title_frame = ctk.CTkFrame(self, fg_color="transparent")
+        title_frame.pack(fill="x", pady=(20, 15), padx=20)
+        ctk.CTkLabel(
+            title_frame,
+            text="History",
+            font=ctk.CTkFont(size=20, weight="bold"),
+            text_color="#ffffff"
+        ).pack(side="left")
+        self.count_label = ctk.CTkLabel(title_frame, text="", font=ctk.CTkFont(size=13), text_color="#a1a1aa")
+        self.count_label.pack(side="right")
+        self.search_entry = ctk.CTkEntry(
+            title_frame,
+            width=220,
+            placeholder_text="Search notes",
+            fg_color="#262626",
+            border_color="#3f3f46",
+            text_color="#ffffff"
+        )
+        self.search_entry.pack(side="right", padx=(0, 15))
+        self.search_entry.bind("<Return>", lambda e: self.search())
+
+        body = ctk.CTkFrame(self, fg_color="transparent")
+        body.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+        self.scrollbar = ctk.CTkScrollbar(body, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.list_frame = ctk.CTkFrame(body, fg_color="transparent")
+        self.list_frame.pack(side="left", fill="both", expand=True)
+
+        header = ctk.CTkFrame(self.list_frame, fg_color="transparent")
+        header.pack(fill="x", pady=(0, 5))
+        for column, (_, text, width) in enumerate(self.COLUMNS):
+            ctk.CTkLabel(header, text=text, width=width, anchor="w", font=ctk.CTkFont(size=13, weight="bold"),
+                         text_color="#a1a1aa").grid(row=0, column=column, padx=5)
+
+        self.rows = [self.build_row(index) for index in range(self.VISIBLE_ROWS)]
+
+        # Wheel scrolling while the pointer is over the list
+        self.bind_pointer(self.list_frame)
+
+    def build_row(self, index):
+        """One reusable row: labels for display, a combo box and entry swapped in for editing"""
+        frame = ctk.CTkFrame(self.list_frame, fg_color="#1f1f1f", corner_radius=6, height=34)
+        frame.pack(fill="x", pady=2)
+        row = {"frame": frame, "session": None}
+        for column, (name, _, width) in enumerate(self.COLUMNS):
+            row[name] = ctk.CTkLabel(frame, text="", width=width, anchor="w", text_color="#efefef")
+            row[name].grid(row=0, column=column, padx=5, pady=3)
+        row["category_edit"] = ctk.CTkComboBox(frame, width=120, values=[], fg_color="#262626",
+                                               border_color="#3f3f46", button_color="#3f3f46")
+        row["minutes_edit"] = ctk.CTkEntry(frame, width=110, fg_color="#262626", border_color="#3f3f46")
+        row["note_edit"] = ctk.CTkEntry(frame, width=230, fg_color="#262626", border_color="#3f3f46")
+        buttons = ctk.CTkFrame(frame, fg_color="transparent")
+        buttons.grid(row=0, column=len(self.COLUMNS), padx=5, sticky="e")
+        frame.grid_columnconfigure(len(self.COLUMNS), weight=1)
+        row["edit"] = ctk.CTkButton(buttons, text="Edit", width=60, height=26, fg_color="#262626",
+                                    hover_color="#403f3f", command=lambda: self.toggle_edit(index))
+        row["edit"].pack(side="left", padx=(0, 5))
+        row["delete"] = ctk.CTkButton(buttons, text="Delete", width=60, height=26, fg_color="#262626",
+                                      hover_color="#7f1d1d", command=lambda: self.delete_row(index))
+        row["delete"].pack(side="left")
+        return row
+
+    def bind_pointer(self, widget):
+        """Track the pointer over widget and every Tk widget inside it.
+
+        CTk widgets are drawn by inner canvases and labels, and those get
+        the Enter/Leave events: moving onto a row leaves the frame's canvas.
+        Misc.bind binds the Tk widget itself, keeping CTk's own bindings.
+        """
+        Misc.bind(widget, "<Enter>", lambda e: self.bind_wheel(True), add="+")
+        Misc.bind(widget, "<Leave>", lambda e: self.bind_wheel(False), add="+")
+        for child in widget.winfo_children():
+            self.bind_pointer(child)
+
+    def bind_wheel(self, active):
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            if active:
+                self.bind_all(sequence, self.on_wheel)
+            else:
+                self.unbind_all(sequence)
+
+    def on_wheel(self, event):
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.scroll_to(self.top + (-self.WHEEL_ROWS if up else self.WHEEL_ROWS))
+
+    def count(self):
+        return len(self.results) if self.results is not None else self.pager.count
+
+    def on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.count()))
+        elif args[0] == "scroll":
+            step = self.VISIBLE_ROWS if args[2] == "pages" else 1
+            self.scroll_to(self.top + int(args[1]) * step)
+
+    def refresh(self):
+        """Re-read the history, e.g. after an import or sync"""
+        self.pager.reset()
+        if self.results is not None:
+            self.results = search_notes(self.app.conn, self.search_entry.get(), self.SEARCH_LIMIT)
+        self.scroll_to(self.top)
+
+    def search(self):
+        """Show the sessions whose notes match the search box, best first; empty shows everything"""
+        text = self.search_entry.get().strip()
+        self.results = search_notes(self.app.conn, text, self.SEARCH_LIMIT) if text else None
+        self.scroll_to(0)
+
+    def scroll_to(self, top):
+        count = self.count()
+        self.top = max(0, min(top, count - self.VISIBLE_ROWS))
+        self.editing = None
+        if self.results is not None:
+            sessions = self.results[self.top:self.top + self.VISIBLE_ROWS]
+        else:
+            sessions = self.pager.rows(self.top, self.VISIBLE_ROWS)
+        for index, row in enumerate(self.rows):
+            self.show_row(row, sessions[index] if index < len(sessions) else None)
+        if count:
+            self.scrollbar.set(self.top / count, min(1.0, (self.top + self.VISIBLE_ROWS) / count))
+        self.count_label.configure(
+            text=f"{count} matches" if self.results is not None else f"{count} sessions")
+
+    def show_row(self, row, session):
+        row["session"] = session
+        for name in ("category", "minutes", "note"):
+            row[name + "_edit"].grid_remove()
+            row[name].grid()
+        row["edit"].configure(text="Edit")
+        if session is None:
+            for name, _, _ in self.COLUMNS:
+                row[name].configure(text="")
+            row["edit"].configure(state="disabled")
+            row["delete"].configure(state="disabled")
+            return
+        _, _, date, category, duration, completed, start_time, _, note = session
+        row["date"].configure(text=date)
+        row["start"].configure(text=start_time[11:16])
+        row["category"].configure(text=category)
+        row["minutes"].configure(text=f"{completed} / {duration} min")
+        note = note or ""
+        row["note"].configure(text=note if len(note) <= 32 else note[:31] + "…")
+        # The running session is still being written by the timer
+        state = "disabled" if session[0] == self.app.engine.current_session_id and self.app.engine.session_active else "normal"
+        row["edit"].configure(state=state)
+        row["delete"].configure(state=state)
+
+    def toggle_edit(self, index):
+        row = self.rows[index]
+        if self.editing == index:
+            self.save_row(index)
+            return
+        if self.editing is not None:
+            self.show_row(self.rows[self.editing], self.rows[self.editing]["session"])
+        self.editing = index
+        _, _, _, category, _, completed, _, _, note = row["session"]
+        for name in ("category", "minutes", "note"):
+            row[name].grid_remove()
+        row["category_edit"].configure(values=self.app.categories.names())
+        row["category_edit"].set(category)
+        row["category_edit"].grid(row=0, column=2, padx=5)
+        row["minutes_edit"].delete(0, "end")
+        row["minutes_edit"].insert(0, str(completed))
+        row["minutes_edit"].grid(row=0, column=3, padx=5)
+        row["note_edit"].delete(0, "end")
+        row["note_edit"].insert(0, note or "")
+        row["note_edit"].grid(row=0, column=4, padx=5)
+        row["edit"].configure(text="Save")
+
+    def save_row(self, index):
+        row = self.rows[index]
+        session_id, day = row["session"][:2]
+        try:
+            minutes = int(row["minutes_edit"].get())
+            if not 0 <= minutes <= 24 * 60:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Please enter the focused minutes as a whole number")
+            return
+        category_id = self.app.categories.id_for(row["category_edit"].get().strip() or row["session"][3])
+        edit_session(self.app.conn, session_id, category_id, minutes, row["note_edit"].get().strip())
+        self.after_change(day, session_id)
+
+    def delete_row(self, index):
+        session_id, day, date, category = self.rows[index]["session"][:4]
+        if not messagebox.askyesno("Delete session", f"Delete the {category} session of {date}?"):
+            return
+        delete_session(self.app.conn, session_id)
+        self.after_change(day, session_id)
+
+    def after_change(self, day, session_id):
+        self.pager.forget_from((day, session_id))
+        # A session past midnight also has focus in the next day's hour buckets
+        for changed in (day, day + 1):
+            self.app.engine.rolling_stats.update_day(self.app.conn, changed)
+        if self.results is not None:
+            self.results = search_notes(self.app.conn, self.search_entry.get(), self.SEARCH_LIMIT)
+        self.scroll_to(self.top)
+        self.app.refresh_categories()
+        self.app.update_daily_progress()
+
+def project_series(data, start, x_scale, y_scale, left, bottom):
+    """{series name: flat [x0, y0, x1, y1, ...] canvas coordinates} of DailySeries.downsampled() output"""
+    return {
+        name: [coordinate for index, minutes in points
+               for coordinate in (left + (index - start) * x_scale, bottom - minutes * y_scale)]
+        for name, points in data.items()
+    }
+
+class ChartView(ctk.CTkFrame):
+    """Native trend chart of daily focus, in total and per category.
+
+    Drag to pan, use the wheel to zoom. Long ranges are LTTB-downsampled to
+    at most MAX_POINTS per series, and every series is a single canvas
+    line whose coordinates are replaced on redraw, so a frame costs about
+    the same whatever the range. Redraws are coalesced to one per frame.
+    """
+    RANGES = (("30 days", 30), ("1 year", 365), ("All", None))
+    MAX_POINTS = 300
+    MIN_SPAN = 7
+    ZOOM_STEP = 1.25
+    PAD_LEFT, PAD_RIGHT, PAD_TOP, PAD_BOTTOM = 50, 20, 30, 30
+    GRID_LINES = 4
+    DATE_LABELS = 5
+    TOTAL_COLOR = "#efefef"
+
+    def __init__(self, master, app):
+        super().__init__(master, corner_radius=12, fg_color="#171717", border_width=1, border_color="#333333")
+        self.app = app
+        self.series = None
+        self.start = self.end = 0  # visible day indices, end exclusive
+        self.lines = {}  # series name -> canvas line
+        self.legend = []
+        self.redraw_pending = False
+        self.drag = None  # (pointer x, start) when the drag began
+
+        title_frame = ctk.CTkFrame(self, fg_color="transparent")
+        title_frame.pack(fill="x", pady=(20, 15), padx=20)
+        ctk.CTkLabel(
+            title_frame,
+            text="Trends",
+            font=ctk.CTkFont(size=20, weight="bold"),
+            text_color="#ffffff"
+        ).pack(side="left")
+        self.status_label = ctk.CTkLabel(title_frame, text="", font=ctk.CTkFont(size=13), text_color="#a1a1aa")
+        self.status_label.pack(side="right")
+        self.range_button = ctk.CTkSegmentedButton(
+            title_frame,
+            values=[label for label, _ in self.RANGES],
+            command=self.set_range,
+            selected_color="#059e49",
+            selected_hover_color="#047a39"
+        )
+        self.range_button.set(self.RANGES[0][0])
+        self.range_button.pack(side="right", padx=(0, 15))
+
+        self.canvas = ctk.CTkCanvas(self, bg="#171717", highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+        # Axis items are created once and only moved by draw()
+        self.grid = [(self.canvas.create_line(0, 0, 0, 0, fill="#262626"),
+                      self.canvas.create_text(0, 0, text="", anchor="e", fill="#a1a1aa", font=("Segoe UI", 9)))
+                     for _ in range(self.GRID_LINES + 1)]
+        self.date_labels = [self.canvas.create_text(0, 0, text="", anchor="n", fill="#a1a1aa", font=("Segoe UI", 9))
+                            for _ in range(self.DATE_LABELS)]
+
+        self.canvas.bind("<Configure>", lambda e: self.schedule_draw())
+        self.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", lambda e: setattr(self, "drag", None))
+        # Wheel zooming while the pointer is over the chart (self.bind would
+        # bind the frame's own inner canvas, which the chart canvas covers)
+        self.canvas.bind("<Enter>", lambda e: self.bind_wheel(True))
+        self.canvas.bind("<Leave>", lambda e: self.bind_wheel(False))
+
+    def refresh(self):
+        """Reload the daily totals, e.g. when the view is shown"""
+        self.series = DailySeries(self.app.conn)
+        colors = self.app.categories.colors()
+        for item in (*self.lines.values(), *self.legend):
+            self.canvas.delete(item)
+        self.lines = {"Total": self.canvas.create_line(0, 0, 0, 0, fill=self.TOTAL_COLOR, width=2)}
+        for name in self.series.categories:
+            self.lines[name] = self.canvas.create_line(0, 0, 0, 0, fill=colors.get(name, "#a1a1aa"), width=1)
+        self.legend = []
+        x = self.PAD_LEFT
+        for name in self.lines:
+            item = self.canvas.create_text(x, 8, text=f"● {name}", anchor="nw", font=("Segoe UI", 10),
+                                           fill=self.TOTAL_COLOR if name == "Total" else colors.get(name, "#a1a1aa"))
+            self.legend.append(item)
+            x = self.canvas.bbox(item)[2] + 15
+        self.set_range(self.range_button.get())
+
+    def set_range(self, label):
+        days = dict(self.RANGES)[label]
+        self.end = len(self.series)
+        self.start = 0 if days is None else max(0, self.end - days)
+        self.schedule_draw()
+
+    def plot_size(self):
+        return (self.canvas.winfo_width() - self.PAD_LEFT - self.PAD_RIGHT,
+                self.canvas.winfo_height() - self.PAD_TOP - self.PAD_BOTTOM)
+
+    def bind_wheel(self, active):
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            if active:
+                self.bind_all(sequence, self.on_wheel)
+            else:
+                self.unbind_all(sequence)
+
+    def on_wheel(self, event):
+        if self.series is None:
+            return
+        zoom_in = event.num == 4 or getattr(event, "delta", 0) > 0
+        plot_width = max(self.plot_size()[0], 1)
+        span = self.end - self.start
+        # Keep the day under the pointer in place; the event may come from
+        # the focused widget (Windows), so measure from the chart canvas
+        x = event.x_root - self.canvas.winfo_rootx()
+        anchor = self.start + min(max(x - self.PAD_LEFT, 0), plot_width) / plot_width * span
+        new_span = round(span / self.ZOOM_STEP) if zoom_in else round(span * self.ZOOM_STEP) + 1
+        new_span = min(max(new_span, self.MIN_SPAN), len(self.series))
+        self.move_to(round(anchor - (anchor - self.start) * new_span / span), new_span)
+
+    def on_press(self, event):
+        self.drag = (event.x, self.start)
+
+    def on_drag(self, event):
+        if self.drag is None or self.series is None:
+            return
+        x, start = self.drag
+        span = self.end - self.start
+        self.move_to(start - round((event.x - x) * span / max(self.plot_size()[0], 1)), span)
+
+    def move_to(self, start, span):
+        start = min(max(start, 0), len(self.series) - span)
+        if (start, start + span) != (self.start, self.end):
+            self.start, self.end = start, start + span
+            self.schedule_draw()
+
+    def schedule_draw(self):
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.after(UIDispatcher.FRAME_MS, self.draw)
+
+    def draw(self):
+        self.redraw_pending = False
+        plot_width, plot_height = self.plot_size()
+        if self.series is None or plot_width < 20 or plot_height < 20:
+            return
+        started = time.perf_counter()
+        data = self.series.downsampled(self.start, self.end, min(self.MAX_POINTS, plot_width // 2))
+        # Whole hours per grid line, enough for the busiest visible day
+        peak = max(self.series.total[self.start:self.end], default=0)
+        step_hours = max(1, math.ceil(peak / 60 / self.GRID_LINES))
+        x_scale = plot_width / max(self.end - self.start - 1, 1)
+        y_scale = plot_height / (step_hours * 60 * self.GRID_LINES)
+        bottom = self.PAD_TOP + plot_height
+
+        for name, coords in project_series(data, self.start, x_scale, y_scale, self.PAD_LEFT, bottom).items():
+            # A line needs two points; a one-day history draws nothing
+            self.canvas.coords(self.lines[name], coords if len(coords) >= 4 else (0, 0, 0, 0))
+        for i, (line, label) in enumerate(self.grid):
+            y = bottom - i * step_hours * 60 * y_scale
+            self.canvas.coords(line, self.PAD_LEFT, y, self.PAD_LEFT + plot_width, y)
+            self.canvas.coords(label, self.PAD_LEFT - 8, y)
+            self.canvas.itemconfigure(label, text=f"{i * step_hours}h")
+        for i, label in enumerate(self.date_labels):
+            index = self.start + round(i * (self.end - self.start - 1) / (self.DATE_LABELS - 1))
+            self.canvas.coords(label, self.PAD_LEFT + (index - self.start) * x_scale, bottom + 8)
+            self.canvas.itemconfigure(label, text=day_to_date(self.series.first_day + index).isoformat())
+
+        first = day_to_date(self.series.first_day + self.start)
+        last = day_to_date(self.series.first_day + self.end - 1)
+        self.status_label.configure(
+            text=f"{first} – {last} · {len(data['Total'])} of {self.end - self.start} days drawn · "
+                 f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+class ProgressRing:
+    """A segmented gradient ring with a label and caption on a canvas.
+
+    The items (track, SEGMENTS arcs, two texts) are created once. draw()
+    reconfigures only those whose options changed since the last frame,
+    so the once-a-second redraw of a running session creates nothing.
+    """
+    SEGMENTS = 72  # 5 degree steps
+
+    def __init__(self, canvas, size, radius, line_width):
+        center = size // 2
+        box = (center - radius, center - radius, center + radius, center + radius)
+        step = 360 // self.SEGMENTS
+        self.canvas = canvas
+        canvas.create_oval(*box, outline="#262626", width=line_width)
+        self.arcs = [canvas.create_arc(*box, start=90 - i * step, extent=-step, width=line_width,
+                                       style="arc", state="hidden")
+                     for i in range(self.SEGMENTS)]
+        self.label = canvas.create_text(center, center, font=("Segoe UI", 28, "bold"), fill="#ffffff")
+        self.caption = canvas.create_text(center, center + 40, font=("Segoe UI", 12), fill="#a1a1aa")
+        self.applied = {}  # item -> options last given to itemconfigure
+
+    def draw(self, progress, color, label, caption):
+        """Show `progress` (0-1); color(position along the filled part) colors each segment"""
+        extent = int(360 * progress)
+        step = 360 // self.SEGMENTS
+        for i, arc in enumerate(self.arcs):
+            if i * step < extent:
+                self.configure(arc, state="normal", outline=color(i * step / (360 * progress)))
+            else:
+                self.configure(arc, state="hidden")
+        self.configure(self.label, text=label)
+        self.configure(self.caption, text=caption)
+
+    def configure(self, item, **options):
+        if self.applied.get(item) != options:
+            self.canvas.itemconfigure(item, **options)
+            self.applied[item] = options
+
+class FocusSessionEngine:
+    """The focus timer and everything it persists, without widgets.
+
+    Holds the running session's state, writes its events and rows, runs
+    the countdown loop and keeps the day-based counters (today's total,
+    rolling statistics, goal-met days) moving across midnight.
+    FocusSessionApp draws it; the simulate command drives the same code
+    with a SimulatedClock. on_tick, on_checkpoint and on_complete are
+    called from the timer loop's thread.
+    """
+    CHECKPOINT_SECONDS = 30  # Progress is logged this often during a session
+
+    def __init__(self, conn, categories, clock=None):
+        self.conn = conn
+        self.categories = categories
+        self.clock = clock or Clock()
+        self.session_log = SessionLog(conn, self.clock)
+        self.today_counter = TodayCounter()
+        self.rolling_stats = RollingStats()
+        self.session_active = False
+        self.session_paused = False
+        self.session_duration = 25  # minutes
+        self.current_session_id = None
+        self.remaining_time = 0
+        self.remaining_exact = 0.0
+        self.session_deadline = 0.0
+        self.timer_generation = 0
+        self.timer_wakeup = threading.Event()
+        self.timer_wakeups = 0
+        self.visible = True  # Redraw every second rather than every minute
+        self.on_tick = self.on_checkpoint = self.on_complete = None
+
+    def start(self, category, note=None, tags=""):
+        """Start a session_duration-minute session; returns the generation to pass to run_timer()"""
+        self.session_active = True
+        self.session_paused = False
+        self.remaining_time = self.session_duration * 60
+        self.remaining_exact = float(self.remaining_time)
+        self.session_deadline = self.clock.monotonic() + self.remaining_exact
+
+        start_time = self.clock.now().replace(microsecond=0)
+        while True:
+            try:
+                cursor = self.conn.execute("""
+                    INSERT INTO sessions (day, category_id, duration, completed, start_ts, note)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (epoch_day(start_time.date()), self.categories.id_for(category), self.session_duration, 0,
+                      local_seconds(start_time), note or None))
+                break
+            except sqlite3.IntegrityError as e:
+                # A session of this category already starts this second (restarted
+                # straight after a stop, or merged from another device): take the next one
+                if "UNIQUE" not in str(e):
+                    raise
+                start_time += datetime.timedelta(seconds=1)
+        self.current_session_id = cursor.lastrowid
+        set_session_tags(self.conn, self.current_session_id, tags)
+        self.session_log.record(self.current_session_id, EVENT_START, 0, start_time.timestamp())
+        self.session_log.flush()
+
+        # A bumped generation retires any previous timer loop
+        self.timer_generation += 1
+        self.timer_wakeup.set()
+        self.timer_wakeup = threading.Event()
+        return self.timer_generation
+
+    def pause(self):
+        self.remaining_exact = self.seconds_left()
+        self.session_paused = True
+        self.timer_wakeup.set()
+        # Record the pause and refresh the session row
+        if self.current_session_id:
+            self.session_log.record(self.current_session_id, EVENT_PAUSE, self.elapsed_seconds())
+            self.session_log.flush(project=(self.current_session_id,))
+
+    def resume(self):
+        self.session_deadline = self.clock.monotonic() + self.remaining_exact
+        self.session_paused = False
+        self.timer_wakeup.set()
+        if self.current_session_id:
+            self.session_log.record(self.current_session_id, EVENT_RESUME, self.elapsed_seconds())
+            self.session_log.flush()
+
+    def reset(self):
+        """Back to a full, stopped countdown"""
+        self.session_active = False
+        self.session_paused = False
+        self.timer_wakeup.set()
+        self.remaining_time = self.session_duration * 60
+        self.remaining_exact = float(self.remaining_time)
+
+    def stop(self, note=None, tags=""):
+        """End the session early and save it; False if none was running"""
+        if not self.session_active:
+            return False
+        self.remaining_exact = self.seconds_left()
+        self.session_active = False
+        self.session_paused = False
+        self.timer_wakeup.set()
+        self.save_end(note, tags)
+        return True
+
+    def complete(self, note=None, tags=""):
+        """Save a session whose countdown ran out"""
+        self.remaining_exact = 0.0
+        self.session_active = False
+        self.session_paused = False
+        self.save_end(note, tags)
+
+    def close(self):
+        """Persist the running session's progress, e.g. before exiting"""
+        if self.session_active:
+            self.session_log.record(self.current_session_id, EVENT_CHECKPOINT, self.elapsed_seconds())
+            self.session_log.flush(project=(self.current_session_id,))
 
-        self.dismiss_button = ctk.CTkButton(
-            self.control_frame, 
-            text="Dismiss", 
-            command=self.dismiss_sound,
-            state="disabled", 
-            fg_color="#262626", 
-            hover_color="#a751c9", 
-            text_color="#efefef", 
-            width=80,
-            height=35,
-            corner_radius=6
-        )
-        self.dismiss_button.pack(side="left", padx=5)
+    def seconds_left(self):
+        """Exact seconds left in the current session"""
+        if self.session_active and not self.session_paused:
+            return max(0.0, self.session_deadline - self.clock.monotonic())
+        return self.remaining_exact
 
-    def set_custom_duration(self):
-        try:
-            minutes = float(self.duration_entry.get())
-            if minutes > 0:
-                self.start_timer(int(minutes * 60))
-                self.duration_entry.delete(0, 'end')  # Clear the entry after starting
-        except ValueError:
-            pass
+    def elapsed_seconds(self):
+        """Focused seconds in the current session so far"""
+        return int((self.session_duration * 60) - self.seconds_left())
 
-    def start_timer(self, duration):
-        if not self.is_running:
-            self.remaining_time = duration
-            self.max_time = duration
-            self.is_running = True
-            self.is_paused = False
-            self.stop_button.configure(state="normal")
-            self.pause_button.configure(state="normal", text="Pause")
-            self.dismiss_button.configure(state="disabled")
-            self.progress_bar.set(1.0)
-            self.timer_thread = threading.Thread(target=self._run_timer, daemon=True)
-            self.timer_thread.start()
-        elif self.is_paused:
-            self.is_paused = False
-            self.pause_button.configure(text="Pause")
-            self.timer_thread = threading.Thread(target=self._run_timer, daemon=True)
-            self.timer_thread.start()
+    def run_timer(self, generation):
+        """Countdown loop; the app runs it on a worker thread, the simulator inline.
 
-    def pause_timer(self):
-        if self.is_running and not self.is_paused:
-            self.is_paused = True
-            self.pause_button.configure(text="Resume")
-        elif self.is_running and self.is_paused:
-            self.is_paused = False
-            self.pause_button.configure(text="Pause")
-            self.timer_thread = threading.Thread(target=self._run_timer, daemon=True)
-            self.timer_thread.start()
-
-    def _run_timer(self):
-        while self.remaining_time > 0 and self.is_running and not self.is_paused:
-            minutes, seconds = divmod(self.remaining_time, 60)
-            time_str = f"{minutes:02d}:{seconds:02d}"
-            self.timer_label.configure(text=time_str)
-            
-            # Update progress bar
-            progress = self.remaining_time / self.max_time
-            self.progress_bar.set(progress)
-            
-            time.sleep(1)
-            self.remaining_time -= 1
+        Sleeps on timer_wakeup until the next tick planned by next_tick_delay();
+        pause, resume, stop and the window becoming visible wake it early.
+        """
+        wakeup = self.timer_wakeup
+        total = self.session_duration * 60
+        next_checkpoint = self.CHECKPOINT_SECONDS
+        while self.session_active and self.timer_generation == generation:
+            if self.session_paused:
+                self.clock.wait(wakeup)
+                wakeup.clear()
+                continue
 
-        if self.is_running and not self.is_paused and self.remaining_time <= 0:
-            self.timer_label.configure(text="Time's up!")
-            self.is_running = False
-            self.is_paused = False
-            self.stop_button.configure(state="disabled")
-            self.pause_button.configure(state="disabled")
-            self.dismiss_button.configure(state="normal")
-            self.play_finish_sound()
-            self.progress_bar.set(0.0)
-            self.lift()
-            self.focus_force() # Try to give the window focus
+            self.timer_wakeups += 1
+            left = self.seconds_left()
+            self.remaining_time = math.ceil(left)
+            if left <= 0:
+                break
 
-    def play_finish_sound(self):
-        try:
-            if not pygame.mixer.get_init():
-                pygame.mixer.init()
+            # Auto-save progress every 30 seconds
+            elapsed = total - left
+            if elapsed >= next_checkpoint:
+                self.checkpoint()
+                next_checkpoint = (int(elapsed) // self.CHECKPOINT_SECONDS + 1) * self.CHECKPOINT_SECONDS
 
-            # Try to load sound file
-            try:
-                # sound_path = os.path.join(os.path.dirname(__file__), "timer.mp3")
-                sound_path = self.resource_path('timer.mp3') 
-                self.end_sound = pygame.mixer.Sound(sound_path)
-            except Exception as e: # Exception අල්ලා ගැනීම වැදගත්.
-                self.end_sound = None
-                print(f"Error loading finish sound: {e}") 
+            if self.visible and self.on_tick:
+                self.on_tick()
 
-            if self.end_sound:
-                self.sound_channel = self.end_sound.play()
-            else:
-                # Fallback to system beep
-                if sys.platform.startswith("win"):
-                    import winsound
-                    winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
-                else:
-                    print('\a')  # ASCII Bell (simple beep on Linux terminals)
-        except Exception as e:
-            print(f"Error playing sound: {e}")
+            self.clock.wait(wakeup, next_tick_delay(left, next_checkpoint - elapsed, self.visible))
+            wakeup.clear()
 
-    def stop_timer(self):
-        self.is_running = False
-        self.is_paused = False
-        self.timer_label.configure(text="00:00")
-        self.stop_button.configure(state="disabled")
-        self.pause_button.configure(state="disabled")
-        self.dismiss_sound()
-        self.progress_bar.set(0.0)
-        if self.timer_thread and self.timer_thread.is_alive():
-            pass
+        # Session completed
+        if self.session_active and self.timer_generation == generation and self.remaining_time <= 0:
+            if self.on_complete:
+                self.on_complete()
 
-    def dismiss_sound(self):
-        if hasattr(self, 'sound_channel') and self.sound_channel and self.sound_channel.get_busy():
-            self.sound_channel.stop()
-        pygame.mixer.stop()
-        self.dismiss_button.configure(state="disabled")
-        self.timer_label.configure(text="00:00")
+    def checkpoint(self):
+        """Append a checkpoint event (a cheap insert; the row is derived later)"""
+        if self.current_session_id:
+            self.session_log.record(self.current_session_id, EVENT_CHECKPOINT, self.elapsed_seconds())
+            self.session_log.flush()
+            if self.on_checkpoint:
+                self.on_checkpoint()
+
+    def save_end(self, note=None, tags=""):
+        """Append the stop event and derive the final sessions row"""
+        if self.current_session_id:
+            # The note and tags may have been written while the session ran
+            note = note or None
+            self.conn.execute("UPDATE sessions SET note = ? WHERE id = ? AND note IS NOT ?",
+                              (note, self.current_session_id, note))
+            set_session_tags(self.conn, self.current_session_id, tags)
+            self.session_log.record(self.current_session_id, EVENT_STOP, self.elapsed_seconds())
+            self.session_log.flush(project=(self.current_session_id,))
+            # A session that ran past midnight finishes a day the rolling stats already closed
+            day = self.conn.execute("SELECT day FROM sessions WHERE id = ?", (self.current_session_id,)).fetchone()
+            if day and day[0] < epoch_day(self.clock.today()):
+                self.rolling_stats.update_day(self.conn, day[0])
+
+    def reconcile_today(self):
+        """Re-read today's persisted total into the in-memory counter"""
+        self.today_counter.reconcile(self.conn, self.current_session_id if self.session_active else None,
+                                     self.clock.today())
+
+    def today_minutes(self):
+        """Today's focus including the running session, from memory"""
+        return self.today_counter.minutes(self.elapsed_seconds() if self.session_active else 0)
+
+    def day_changed(self):
+        """True once the day today's counter was read on has ended"""
+        return self.today_counter.stale(self.clock.today())
+
+    def roll_over(self):
+        """Bring the day-based state up to the clock's today; returns today's minutes.
+
+        Re-reads today's total, moves the rolling window by the days that
+        closed since the last call and records their goal-met bits.
+        """
+        # Commit first so the reads see changes made on other connections
+        self.conn.commit()
+        self.reconcile_today()
+        today = self.clock.today()
+        self.rolling_stats.advance(self.conn, today)
+        close_goal_days(self.conn, today)
+        return self.today_minutes()
 
 class FocusSessionApp:
     def resource_path(self, relative_path):
@@ -380,9 +4214,19 @@ class FocusSessionApp:
             base_path = os.path.abspath(".")
         return os.path.join(base_path, relative_path)
 
-    def __init__(self):
+    def __init__(self, db_path=None, clock=None):
         self.root = ctk.CTk()
         self.root.title("Remeinium FocusPro")
+        # The soak test runs the window on a scratch database and a SimulatedClock
+        self.db_path = db_path or os.path.join(get_appdata_path(), "focuspro.db")
+        self.clock = clock
+
+        # Worker threads post widget updates here instead of touching Tk
+        self.ui = UIDispatcher(self.root)
+        self.ui.start()
+
+        # Later launches ask this one to come to the front instead of starting
+        self.instance_server = SingleInstanceServer(bring_window_to_front).start()
         
         # Cross-platform maximize (works on both Windows and Linux)
         self.root.after(100, self.maximize_window)  # Slight delay for stability
@@ -401,12 +4245,6 @@ class FocusSessionApp:
                 self.root.geometry(
                     f"{self.root.winfo_screenwidth()}x{self.root.winfo_screenheight()}+0+0"
                 )
-        
-        # Start single instance server
-        start_single_instance_server(bring_window_to_front)
-        
-        # Start single instance server first
-        start_single_instance_server(bring_window_to_front)
 
         # set window icon
 #        if sys.platform.startswith("win"):
@@ -418,26 +4256,31 @@ class FocusSessionApp:
         
         # Rest of your initialization code remains the same...
         pygame.mixer.init()
+
+        # Notifications and their sound are delivered by a worker thread
+        self.notifier = NotificationService([
+            PlyerBackend(),
+            SoundBackend(self.resource_path('focuspro.wav')),
+        ])
         
         # Variables
-        self.session_active = False
-        self.session_paused = False
         self.timer_thread = None
-        self.current_session_id = None
-        self.session_duration = 25  # minutes
-        self.remaining_time = 0
-        self.daily_goal = 8  # hours
-        self.selected_task = "Maths"
+        self.window_visible = True
+        self.daily_goal = DEFAULT_DAILY_GOAL_HOURS
         self.last_progress = 0
-        self.task_categories = ["Maths", "Physics", "ICT", "General"]
+        self.shown_today_minutes = None
+        self.analytics_cancel = None  # threading.Event while the analytics page is being built
         self.sidebar_collapsed = True  # Collapsed by default
         self.current_view = "focus"
         
         # Database setup
         self.setup_database()
+        self.engine.session_duration = self.settings.get("session_duration")
         
         # Setup UI
         self.setup_ui()
+        self.settings.subscribe("sync_folder",
+                                lambda folder: self.sync_folder_label.configure(text=folder or "No folder chosen"))
         
         # Load today's progress
         self.update_daily_progress()
@@ -445,9 +4288,21 @@ class FocusSessionApp:
         # Load settings
         self.load_settings()
 
+        # Slow the timer down while the window is minimized or unfocused
+        for sequence in ("<Map>", "<Unmap>", "<FocusIn>", "<FocusOut>"):
+            self.root.bind(sequence, lambda e: self.root.after_idle(self.on_window_visibility), add="+")
+
         # Start the update checker
         self.root.after(1000, self.check_for_updates)
 
+        # Apply the retention policy once the window is up
+        # Only once retention has been turned on in the Data view
+        self.root.after(10000, lambda: self.settings.get("retention_months")
+                        and self.compact_history(self.settings.get("retention_months")))
+        # Pick up sessions recorded on other devices
+        self.root.after(15000, lambda: self.sync_history(quiet=True))
+        self.root.after(20000, self.schedule_backups)
+
     def center_window(self):
         self.root.update_idletasks()
         width = 1200
@@ -464,19 +4319,20 @@ class FocusSessionApp:
     def toggle_sidebar(self):
         """Toggle sidebar between collapsed and expanded states"""
         self.sidebar_collapsed = not self.sidebar_collapsed
+        self.settings.set("sidebar_collapsed", self.sidebar_collapsed)
         
         if self.sidebar_collapsed:
             # Collapse sidebar - show only icons
             self.sidebar_frame.configure(width=60)
-            self.focus_button.configure(text="🏠", width=40)
-            self.timer_button.configure(text="⏱️", width=40)
+            for button, icon, _ in self.sidebar_views:
+                button.configure(text=icon, width=40)
             self.sidebar_toggle_button.configure(text="»")
             self.about_button.configure(text="❤︎", width=40)
         else:
             # Expand sidebar
             self.sidebar_frame.configure(width=200)
-            self.focus_button.configure(text="Home", width=180)
-            self.timer_button.configure(text="Timer", width=180)
+            for button, _, label in self.sidebar_views:
+                button.configure(text=label, width=180)
             self.sidebar_toggle_button.configure(text="«")
             self.about_button.configure(text="About", width=40)
 
@@ -484,9 +4340,13 @@ class FocusSessionApp:
         """Switch between Timer and Focus views"""
         self.current_view = view
         
+        for frame in (self.focus_frame, self.daily_frame, self.timer_app, self.data_frame, self.history_view,
+                      self.chart_view):
+            frame.pack_forget()
+        for button, _, _ in self.sidebar_views:
+            button.configure(fg_color="#262626")
+
         if view == "timer":
-            self.focus_frame.pack_forget()
-            self.daily_frame.pack_forget()
             # Center the timer frame with more padding
             self.timer_app.pack(
                 fill="both", 
@@ -495,13 +4355,21 @@ class FocusSessionApp:
                 pady=50    # More vertical padding
             )
             self.timer_button.configure(fg_color="#059e49")
-            self.focus_button.configure(fg_color="#262626")
+        elif view == "data":
+            self.data_frame.pack(fill="both", expand=True)
+            self.data_button.configure(fg_color="#059e49")
+        elif view == "history":
+            self.history_view.refresh()
+            self.history_view.pack(fill="both", expand=True)
+            self.history_button.configure(fg_color="#059e49")
+        elif view == "chart":
+            self.chart_view.refresh()
+            self.chart_view.pack(fill="both", expand=True)
+            self.chart_button.configure(fg_color="#059e49")
         else:
-            self.timer_app.pack_forget()
             self.focus_frame.pack(side="left", fill="both", expand=True, padx=(0, 10))
             self.daily_frame.pack(side="right", fill="both", expand=True)
             self.focus_button.configure(fg_color="#059e49")
-            self.timer_button.configure(fg_color="#262626")
 
     def open_database(self):
         """Open the database file in default application (cross-platform)"""
@@ -551,12 +4419,12 @@ class FocusSessionApp:
             
         # Get data from database
         self.cursor.execute('''
-            SELECT date, SUM(completed) as total_minutes
-            FROM sessions 
-            WHERE date >= ? AND date <= ?
-            GROUP BY date
-            ORDER BY date
-        ''', (start_date.isoformat(), end_date.isoformat()))
+            SELECT date, SUM(minutes) as total_minutes
+            FROM daily_totals 
+            WHERE day >= ? AND day <= ?
+            GROUP BY day
+            ORDER BY day
+        ''', (epoch_day(start_date), epoch_day(end_date)))
         
         results = self.cursor.fetchall()
         
@@ -575,7 +4443,7 @@ class FocusSessionApp:
 
     def check_for_updates(self):
         """Check for database changes periodically"""
-        if not self.session_active:  # Only check when not in a session
+        if not self.engine.session_active:  # Sessions update the ring on every tick instead
             today_minutes = self.get_today_total_minutes()
             current_progress = min(today_minutes / (self.daily_goal * 60), 1.0)
             
@@ -584,37 +4452,27 @@ class FocusSessionApp:
                 self.update_daily_progress()
                 self.last_progress = current_progress
         
-        # Check again after 5 seconds
-        self.root.after(5000, self.check_for_updates)
+        # Check again after 5 seconds (once a minute while hidden)
+        self.root.after(5000 if self.window_visible else 60000, self.check_for_updates)
         
     def setup_database(self):
-        self.db_path = os.path.join(get_appdata_path(), "focuspro.db")
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn = connect_database(self.db_path)
 
         self.cursor = self.conn.cursor()
 
-        # Create tables if they do not exist
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                task_category TEXT NOT NULL,
-                duration INTEGER NOT NULL,
-                completed INTEGER NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL
-            )
-        """)
+        close_abandoned_sessions(self.conn)
 
-        self.conn.commit()
+        self.categories = CategoryCache(self.conn)
+        # The session timer and its persistence; its callbacks run on the timer thread
+        self.engine = FocusSessionEngine(self.conn, self.categories, self.clock)
+        self.engine.on_tick = lambda: self.ui.post("progress_circle", self.update_timer_display)
+        self.engine.on_checkpoint = lambda: self.ui.post("today_counter", self.engine.reconcile_today)
+        self.engine.on_complete = lambda: self.ui.post(None, self.session_completed)
+        self.settings = SettingsStore(self.conn, schedule=self.root.after)
+        names = self.categories.names()
+        saved = self.settings.get("selected_task")
+        self.selected_task = saved if saved in names else (
+            names[0] if names else self.categories.names(include_archived=True)[0])
 
     def setup_ui(self):
         """Setup the main UI with Vercel-inspired design"""
@@ -635,7 +4493,7 @@ class FocusSessionApp:
         ).pack(side="left", padx=10)
         
         # Analytics button in top right
-        ctk.CTkButton(
+        self.analytics_button = ctk.CTkButton(
             header_frame,
             text="Analytics",
             command=self.open_browser_analysis,
@@ -646,7 +4504,8 @@ class FocusSessionApp:
             hover_color="#eee",
             text_color="#1d1d1d",
             corner_radius=6
-        ).pack(side="right", padx=10)
+        )
+        self.analytics_button.pack(side="right", padx=10)
 
         # Open Database button
         ctk.CTkButton(
@@ -717,6 +4576,48 @@ class FocusSessionApp:
             width=180
         )
         self.timer_button.pack(fill="x", pady=5)
+
+        self.data_button = ctk.CTkButton(
+            view_frame,
+            text="Data",
+            command=lambda: self.switch_view("data"),
+            fg_color="#262626",
+            hover_color="#333333",
+            height=40,
+            width=180
+        )
+        self.data_button.pack(fill="x", pady=5)
+
+        self.history_button = ctk.CTkButton(
+            view_frame,
+            text="History",
+            command=lambda: self.switch_view("history"),
+            fg_color="#262626",
+            hover_color="#333333",
+            height=40,
+            width=180
+        )
+        self.history_button.pack(fill="x", pady=5)
+
+        self.chart_button = ctk.CTkButton(
+            view_frame,
+            text="Trends",
+            command=lambda: self.switch_view("chart"),
+            fg_color="#262626",
+            hover_color="#333333",
+            height=40,
+            width=180
+        )
+        self.chart_button.pack(fill="x", pady=5)
+
+        # (button, collapsed icon, expanded label)
+        self.sidebar_views = [
+            (self.focus_button, "🏠", "Home"),
+            (self.timer_button, "⏱️", "Timer"),
+            (self.data_button, "🗂", "Data"),
+            (self.history_button, "📜", "History"),
+            (self.chart_button, "📈", "Trends"),
+        ]
         
         # Bottom section with About button
         bottom_frame = ctk.CTkFrame(self.sidebar_frame, fg_color="transparent")
@@ -736,15 +4637,9 @@ class FocusSessionApp:
         )
         self.about_button.pack(fill="x", pady=5)
 
-        # Apply collapsed state by default
+        # Apply the saved state (collapsed by default)
+        self.sidebar_collapsed = not self.settings.get("sidebar_collapsed")
         self.toggle_sidebar()
-
-        # Immediately apply collapsed state
-        self.sidebar_frame.configure(width=60)
-        self.focus_button.configure(text="🏠", width=40)
-        self.timer_button.configure(text="⏱️", width=40)
-        self.sidebar_toggle_button.configure(text="»")
-        self.about_button.configure(text="❤︎", width=40) 
         
         # Main content area
         self.main_content_frame = ctk.CTkFrame(
@@ -775,10 +4670,26 @@ class FocusSessionApp:
         
         # Create timer app
         self.timer_app = TimerApp(self.main_content_frame)
+
+        # Data management view
+        self.data_frame = ctk.CTkFrame(
+            self.main_content_frame,
+            corner_radius=12,
+            fg_color="#171717",
+            border_width=1,
+            border_color="#333333"
+        )
+        
+        # Session history browser
+        self.history_view = HistoryView(self.main_content_frame, self)
+
+        # Native trend chart
+        self.chart_view = ChartView(self.main_content_frame, self)
         
         # Set up focus sections
         self.setup_focus_section(self.focus_frame)
         self.setup_daily_progress_section(self.daily_frame)
+        self.setup_data_section(self.data_frame)
         
         # Set default view
         self.switch_view("focus")
@@ -819,9 +4730,10 @@ class FocusSessionApp:
         """Handle duration changes from either input"""
         minutes = int(float(value))
         self.duration_label.configure(text=f"{minutes} min")
-        self.session_duration = minutes
-        if not self.session_active:
-            self.remaining_time = minutes * 60
+        self.engine.session_duration = minutes
+        self.settings.set("session_duration", minutes)
+        if not self.engine.session_active:
+            self.engine.remaining_time = minutes * 60
             self.draw_progress_circle(0)
 
     def setup_circular_progress(self, parent):
@@ -839,6 +4751,7 @@ class FocusSessionApp:
             bd=0
         )
         self.progress_canvas.pack()
+        self.progress_ring = ProgressRing(self.progress_canvas, 220, radius=90, line_width=14)
         
         # Status label
         self.status_label = ctk.CTkLabel(
@@ -944,6 +4857,7 @@ class FocusSessionApp:
             bd=0
         )
         self.daily_canvas.pack()
+        self.daily_ring = ProgressRing(self.daily_canvas, 200, radius=80, line_width=10)
         
         # Stats frame (2nd row)
         stats_frame = ctk.CTkFrame(daily_frame, fg_color="transparent")
@@ -999,12 +4913,13 @@ class FocusSessionApp:
         )
         self.streak_label.pack()
         
-        ctk.CTkLabel(
+        self.streak_caption = ctk.CTkLabel(
             streak_frame, 
             text="Streak", 
             font=ctk.CTkFont(size=12),
             text_color="#a1a1aa"
-        ).pack()
+        )
+        self.streak_caption.pack()
         
         # Empty space to push goal setting to bottom
         spacer_frame = ctk.CTkFrame(daily_frame, fg_color="transparent", height=20)
@@ -1071,7 +4986,7 @@ class FocusSessionApp:
         
         self.task_dropdown = ctk.CTkComboBox(
             task_frame, 
-            values=self.task_categories,
+            values=self.categories.names(),
             command=self.on_task_change, 
             width=180,
             fg_color="#262626",
@@ -1082,9 +4997,31 @@ class FocusSessionApp:
             dropdown_text_color="#efefef",
             dropdown_hover_color="#403f3f"
         )
-        self.task_dropdown.set("Maths")
+        self.task_dropdown.set(self.selected_task)
         self.task_dropdown.pack(side="left")
         
+        # Optional note, searchable in the History view
+        self.note_entry = ctk.CTkEntry(
+            parent,
+            width=300,
+            placeholder_text="Note (e.g. chapter 4 integrals)",
+            fg_color="#262626",
+            border_color="#3f3f46",
+            text_color="#ffffff"
+        )
+        self.note_entry.pack(pady=(0, 4))
+        
+        # Optional tags, kept for the next session; filterable in analytics
+        self.tags_entry = ctk.CTkEntry(
+            parent,
+            width=300,
+            placeholder_text="Tags (e.g. course:calc2 project:thesis library)",
+            fg_color="#262626",
+            border_color="#3f3f46",
+            text_color="#ffffff"
+        )
+        self.tags_entry.pack(pady=(0, 4))
+        
         # Duration selector
         duration_frame = ctk.CTkFrame(parent, fg_color="transparent")
         duration_frame.pack(pady=12)
@@ -1103,7 +5040,7 @@ class FocusSessionApp:
             validate="key",
             validatecommand=(self.root.register(self.validate_duration_input), '%P')
         )
-        self.duration_entry.insert(0, "25")
+        self.duration_entry.insert(0, str(self.engine.session_duration))
         self.duration_entry.pack(side="left", padx=(0, 10))
         self.duration_entry.bind("<Return>", lambda e: self.update_slider_from_entry())
         
@@ -1118,12 +5055,12 @@ class FocusSessionApp:
             progress_color="#08c75c",
             fg_color="#262626"
         )
-        self.duration_slider.set(25)
+        self.duration_slider.set(self.engine.session_duration)
         self.duration_slider.pack(side="left", padx=(0, 10))
         
         self.duration_label = ctk.CTkLabel(
             duration_frame, 
-            text="25 min", 
+            text=f"{self.engine.session_duration} min", 
             font=ctk.CTkFont(size=14, weight="bold"),
             text_color="#efefef"
         )
@@ -1162,6 +5099,7 @@ class FocusSessionApp:
             bd=0
         )
         self.daily_canvas.pack()
+        self.daily_ring = ProgressRing(self.daily_canvas, 200, radius=80, line_width=10)
         
         # Stats frame (2nd row)
         stats_frame = ctk.CTkFrame(parent, fg_color="transparent")
@@ -1217,12 +5155,38 @@ class FocusSessionApp:
         )
         self.streak_label.pack()
         
-        ctk.CTkLabel(
+        self.streak_caption = ctk.CTkLabel(
             streak_frame, 
             text="Streak", 
             font=ctk.CTkFont(size=12),
             text_color="#a1a1aa"
-        ).pack()
+        )
+        self.streak_caption.pack()
+
+        # Rolling averages and forecasts (3rd row)
+        forecast_frame = ctk.CTkFrame(parent, fg_color="transparent")
+        forecast_frame.pack(pady=(15, 0), fill="x")
+        self.forecast_labels = {}
+        for key, caption in (("avg7", "7-day avg"), ("avg30", "30-day avg"),
+                             ("projected", "Projected today"), ("month", "Month goal")):
+            column = ctk.CTkFrame(forecast_frame, fg_color="transparent")
+            column.pack(side="left", padx=5, expand=True)
+            self.forecast_labels[key] = ctk.CTkLabel(
+                column,
+                text="–",
+                font=ctk.CTkFont(size=14, weight="bold"),
+                text_color="#ffffff"
+            )
+            self.forecast_labels[key].pack()
+            caption_label = ctk.CTkLabel(
+                column,
+                text=caption,
+                font=ctk.CTkFont(size=12),
+                text_color="#a1a1aa"
+            )
+            caption_label.pack()
+            if key == "month":
+                self.month_goal_caption = caption_label
         
         # Empty space to push goal setting to bottom
         spacer_frame = ctk.CTkFrame(parent, fg_color="transparent", height=20)
@@ -1269,37 +5233,448 @@ class FocusSessionApp:
         # Initialize data
         self.update_daily_progress()
 
-    # def setup_graph_section(self, parent):
-    #     """Setup transparent bottom frame"""
-    #     graph_frame = ctk.CTkFrame(
-    #         parent, 
-    #         corner_radius=12, 
-    #         fg_color="#0a0a0a",
-    #         border_width=0,
-    #         border_color="#0a0a0a"
-    #     )
-    #     graph_frame.pack(fill="both", expand=True)
-        
-    #     ctk.CTkLabel(
-    #         graph_frame,
-    #         text="©2025 Remeinium • FocusPro",
-    #         pady=(10),
-    #         text_color="#525252",
-    #         bg_color="transparent"
-    #     ).pack()
+    # def setup_graph_section(self, parent):
+    #     """Setup transparent bottom frame"""
+    #     graph_frame = ctk.CTkFrame(
+    #         parent, 
+    #         corner_radius=12, 
+    #         fg_color="#0a0a0a",
+    #         border_width=0,
+    #         border_color="#0a0a0a"
+    #     )
+    #     graph_frame.pack(fill="both", expand=True)
+        
+    #     ctk.CTkLabel(
+    #         graph_frame,
+    #         text="©2025 Remeinium • FocusPro",
+    #         pady=(10),
+    #         text_color="#525252",
+    #         bg_color="transparent"
+    #     ).pack()
+
+    def setup_data_section(self, parent):
+        """Setup the data management view (import/export)"""
+        title_frame = ctk.CTkFrame(parent, fg_color="transparent")
+        title_frame.pack(fill="x", pady=(20, 15), padx=20, anchor="w")
+        
+        ctk.CTkLabel(
+            title_frame, 
+            text="Data", 
+            font=ctk.CTkFont(size=20, weight="bold"),
+            text_color="#ffffff"
+        ).pack(side="left")
+
+        transfer_frame = self.add_data_group(parent, "Import / Export",
+            "Move session history between machines and other trackers (CSV, JSONL or SQLite).")
+        for text, command in (
+            ("Export…", self.export_history),
+            ("Import…", self.import_history),
+        ):
+            ctk.CTkButton(
+                transfer_frame,
+                text=text,
+                command=command,
+                width=110,
+                height=34,
+                fg_color="#262626",
+                hover_color="#403f3f",
+                text_color="#efefef",
+                corner_radius=6
+            ).pack(side="left", padx=(0, 10))
+
+        categories_frame = self.add_data_group(parent, "Categories",
+            "Add a task category, or rename / archive the one selected on the Home view. History is kept.")
+        self.category_entry = ctk.CTkEntry(
+            categories_frame,
+            width=180,
+            placeholder_text="Category name",
+            fg_color="#262626",
+            border_color="#3f3f46",
+            text_color="#ffffff"
+        )
+        self.category_entry.pack(side="left", padx=(0, 10))
+        for text, command in (
+            ("Add", self.add_category),
+            ("Rename selected", self.rename_category),
+            ("Archive selected", self.archive_category),
+        ):
+            ctk.CTkButton(
+                categories_frame,
+                text=text,
+                command=command,
+                width=110,
+                height=34,
+                fg_color="#262626",
+                hover_color="#403f3f",
+                text_color="#efefef",
+                corner_radius=6
+            ).pack(side="left", padx=(0, 10))
+
+        sync_frame = self.add_data_group(parent, "Sync",
+            "Keep several computers in step through a shared folder (e.g. Dropbox); only changes are copied.")
+        self.sync_folder_label = ctk.CTkLabel(
+            sync_frame,
+            text=self.settings.get("sync_folder") or "No folder chosen",
+            font=ctk.CTkFont(size=13),
+            text_color="#a1a1aa"
+        )
+        for text, command in (
+            ("Choose folder…", self.choose_sync_folder),
+            ("Sync now", self.sync_history),
+        ):
+            ctk.CTkButton(
+                sync_frame,
+                text=text,
+                command=command,
+                width=110,
+                height=34,
+                fg_color="#262626",
+                hover_color="#403f3f",
+                text_color="#efefef",
+                corner_radius=6
+            ).pack(side="left", padx=(0, 10))
+        self.sync_folder_label.pack(side="left")
+
+        backup_frame = self.add_data_group(parent, "Backups",
+            f"A verified copy of the database is made every {BACKUP_INTERVAL_HOURS} hours while the app runs.")
+        ctk.CTkLabel(backup_frame, text="Backups to keep:",
+                     font=ctk.CTkFont(size=14), text_color="#a1a1aa").pack(side="left", padx=(0, 10))
+        self.backup_keep_entry = ctk.CTkEntry(
+            backup_frame,
+            width=60,
+            fg_color="#262626",
+            border_color="#3f3f46",
+            text_color="#ffffff"
+        )
+        self.backup_keep_entry.insert(0, str(self.settings.get("backup_keep")))
+        self.backup_keep_entry.pack(side="left", padx=(0, 10))
+        for text, command in (
+            ("Back up now", self.backup_history),
+            ("Restore…", self.restore_history),
+        ):
+            ctk.CTkButton(
+                backup_frame,
+                text=text,
+                command=command,
+                width=110,
+                height=34,
+                fg_color="#262626",
+                hover_color="#403f3f",
+                text_color="#efefef",
+                corner_radius=6
+            ).pack(side="left", padx=(0, 10))
+
+        retention_frame = self.add_data_group(parent, "Retention",
+            "Sessions older than this are moved to yearly archive files; daily totals are kept (0 = never).")
+        ctk.CTkLabel(retention_frame, text="Keep raw sessions (months):",
+                     font=ctk.CTkFont(size=14), text_color="#a1a1aa").pack(side="left", padx=(0, 10))
+        self.retention_entry = ctk.CTkEntry(
+            retention_frame,
+            width=60,
+            fg_color="#262626",
+            border_color="#3f3f46",
+            text_color="#ffffff"
+        )
+        self.retention_entry.insert(0, str(self.settings.get("retention_months")))
+        self.retention_entry.pack(side="left", padx=(0, 10))
+        ctk.CTkButton(
+            retention_frame,
+            text="Compact now",
+            command=self.compact_history,
+            width=110,
+            height=34,
+            fg_color="#262626",
+            hover_color="#403f3f",
+            text_color="#efefef",
+            corner_radius=6
+        ).pack(side="left")
+
+        self.data_status_label = ctk.CTkLabel(
+            parent,
+            text="",
+            font=ctk.CTkFont(size=13),
+            text_color="#a1a1aa"
+        )
+        self.data_status_label.pack(side="bottom", anchor="w", padx=20, pady=15)
+
+    def add_data_group(self, parent, title, description):
+        """Add a titled group to the data view and return its button row"""
+        group = ctk.CTkFrame(parent, fg_color="transparent")
+        group.pack(fill="x", padx=20, pady=(10, 5))
+        ctk.CTkLabel(
+            group,
+            text=title,
+            font=ctk.CTkFont(size=16, weight="bold"),
+            text_color="#efefef"
+        ).pack(anchor="w")
+        ctk.CTkLabel(
+            group,
+            text=description,
+            font=ctk.CTkFont(size=13),
+            text_color="#a1a1aa"
+        ).pack(anchor="w", pady=(0, 8))
+        row = ctk.CTkFrame(group, fg_color="transparent")
+        row.pack(anchor="w")
+        return row
+
+    def run_data_task(self, description, task, on_done=None):
+        """Run task(conn) on a worker thread with its own connection; report back via the dispatcher"""
+        self.data_status_label.configure(text=f"{description}…")
+
+        def worker():
+            conn = None
+            try:
+                conn = connect_database(self.db_path)
+                message = task(conn)
+            except Exception as e:
+                message = f"{description} failed: {e}"
+            finally:
+                if conn is not None:
+                    conn.close()
+            self.ui.post(None, self.data_status_label.configure, text=message)
+            if on_done:
+                self.ui.post(None, on_done)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def export_history(self):
+        """Export all sessions to a file chosen by the user"""
+        path = filedialog.asksaveasfilename(
+            title="Export session history",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("SQLite database", "*.db")]
+        )
+        if not path:
+            return
+        self.run_data_task(
+            "Exporting",
+            lambda conn: f"Exported {export_sessions(conn, path, db_path=self.db_path)} sessions to {os.path.basename(path)}"
+        )
+
+    def import_history(self):
+        """Import sessions from a file chosen by the user"""
+        path = filedialog.askopenfilename(
+            title="Import session history",
+            filetypes=[("Session history", "*.csv *.jsonl *.json *.db *.sqlite"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+
+        def task(conn):
+            inserted, skipped, invalid = import_sessions(conn, path, db_path=self.db_path)
+            return f"Imported {inserted} sessions ({skipped} already present" + (
+                f", {invalid} unreadable rows left out)" if invalid else ")")
+
+        def done():
+            self.refresh_categories()
+            self.engine.rolling_stats.invalidate()
+            self.update_daily_progress()
+
+        self.run_data_task("Importing", task, on_done=done)
+
+    def refresh_categories(self, select=None):
+        """Reload the category cache and the task selector"""
+        self.categories.reload()
+        names = self.categories.names()
+        if select:
+            self.selected_task = select
+        elif self.selected_task not in names and names and not self.engine.session_active:
+            self.selected_task = names[0]
+        self.task_dropdown.configure(values=names)
+        self.task_dropdown.set(self.selected_task)
+
+    def add_category(self):
+        name = self.category_entry.get().strip()
+        if not name:
+            messagebox.showerror("Error", "Please enter a category name")
+            return
+        if name in self.categories.ids:
+            # Adding an archived category brings it back
+            self.categories.set_archived(name, False)
+        else:
+            self.categories.id_for(name)
+            self.conn.commit()
+        self.category_entry.delete(0, "end")
+        self.refresh_categories(select=name)
+        self.data_status_label.configure(text=f"Added category {name}")
+
+    def rename_category(self):
+        old_name = self.task_dropdown.get()
+        new_name = self.category_entry.get().strip()
+        if not new_name or old_name not in self.categories.ids:
+            messagebox.showerror("Error", "Select a category on the Home view and enter its new name")
+            return
+        try:
+            self.categories.rename(old_name, new_name)
+        except sqlite3.IntegrityError:
+            messagebox.showerror("Error", f"A category named {new_name} already exists")
+            return
+        self.category_entry.delete(0, "end")
+        if self.selected_task == old_name:
+            self.selected_task = new_name
+        self.refresh_categories(select=new_name)
+        self.data_status_label.configure(text=f"Renamed {old_name} to {new_name}")
+
+    def archive_category(self):
+        name = self.task_dropdown.get()
+        if name not in self.categories.ids:
+            return
+        if len(self.categories.names()) <= 1:
+            messagebox.showerror("Error", "At least one category must stay active")
+            return
+        self.categories.set_archived(name)
+        self.refresh_categories()
+        self.data_status_label.configure(text=f"Archived {name}; its history is kept")
+
+    def choose_sync_folder(self):
+        folder = filedialog.askdirectory(title="Shared sync folder")
+        if not folder:
+            return
+        self.settings.set("sync_folder", folder)
+        self.sync_history()
+
+    def sync_history(self, quiet=False):
+        """Exchange change-sets with the other devices (worker thread)"""
+        folder = self.settings.get("sync_folder")
+        if not folder:
+            if not quiet:
+                messagebox.showerror("Error", "Choose a shared sync folder first")
+            return
+
+        def task(conn):
+            received, sent = sync_folder(conn, folder, db_path=self.db_path)
+            return f"Synced: {received} sessions received, {sent} sent"
+
+        def done():
+            self.refresh_categories()
+            self.engine.rolling_stats.invalidate()
+            self.update_daily_progress()
+
+        self.run_data_task("Syncing", task, on_done=done)
+
+    def backup_history(self, keep=None):
+        """Write a rotated, verified backup (worker thread)"""
+        if keep is None:
+            try:
+                self.settings.set("backup_keep", self.backup_keep_entry.get())
+            except ValueError:
+                messagebox.showerror("Error", "Please keep at least one backup")
+                return
+            keep = self.settings.get("backup_keep")
+
+        def task(conn):
+            # The worker's own connection: self.conn belongs to the Tk thread
+            path = create_backup(conn, self.db_path, keep)
+            return f"Backed up to {os.path.basename(path)}"
+
+        # Whatever the session has written so far goes into the copy
+        self.conn.commit()
+        self.run_data_task("Backing up", task)
+
+    def schedule_backups(self):
+        """Back up when the newest backup is older than BACKUP_INTERVAL_HOURS; re-checked hourly"""
+        age = backup_age_hours(self.db_path)
+        if age is None or age >= BACKUP_INTERVAL_HOURS:
+            self.backup_history(self.settings.get("backup_keep"))
+        self.root.after(3600 * 1000, self.schedule_backups)
+
+    def restore_history(self):
+        """Replace the database with a backup chosen by the user"""
+        if self.engine.session_active:
+            messagebox.showerror("Error", "Stop the current session before restoring a backup")
+            return
+        path = filedialog.askopenfilename(
+            title="Restore backup",
+            initialdir=backup_dir_for(self.db_path),
+            filetypes=[("FocusPro backup", "*.db"), ("All files", "*.*")]
+        )
+        if not path or not messagebox.askyesno(
+            "Restore backup",
+            f"Replace all current data with {os.path.basename(path)}?\n"
+            "A backup of the current data is made first."
+        ):
+            return
+
+        def task(conn):
+            restore_backup(conn, self.db_path, path)
+            return f"Restored {os.path.basename(path)}"
+
+        def done():
+            self.settings.reload()
+            self.load_settings()
+            self.refresh_categories()
+            self.engine.rolling_stats.invalidate()
+            self.update_daily_progress()
+
+        self.run_data_task("Restoring", task, on_done=done)
+
+    def compact_history(self, months=None):
+        """Archive raw sessions past the retention window (worker thread)"""
+        if months is None:
+            try:
+                self.settings.set("retention_months", self.retention_entry.get())
+            except ValueError:
+                messagebox.showerror("Error", "Please enter a valid number of months")
+                return
+            months = self.settings.get("retention_months")
+
+        def task(conn):
+            moved = compact_old_sessions(conn, self.db_path, months)
+            return f"Archived {moved} sessions older than {months} months" if moved else "Nothing to archive"
+
+        self.run_data_task("Compacting", task, on_done=self.update_daily_progress)
 
     def open_browser_analysis(self):
-        """Generate HTML file and open in browser"""
-        try:
-            html_content = self.generate_html_with_data()
-            # Save in appdata directory
-            appdata_dir = get_appdata_path()
-            html_path = os.path.join(appdata_dir, "analytics.html")
-            with open(html_path, "w") as f:
-                f.write(html_content)
-            webbrowser.open(f"file://{html_path}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to open analyzer: {str(e)}")
+        """Build the analytics page on a worker thread, then open it in the browser.
+
+        Clicking the button again while the page is being built cancels it.
+        """
+        if self.analytics_cancel is not None:
+            self.analytics_cancel.set()
+            self.analytics_button.configure(text="Cancelling…")
+            return
+
+        cancel = self.analytics_cancel = threading.Event()
+        # Snapshots taken on the Tk thread; the worker has its own connection
+        colors, daily_goal = self.categories.colors(), self.daily_goal
+        template_path = self.resource_path("graph.html")
+        # Save in appdata directory
+        html_path = os.path.join(get_appdata_path(), "analytics.html")
+
+        def progress(fraction):
+            if not cancel.is_set():
+                self.ui.post("analytics_progress", self.analytics_button.configure,
+                             text=f"Cancel {fraction:.0%}")
+
+        def worker():
+            conn = error = None
+            missing = []
+            try:
+                conn = connect_database(self.db_path)
+                _, missing = build_analytics_report(conn, template_path, html_path, colors, daily_goal,
+                                                    progress, cancel)
+            except ReportCancelled:
+                pass
+            except Exception as e:
+                error = e
+            finally:
+                if conn is not None:
+                    conn.close()
+            self.ui.post(None, finished, None if cancel.is_set() or error else html_path, error, missing)
+
+        def finished(path, error, missing):
+            self.analytics_cancel = None
+            self.analytics_button.configure(text="Analytics")
+            if path:
+                webbrowser.open(f"file://{path}")
+                if missing and not self.engine.session_active:
+                    # Not bundled or not matching vendor.sha256: the page needs the network for these
+                    self.status_label.configure(text=f"Analytics loads {', '.join(missing)} from the internet")
+            elif error:
+                messagebox.showerror("Error", f"Failed to open analyzer: {str(error)}")
+
+        self.analytics_button.configure(text="Cancel")
+        threading.Thread(target=worker, daemon=True).start()
 
     def get_filtered_graph_data(self, filter_type, start_date=None, end_date=None):
         """Get filtered data based on the selected filter type"""
@@ -1323,19 +5698,18 @@ class FocusSessionApp:
             pass
         else:
             # Default to showing all data
-            self.cursor.execute("SELECT MIN(date) FROM sessions")
-            min_date = self.cursor.fetchone()[0]
-            start_date = datetime.date.fromisoformat(min_date) if min_date else today
+            self.cursor.execute("SELECT MIN(day) FROM daily_totals")
+            min_day = self.cursor.fetchone()[0]
+            start_date = day_to_date(min_day) if min_day is not None else today
             end_date = today
         
         # Get data from database
         self.cursor.execute('''
-            SELECT date, task_category, SUM(completed) as total_minutes
-            FROM sessions
-            WHERE date >= ? AND date <= ?
-            GROUP BY date, task_category
-            ORDER BY date
-        ''', (start_date.isoformat(), end_date.isoformat()))
+            SELECT d.date, c.name, d.minutes
+            FROM daily_totals d JOIN categories c ON c.id = d.category_id
+            WHERE d.day >= ? AND d.day <= ?
+            ORDER BY d.day
+        ''', (epoch_day(start_date), epoch_day(end_date)))
         
         results = self.cursor.fetchall()
         
@@ -1345,62 +5719,15 @@ class FocusSessionApp:
             'minutes': row[2] if row[2] else 0
         } for row in results], start_date, end_date
 
-    def generate_html_with_data(self):
-        """Generate complete HTML with embedded JSON data and area chart"""
-        # Get all data (we'll filter in JavaScript)
-        self.cursor.execute('''
-            SELECT date, task_category, SUM(completed) as total_minutes
-            FROM sessions
-            GROUP BY date, task_category
-            ORDER BY date
-        ''')
-        
-        results = self.cursor.fetchall()
-        
-        # Convert to JS format
-        js_data = []
-        for row in results:
-            date_obj = datetime.datetime.strptime(row[0], "%Y-%m-%d")
-            js_data.append({
-                'date': row[0],  # Keep as YYYY-MM-DD for filtering
-                'display_date': date_obj.strftime("%Y-%m-%d"),  # For default display
-                'hours': round(row[2] / 60, 2) if row[2] else 0,
-                'category': row[1]
-            })
-        
-        # Get date range for default view (last 7 days)
-        end_date = datetime.date.today()
-        start_date = end_date - datetime.timedelta(days=6)
-        
-        # Read template HTML
-        html_path = self.resource_path("graph.html")
-        if not os.path.exists(html_path):
-            raise FileNotFoundError(f"Missing graph.html at {html_path}")
-        with open(html_path, "r") as f:
-            html_template = f.read()
-
-        
-        # Inject data and configuration
-        return html_template.replace(
-            '/*DATA_PLACEHOLDER*/', 
-            f"""
-            const allGraphData = {json.dumps(js_data)};
-            const dailyGoal = {self.daily_goal};
-            const defaultStartDate = "{start_date.isoformat()}";
-            const defaultEndDate = "{end_date.isoformat()}";
-            """
-        )                                                            
-
     def get_all_graph_data(self):
         """Fetch all graph data from database"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT date, task_category, SUM(completed) as total_minutes
-            FROM sessions
-            GROUP BY date, task_category
-            ORDER BY date
+            SELECT d.date, c.name, d.minutes
+            FROM daily_totals d JOIN categories c ON c.id = d.category_id
+            ORDER BY d.day
         ''')
         
         results = cursor.fetchall()
@@ -1414,113 +5741,14 @@ class FocusSessionApp:
         
     def draw_progress_circle(self, progress):
         """Draw modern gradient circular progress indicator"""
-        self.progress_canvas.delete("all")
-        
-        # Dimensions
-        width, height = 220, 220
-        center_x, center_y = width//2, height//2
-        radius = 90
-        line_width = 14
-        
-        # Background circle (subtle)
-        self.progress_canvas.create_oval(
-            center_x - radius, center_y - radius,
-            center_x + radius, center_y + radius,
-            outline="#262626", width=line_width
-        )
-        
-        # Modern gradient progress arc
-        if progress > 0:
-            start_angle = 90
-            extent = -360 * progress
-            
-            # Create segments for smooth gradient (optimized for performance)
-            segments = 72  # 5 degree steps
-            for i in range(0, int(abs(extent)), int(360/segments)):
-                angle = start_angle - i
-                segment_progress = i/abs(extent) if extent != 0 else 0
-                color = self.get_gradient_color(segment_progress)
-                
-                # Draw arc segment
-                self.progress_canvas.create_arc(
-                    center_x - radius, center_y - radius,
-                    center_x + radius, center_y + radius,
-                    start=angle, extent=-360/segments,
-                    outline=color, width=line_width,
-                    style="arc"
-                )
-        
-        # Center text with time display
-        mins = self.remaining_time // 60
-        secs = self.remaining_time % 60
-        self.progress_canvas.create_text(
-            center_x, center_y,
-            text=f"{mins:02d}:{secs:02d}",
-            font=("Segoe UI", 28, "bold"),
-            fill="#ffffff"
-        )
-        
-        # Task name below time
-        self.progress_canvas.create_text(
-            center_x, center_y + 40,
-            text=self.selected_task[:12],
-            font=("Segoe UI", 12),
-            fill="#a1a1aa"
-        )
+        mins = self.engine.remaining_time // 60
+        secs = self.engine.remaining_time % 60
+        self.progress_ring.draw(progress, self.get_gradient_color, f"{mins:02d}:{secs:02d}", self.selected_task[:12])
         
     def draw_daily_progress_ring(self, progress):
         """Draw modern daily progress ring"""
-        self.daily_canvas.delete("all")
-        
-        # Dimensions
-        width, height = 200, 200
-        center_x, center_y = width//2, height//2
-        radius = 80
-        line_width = 10
-        
-        # Background circle
-        self.daily_canvas.create_oval(
-            center_x - radius, center_y - radius,
-            center_x + radius, center_y + radius,
-            outline="#262626", width=line_width
-        )
-        
-        # Progress arc with gradient
-        if progress > 0:
-            start_angle = 90
-            extent = -360 * progress
-            
-            segments = 72  # 5 degree steps
-            for i in range(0, int(abs(extent)), int(360/segments)):
-                angle = start_angle - i
-                segment_progress = i/abs(extent) if extent != 0 else 0
-                color = self.get_daily_gradient_color(segment_progress, progress)
-                
-                # Draw arc segment
-                self.daily_canvas.create_arc(
-                    center_x - radius, center_y - radius,
-                    center_x + radius, center_y + radius,
-                    start=angle, extent=-360/segments,
-                    outline=color, width=line_width,
-                    style="arc"
-                )
-
-        # Center text with time display
-        percentage = int(progress * 100)
-        self.daily_canvas.create_text(
-            center_x, center_y,
-            text=f"{percentage}%",
-            font=("Segoe UI", 28, "bold"),
-            fill="#ffffff"
-        )
-        
-        # Task name below time
-        self.daily_canvas.create_text(
-            center_x, center_y + 40,
-            text="Completed",
-            font=("Segoe UI", 12),
-            fill="#a1a1aa"
-        )
+        self.daily_ring.draw(progress, lambda segment: self.get_daily_gradient_color(segment, progress),
+                             f"{int(progress * 100)}%", "Completed")
     
     def get_gradient_color(self, ratio):
         """Smooth gradient from #FF0F7B (pink) to #F89B29 (orange)"""
@@ -1552,6 +5780,7 @@ class FocusSessionApp:
     def on_task_change(self, task):
         """Handle task category change"""
         self.selected_task = task
+        self.settings.set("selected_task", task)
         
     def on_range_change(self, value):
         """Handle graph range change"""
@@ -1559,52 +5788,42 @@ class FocusSessionApp:
         
     def toggle_session(self):
         """Start or pause session"""
-        if not self.session_active:
+        if not self.engine.session_active:
             self.start_session()
         else:
-            if self.session_paused:
+            if self.engine.session_paused:
                 self.resume_session()
             else:
                 self.pause_session()
                 
     def start_session(self):
         """Start a new focus session"""
-        self.session_active = True
-        self.session_paused = False
-        self.remaining_time = self.session_duration * 60
         self.selected_task = self.task_dropdown.get()
-        
-        # Save session to database
-        self.save_session_start()
+        generation = self.engine.start(self.selected_task, self.note_entry.get().strip(), self.tags_entry.get())
         
         # Update UI
         self.start_pause_btn.configure(text="Pause")
         self.status_label.configure(text="Focus session active")
         
         # Start timer thread
-        self.timer_thread = threading.Thread(target=self.run_timer, daemon=True)
+        self.timer_thread = threading.Thread(target=self.engine.run_timer, args=(generation,), daemon=True)
         self.timer_thread.start()
         
     def pause_session(self):
         """Pause current session"""
-        self.session_paused = True
+        self.engine.pause()
         self.start_pause_btn.configure(text="Resume")
         self.status_label.configure(text="Session paused")
         
-        # Update session in database
-        self.update_session_progress()
-        
     def resume_session(self):
         """Resume paused session"""
-        self.session_paused = False
+        self.engine.resume()
         self.start_pause_btn.configure(text="Pause")
         self.status_label.configure(text="Focus session active")
         
     def reset_session(self):
         """Reset current session"""
-        self.session_active = False
-        self.session_paused = False
-        self.remaining_time = self.session_duration * 60
+        self.engine.reset()
         
         # Update UI
         self.start_pause_btn.configure(text="Start")
@@ -1614,12 +5833,8 @@ class FocusSessionApp:
         
     def stop_session(self):
         """Stop and save current session"""
-        if self.session_active:
-            self.session_active = False
-            self.session_paused = False
-            
-            # Save final session data
-            self.save_session_end()
+        if self.engine.stop(self.note_entry.get().strip(), self.tags_entry.get()):
+            self.note_entry.delete(0, "end")
             
             # Update UI
             self.start_pause_btn.configure(text="Start")
@@ -1627,40 +5842,27 @@ class FocusSessionApp:
             
             # Update daily progress
             self.update_daily_progress()
-
-            # Session completed
-            if self.session_active and self.remaining_time <= 0:
-                self.root.after(0, self.session_completed)
             
             # reset
             self.reset_session()
-            
-    def run_timer(self):
-        """Main timer loop"""
-        while self.session_active and self.remaining_time > 0:
-            if not self.session_paused:
-                self.remaining_time -= 1
-                
-                # Update UI
-                self.root.after(0, self.update_timer_display)
-                
-                # Auto-save progress every 30 seconds
-                if self.remaining_time % 30 == 0:
-                    self.update_session_progress()
-                    
-            time.sleep(1)
-            
-        # Session completed
-        if self.session_active and self.remaining_time <= 0:
-            self.root.after(0, self.session_completed)
+
+    def on_window_visibility(self, event=None):
+        """Track whether the window is on screen and focused (Tk thread)"""
+        if event is not None and event.widget is not self.root:
+            return
+        visible = self.root.state() != "iconic" and self.root.focus_displayof() is not None
+        if visible == self.window_visible:
+            return
+        self.window_visible = self.engine.visible = visible
+        self.ui.set_idle_interval(UIDispatcher.IDLE_MS if visible else UIDispatcher.HIDDEN_IDLE_MS)
+        if visible:
+            self.engine.timer_wakeup.set()  # Redraw straight away
             
     def session_completed(self):
         """Handle session completion"""
-        self.session_active = False
-        self.session_paused = False
-        
         # Save session
-        self.save_session_end()
+        self.engine.complete(self.note_entry.get().strip(), self.tags_entry.get())
+        self.note_entry.delete(0, "end")
         
         # Update UI
         self.start_pause_btn.configure(text="Start")
@@ -1672,10 +5874,7 @@ class FocusSessionApp:
         
         # Show notification
         self.show_notification("Focus Session Complete!", 
-                             f"Great job! You completed a {self.session_duration} minute session.")
-        
-        # Play notification sound
-        self.play_notification_sound()
+                             f"Great job! You completed a {self.engine.session_duration} minute session.")
 
         if sys.platform == "win32":
             try:
@@ -1703,202 +5902,147 @@ class FocusSessionApp:
             
     def update_timer_display(self):
         """Update timer display"""
-        minutes = self.remaining_time // 60
-        seconds = self.remaining_time % 60
+        minutes = self.engine.remaining_time // 60
+        seconds = self.engine.remaining_time % 60
         time_str = f"{minutes:02d}:{seconds:02d}"
         
         # Update progress circle
-        total_seconds = self.session_duration * 60
-        progress = 1.0 - (self.remaining_time / total_seconds)
+        total_seconds = self.engine.session_duration * 60
+        progress = 1.0 - (self.engine.remaining_time / total_seconds)
         self.draw_progress_circle(progress)
+        self.update_today_display()
         
-    def save_session_start(self):
-        """Save session start to database"""
-        date_str = datetime.date.today().isoformat()
-        start_time = datetime.datetime.now().isoformat()
-        
-        self.cursor.execute('''
-            INSERT INTO sessions (date, task_category, duration, completed, start_time)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (date_str, self.selected_task, self.session_duration, 0, start_time))
-        
-        self.current_session_id = self.cursor.lastrowid
-        self.conn.commit()
-
-    
-        
-    def update_session_progress(self):
-        """Update session progress in database"""
-        if self.current_session_id:
-            completed_seconds = (self.session_duration * 60) - self.remaining_time
-            completed_minutes = completed_seconds // 60
-            
-            self.cursor.execute('''
-                UPDATE sessions SET completed = ? WHERE id = ?
-            ''', (completed_minutes, self.current_session_id))
-            self.conn.commit()
-            
-    def save_session_end(self):
-        """Save session end to database"""
-        if self.current_session_id:
-            completed_seconds = (self.session_duration * 60) - self.remaining_time
-            completed_minutes = completed_seconds // 60
-            end_time = datetime.datetime.now().isoformat()
-            
-            self.cursor.execute('''
-                UPDATE sessions SET completed = ?, end_time = ? WHERE id = ?
-            ''', (completed_minutes, end_time, self.current_session_id))
-            self.conn.commit()
-            
     def get_today_total_minutes(self):
         """Get total minutes for today with connection refresh"""
         try:
             # Refresh connection to see external changes
             self.conn.commit()
-            today = datetime.date.today().isoformat()
-            self.cursor.execute('''
-                SELECT SUM(completed) FROM sessions WHERE date = ?
-            ''', (today,))
-            result = self.cursor.fetchone()
-            return result[0] if result[0] else 0
+            self.engine.reconcile_today()
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-            return 0
+        return self.engine.today_minutes()
+
+    def update_today_display(self):
+        """Redraw the Today label and daily ring from the counter; no queries except at midnight"""
+        if self.engine.day_changed():
+            # Yesterday's label and the streak move on as well
+            self.update_daily_progress()
+            return
+        today_minutes = self.engine.today_minutes()
+        if today_minutes != self.shown_today_minutes:
+            self.show_today_minutes(today_minutes)
+
+    def show_today_minutes(self, today_minutes):
+        """Today label and daily ring"""
+        daily_goal_minutes = self.daily_goal * 60
+        progress = min(today_minutes / daily_goal_minutes, 1.0) if daily_goal_minutes > 0 else 0
+        self.today_time_label.configure(text=f"{today_minutes // 60}h {today_minutes % 60}m")
+        self.draw_daily_progress_ring(progress)
+        self.shown_today_minutes = today_minutes
+        self.show_forecast(today_minutes)
+
+    def show_forecast(self, today_minutes):
+        """Rolling averages, today's projection and the month goal forecast, from RollingStats' running sums"""
+        stats = self.engine.rolling_stats
+        if stats.today is None:
+            return
+        now = self.engine.clock.now()
+        short, long = stats.averages()
+        projected = round(stats.projected(today_minutes, now))
+        goal = self.settings.get("monthly_goal")
+        days = stats.days_to_month_goal(goal * 60, today_minutes, now)
+        today = day_to_date(stats.today)
+        next_month = (today.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        for key, minutes in (("avg7", round(short)), ("avg30", round(long)), ("projected", projected)):
+            self.forecast_labels[key].configure(text=f"{minutes // 60}h {minutes % 60}m")
+        if days == 0:
+            text = "Reached"
+        elif days is None or days > (next_month - today).days:
+            text = "Off pace"
+        else:
+            text = "Today" if days == 1 else f"{days} days"
+        self.forecast_labels["month"].configure(text=text)
+        self.month_goal_caption.configure(text=f"{goal}h this month")
         
     def update_daily_progress(self):
         """Update daily progress display"""
-        # Get today's minutes
-        today_minutes = self.get_today_total_minutes()
-        daily_goal_minutes = self.daily_goal * 60
+        # Today's minutes; the rolling window and goal-met days move on only by the days that closed since
+        try:
+            today_minutes = self.engine.roll_over()
+        except sqlite3.Error as e:
+            print(f"Database error: {e}")
+            today_minutes = self.engine.today_minutes()
         
         # Get yesterday's minutes
-        yesterday = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+        yesterday = epoch_day(self.engine.clock.today()) - 1
         self.cursor.execute('''
-            SELECT SUM(completed) FROM sessions WHERE date = ?
+            SELECT SUM(minutes) FROM daily_totals WHERE day = ?
         ''', (yesterday,))
         result = self.cursor.fetchone()
         yesterday_minutes = result[0] if result[0] else 0
         
-        # Calculate progress
-        progress = min(today_minutes / daily_goal_minutes, 1.0) if daily_goal_minutes > 0 else 0
-        
         # Update UI
         # Yesterday
         y_hours = yesterday_minutes // 60
         y_minutes = yesterday_minutes % 60
         self.yesterday_time_label.configure(text=f"{y_hours}h {y_minutes}m")
         
-        # Today
-        t_hours = today_minutes // 60
-        t_minutes = today_minutes % 60
-        self.today_time_label.configure(text=f"{t_hours}h {t_minutes}m")
-        
-        # Progress ring
-        self.draw_daily_progress_ring(progress)
-        
+        # Today, the progress ring and the forecasts
+        self.show_today_minutes(today_minutes)
+
         # Update streak
-        streak = self.calculate_streak()
+        streak, best = self.calculate_streak()
         self.streak_label.configure(text=str(streak))
+        self.streak_caption.configure(text=f"Streak (best {best})")
         
     def calculate_streak(self):
-        """Calculate current streak"""
-        # Get last 30 days of data
-        end_date = datetime.date.today() - datetime.timedelta(days=1)
-        # start_date = end_date - datetime.timedelta(days=30)
-        
-        self.cursor.execute('''
-            SELECT date, SUM(completed) as total_minutes
-            FROM sessions 
-            WHERE date <= ?
-            GROUP BY date
-            ORDER BY date DESC
-        ''', (end_date.isoformat(),))
-        
-        results = self.cursor.fetchall()
-        daily_goal_minutes = self.daily_goal * 60
-        
-        streak = 0
-        for date_str, total_minutes in results:
-            if total_minutes >= daily_goal_minutes:
-                streak += 1
-            else:
-                break
-                
-        return streak
+        """Current streak ending yesterday and the best streak, from the goal-met bitmap"""
+        today = self.engine.clock.today()
+        close_goal_days(self.conn, today)
+        goals = GoalBitmap.load(self.conn)
+        return goals.streak(epoch_day(today) - 1), goals.best_streak()
         
     def update_graph(self):
         """Update progress graph"""
         pass  # Handled by web view now
         
     def show_notification(self, title, message):
-        """Show system notification"""
-        try:
-            notification.notify(
-                title=title,
-                message=message,
-                app_name="Focus Session Pro",
-                timeout=5
-            )
-        except Exception as e:
-            print(f"Notification error: {e}")
-            
-    def play_notification_sound(self):
-        """Play notification sound"""
-        try:
-            # Initialize mixer if not already done
-            if not pygame.mixer.get_init():
-                pygame.mixer.init()
-            
-            # Load and play the sound file
-            sound = pygame.mixer.Sound(self.resource_path('focuspro.wav'))
-            sound.play()
-        
-        except Exception as e:
-            print(f"Error playing sound: {e}")
-            # Fallback to built-in sound
-            self.play_default_notification_sound()
-
-    def play_default_notification_sound(self):
-        """Fallback sound (beep)"""
-        try:
-            import winsound
-            winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
-        except:
-            print("No fallback sound available")
-
+        """Show system notification (delivered off the Tk thread)"""
+        self.notifier.notify(title, message)
             
     def update_daily_goal(self):
         """Update daily goal"""
         try:
-            new_goal = int(self.goal_entry.get())
-            if new_goal > 0:
-                self.daily_goal = new_goal
-                self.save_settings()
-                self.update_daily_progress()
-                messagebox.showinfo("Success", f"Daily goal updated to {new_goal} hours")
+            self.settings.set("daily_goal", self.goal_entry.get())
         except ValueError:
-            messagebox.showerror("Error", "Please enter a valid number")
+            messagebox.showerror("Error", "Please enter a number of hours from 1 to 24")
+            return
+        self.daily_goal = self.settings.get("daily_goal")
+        self.save_settings()
+        self.update_daily_progress()
+        messagebox.showinfo("Success", f"Daily goal updated to {self.daily_goal} hours")
             
     def save_settings(self):
-        """Save settings to database"""
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)
-        ''', ('daily_goal', str(self.daily_goal)))
+        """Record the goal in goal_history; the settings row follows with the next settings flush"""
+        # Applies from today on; days already closed keep the goal they had
+        set_daily_goal(self.conn, self.daily_goal * 60, epoch_day(self.engine.clock.today()))
         self.conn.commit()
         
     def load_settings(self):
-        """Load settings from database"""
-        self.cursor.execute('SELECT value FROM settings WHERE key = ?', ('daily_goal',))
-        result = self.cursor.fetchone()
-        if result:
-            self.daily_goal = int(result[0])
+        """Load the goal in effect today (goal_history is authoritative)"""
+        minutes = goal_for_day(self.conn, epoch_day(self.engine.clock.today()))
+        if minutes:
+            self.daily_goal = minutes // 60
             self.goal_entry.delete(0, 'end')
             self.goal_entry.insert(0, str(self.daily_goal))
             
     def on_closing(self):
         """Handle application closing"""
-        if self.session_active:
-            self.update_session_progress()
+        self.engine.close()
+        self.instance_server.close()
+        self.ui.stop()
+        self.notifier.close()
+        self.settings.flush()
         self.conn.close()
         self.root.destroy()
         
@@ -1908,7 +6052,1000 @@ class FocusSessionApp:
         self.root.mainloop()
 
 
+def bench_timers(argv):
+    """Run concurrent countdowns on one wakeup source and report CPU and wakeups/s"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py bench-timers", description=bench_timers.__doc__)
+    parser.add_argument("--timers", type=int, default=100, help="number of concurrent countdowns")
+    parser.add_argument("--seconds", type=float, default=10.0, help="how long to run")
+    args = parser.parse_args(argv)
+
+    scheduler = TimerScheduler()
+    for i in range(args.timers):
+        # Stagger the durations so some countdowns finish during the run
+        scheduler.add(f"timer {i}", 1.0 + i * 0.37)
+
+    wakeup = threading.Event()
+    wakeups = finished = 0
+    wall_start, cpu_start = time.monotonic(), time.process_time()
+    while time.monotonic() - wall_start < args.seconds:
+        delay = scheduler.next_wakeup_delay()
+        if delay is None:
+            break
+        wakeup.wait(delay)
+        wakeups += 1
+        finished += len(scheduler.pop_expired())
+        # What the Timer view does on every wakeup: format each visible countdown
+        for name in scheduler.timers:
+            scheduler.remaining(name)
+    wall = time.monotonic() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    print(f"timers:          {args.timers}")
+    print(f"wall time:       {wall:.2f} s")
+    print(f"wakeups:         {wakeups} ({wakeups / wall:.2f}/s)")
+    print(f"finished:        {finished}")
+    print(f"CPU time:        {cpu * 1000:.1f} ms ({cpu / wall * 100:.3f}% of one core)")
+    return 0
+
+def bench_ticks(argv):
+    """Count focus-timer wakeups and CPU for a session, visible vs hidden window"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py bench-ticks", description=bench_ticks.__doc__)
+    parser.add_argument("--minutes", type=int, default=60, help="session length")
+    args = parser.parse_args(argv)
+
+    total = args.minutes * 60
+    print(f"{args.minutes} min session, checkpoint every {FocusSessionEngine.CHECKPOINT_SECONDS} s")
+    for label, visible in (("visible", True), ("hidden", False)):
+        # The real run_timer on a SimulatedClock; checkpoints go to a scratch in-memory database
+        conn = connect_database(":memory:")
+        engine = FocusSessionEngine(conn, CategoryCache(conn), SimulatedClock(datetime.datetime.now()))
+        engine.visible = visible
+        engine.session_duration = args.minutes
+        redraws = 0
+
+        def tick():
+            nonlocal redraws
+            redraws += 1
+        engine.on_tick = tick
+        cpu_start = time.process_time()
+        engine.run_timer(engine.start(engine.categories.names()[0]))
+        wakeups = engine.timer_wakeups
+        cpu = time.process_time() - cpu_start
+        pump_ms = UIDispatcher.IDLE_MS if visible else UIDispatcher.HIDDEN_IDLE_MS
+        print(f"  {label:8} timer wakeups: {wakeups:6d} ({wakeups / total:.3f}/s), "
+              f"ring redraws: {redraws:6d}, dispatcher idle polls: {1000 // pump_ms}/s, "
+              f"timer CPU: {cpu * 1000:.2f} ms")
+        conn.close()
+    return 0
+
+def bench_notify(argv):
+    """Measure caller-side notify() latency and coalescing against a slow stub backend"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py bench-notify", description=bench_notify.__doc__)
+    parser.add_argument("--bursts", type=int, default=5, help="number of notification bursts")
+    parser.add_argument("--burst-size", type=int, default=2, help="notifications per burst")
+    parser.add_argument("--backend-delay", type=float, default=0.3, help="simulated backend latency (s)")
+    args = parser.parse_args(argv)
+
+    fast = LocalStubBackend()
+    slow = LocalStubBackend(delay=args.backend_delay)
+    hung = LocalStubBackend(delay=10.0, timeout=0.5)
+    service = NotificationService([fast, slow, hung], coalesce_seconds=0.2)
+
+    latencies = []
+    for burst in range(args.bursts):
+        for n in range(args.burst_size):
+            started = time.perf_counter()
+            service.notify(f"Burst {burst}", f"notification {n}")
+            latencies.append(time.perf_counter() - started)
+        time.sleep(0.2 + args.backend_delay + 0.5 + 0.1)
+    service.close()
+
+    print(f"notify() calls:        {len(latencies)}")
+    print(f"caller latency max:    {max(latencies) * 1e6:.1f} us (backend takes {args.backend_delay * 1000:.0f} ms)")
+    print(f"delivered (fast/slow): {len(fast.sent)}/{len(slow.sent)} after coalescing")
+    print(f"hung backend:          bounded by its {hung.timeout:.1f} s timeout")
+    return 0
+
+def bench_analytics(argv):
+    """Build the analytics page on a worker while timing a simulated Tk frame loop"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py bench-analytics", description=bench_analytics.__doc__)
+    parser.add_argument("--db", default=default_db_path(), help="FocusPro database")
+    parser.add_argument("--cancel-after", type=float, default=0.05, help="seconds before the cancel run cancels")
+    args = parser.parse_args(argv)
+
+    conn = connect_database(args.db)
+    colors = CategoryCache(conn).colors()
+    rows = conn.execute("SELECT COUNT(*) FROM daily_totals").fetchone()[0]
+    conn.close()
+    template = os.path.join(os.path.dirname(os.path.abspath(__file__)), "graph.html")
+    directory = tempfile.mkdtemp()
+    out_path = os.path.join(directory, "analytics.html")
+    try:
+        frame = UIDispatcher.FRAME_MS / 1000
+
+        def build(cancel=None):
+            conn = connect_database(args.db)
+            try:
+                build_analytics_report(conn, template, out_path, colors, DEFAULT_DAILY_GOAL_HOURS, cancel=cancel)
+            except ReportCancelled:
+                pass
+            finally:
+                conn.close()
+
+        started = time.perf_counter()
+        build()
+        inline = time.perf_counter() - started
+        print(f"{rows} daily_totals rows, page {os.path.getsize(out_path) / 1e6:.1f} MB")
+        print(f"inline build (what the button callback used to do): the window froze for {inline * 1000:.0f} ms")
+
+        # The Tk thread's part: one short frame every FRAME_MS while the worker builds
+        for label, cancel_after in (("worker", None), ("worker, cancelled", args.cancel_after)):
+            cancel = threading.Event()
+            worker = threading.Thread(target=build, args=(cancel,))
+            started = last = time.perf_counter()
+            worker.start()
+            gaps, cancelled_at = [], None
+            while worker.is_alive():
+                time.sleep(frame)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+                if cancel_after is not None and cancelled_at is None and now - started >= cancel_after:
+                    cancel.set()
+                    cancelled_at = now
+            worker.join()
+            total = time.perf_counter() - started
+            gaps.sort()
+            line = (f"{label:18} {total * 1000:6.0f} ms, {len(gaps)} frames; frame gap median "
+                    f"{gaps[len(gaps) // 2] * 1000:.1f} ms, max {gaps[-1] * 1000:.1f} ms"
+                    if gaps else f"{label}: no frames")
+            if cancelled_at is not None:
+                line += f"; stopped {(time.perf_counter() - cancelled_at) * 1000:.1f} ms after cancel"
+            print(line)
+        return 0
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def cli_fetch_assets(argv):
+    """Download the pinned Chart.js, flatpickr and Bootstrap files the analytics page bundles, checking their sha256"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(prog="FocusPro.py fetch-assets", description=cli_fetch_assets.__doc__)
+    parser.add_argument("--dest", default=os.path.join(here, ANALYTICS_ASSETS_DIR),
+                        help="output folder (default: vendor/ next to FocusPro.py)")
+    parser.add_argument("--force", action="store_true", help="download again even if present")
+    parser.add_argument("--pin", action="store_true",
+                        help=f"download without checking and record the digests in {ANALYTICS_ASSETS_MANIFEST} "
+                             "(after changing ANALYTICS_ASSETS; review and commit the file)")
+    args = parser.parse_args(argv)
+
+    manifest = os.path.join(here, ANALYTICS_ASSETS_MANIFEST)
+    try:
+        fetched = fetch_analytics_assets(args.dest, None if args.pin else read_asset_hashes(manifest),
+                                         args.force or args.pin)
+    except (OSError, ValueError) as e:
+        # Non-zero, so a build script that runs this first stops here
+        print(f"Fetching failed: {e}")
+        return 1
+    if args.pin:
+        with open(manifest, "w", encoding="utf-8") as f:
+            for name in ANALYTICS_ASSETS:
+                f.write(f"{file_sha256(os.path.join(args.dest, name))}  {name}\n")
+        print(f"Pinned {len(ANALYTICS_ASSETS)} digests in {manifest}")
+    for name in ANALYTICS_ASSETS:
+        path = os.path.join(args.dest, name)
+        print(f"  {name:20} {os.path.getsize(path) / 1024:7.1f} KB{'  (fetched)' if name in fetched else ''}")
+    return 0
+
+def bench_chart(argv):
+    """Time the Trends chart's per-frame work (downsample + project) while panning and zooming"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py bench-chart", description=bench_chart.__doc__)
+    parser.add_argument("--db", default=default_db_path(), help="FocusPro database")
+    parser.add_argument("--width", type=int, default=800, help="plot width in pixels")
+    parser.add_argument("--frames", type=int, default=200, help="pan frames per range")
+    args = parser.parse_args(argv)
+
+    conn = connect_database(args.db)
+    started = time.perf_counter()
+    series = DailySeries(conn)
+    loaded = time.perf_counter() - started
+    conn.close()
+    print(f"{len(series)} days x {len(series.categories) + 1} series loaded in {loaded * 1000:.1f} ms")
+
+    points = min(ChartView.MAX_POINTS, args.width // 2)
+    for label, days in (("30 days", 30), ("1 year", 365), ("10 years", 3650), ("all", len(series))):
+        span = min(days, len(series))
+        times, drawn = [], 0
+        for frame in range(args.frames):
+            # Pan from the newest day back across the history, one step per frame
+            start = (len(series) - span) * (args.frames - 1 - frame) // max(args.frames - 1, 1)
+            began = time.perf_counter()
+            data = series.downsampled(start, start + span, points)
+            peak = max(series.total[start:start + span], default=0)
+            project_series(data, start, args.width / max(span - 1, 1), 300 / max(peak, 60), 50, 330)
+            times.append(time.perf_counter() - began)
+            drawn = len(data["Total"])
+        times.sort()
+        print(f"  {label:9} {span:5} days -> {drawn:3} points/series: frame median {times[len(times) // 2] * 1000:.2f} ms, "
+              f"max {times[-1] * 1000:.2f} ms ({1 / max(times[-1], 1e-9):.0f} fps worst case)")
+
+    # Zooming out from 30 days to everything and back, anchored at the newest day
+    span, times = 30, []
+    while True:
+        began = time.perf_counter()
+        series.downsampled(len(series) - span, len(series), points)
+        times.append(time.perf_counter() - began)
+        if span >= len(series):
+            break
+        span = min(round(span * ChartView.ZOOM_STEP) + 1, len(series))
+    while span > 30:
+        span = max(round(span / ChartView.ZOOM_STEP), 30)
+        began = time.perf_counter()
+        series.downsampled(len(series) - span, len(series), points)
+        times.append(time.perf_counter() - began)
+    print(f"  zoom 30 days <-> all: {len(times)} wheel steps, max {max(times) * 1000:.2f} ms")
+    return 0
+
+def bench_tags(argv):
+    """Tag a copy of a history with thousands of generated tags and time the facet queries"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py bench-tags", description=bench_tags.__doc__)
+    parser.add_argument("--db", default=default_db_path(), help="FocusPro database (copied, never changed)")
+    parser.add_argument("--tags", type=int, default=5000, help="distinct tags generated")
+    parser.add_argument("--per-session", type=int, default=3, help="most tags on one session")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query (median shown)")
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp()
+    copy = os.path.join(directory, "focuspro.db")
+    try:
+        source = sqlite3.connect(args.db)
+        conn = sqlite3.connect(copy)
+        source.backup(conn)
+        source.close()
+        conn.close()
+        conn = connect_database(copy)
+
+        # Popular tags are used far more than the long tail, as with real tagging
+        dimensions = ("course", "project", "location", "")
+        tags = [(dimensions[i % len(dimensions)], f"t{i}") for i in range(args.tags)]
+        cum_weights = list(accumulate(1 / (rank + 1) for rank in range(args.tags)))
+        rng = random.Random(48)
+        started = time.perf_counter()
+        ids = list(tag_ids(conn, tags, create=True).values())
+        sessions = [row[0] for row in conn.execute("SELECT id FROM sessions")]
+        conn.executemany("INSERT OR IGNORE INTO session_tags (session_id, tag_id) VALUES (?, ?)", (
+            (session_id, tag_id) for session_id in sessions
+            for tag_id in rng.choices(ids, cum_weights=cum_weights, k=rng.randint(0, args.per_session))))
+        conn.commit()
+        links = conn.execute("SELECT COUNT(*) FROM session_tags").fetchone()[0]
+        print(f"{len(sessions)} sessions, {args.tags} tags, {links} session tags "
+              f"(generated in {time.perf_counter() - started:.1f} s)")
+
+        today = epoch_day(datetime.date.today())
+        popular, common, rare = (tag_name(*tags[rank]) for rank in (0, 1, args.tags - 1))
+        cases = (("unfiltered, all time", "", None), ("unfiltered, last 30 days", "", today - 29),
+                 (f"{popular}, all time", popular, None), (f"{rare}, all time", rare, None),
+                 (f"{popular} + {common}", f"{popular} {common}", None),
+                 (f"{popular} + {common}, last 30 days", f"{popular} {common}", today - 29))
+        for label, text, start_day in cases:
+            times = []
+            for _ in range(args.repeat):
+                began = time.perf_counter()
+                sessions, minutes, facets = tag_facets(conn, text, start_day, None if start_day is None else today)
+                times.append(time.perf_counter() - began)
+            times.sort()
+            print(f"  {label:34} {sessions:7} sessions, {len(facets):5} facets: "
+                  f"median {times[len(times) // 2] * 1000:7.1f} ms, max {times[-1] * 1000:7.1f} ms")
+        # The rollup behind unfiltered facets against a recount from the sessions
+        recount = {tag_name(dimension, value): (count, total) for dimension, value, count, total in conn.execute("""
+            SELECT t.dimension, t.value, COUNT(*), SUM(s.completed)
+            FROM session_tags st JOIN sessions s ON s.id = st.session_id JOIN tags t ON t.id = st.tag_id
+            GROUP BY st.tag_id
+        """)}
+        print(f"  tag_totals rollup {'matches' if tag_facets(conn)[2] == recount else 'DIFFERS FROM'} a recount")
+        began = time.perf_counter()
+        names, sets, totals = tagged_totals(conn)
+        print(f"  analytics payload: {len(sets)} tag combinations, {len(totals)} rows in "
+              f"{(time.perf_counter() - began) * 1000:.0f} ms")
+        conn.close()
+        return 0
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def default_db_path():
+    return os.path.join(get_appdata_path(), "focuspro.db")
+
+def cli_export(argv):
+    """Export session history to csv, jsonl or a SQLite file"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py export", description=cli_export.__doc__)
+    parser.add_argument("path", help="output file")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="default: from the file extension")
+    parser.add_argument("--db", default=default_db_path(), help="FocusPro database")
+    args = parser.parse_args(argv)
+
+    conn = connect_database(args.db)
+    started = time.perf_counter()
+    count = export_sessions(conn, args.path, args.format, db_path=args.db)
+    print(f"Exported {count} sessions to {args.path} in {time.perf_counter() - started:.2f} s")
+    conn.close()
+    return 0
+
+def cli_import(argv):
+    """Import session history from csv, jsonl or a SQLite file"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py import", description=cli_import.__doc__)
+    parser.add_argument("path", help="input file")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="default: from the file extension")
+    parser.add_argument("--db", default=default_db_path(), help="FocusPro database")
+    args = parser.parse_args(argv)
+
+    conn = connect_database(args.db)
+    started = time.perf_counter()
+    inserted, skipped, invalid = import_sessions(conn, args.path, args.format, db_path=args.db)
+    print(f"Imported {inserted} sessions ({skipped} duplicates skipped) in {time.perf_counter() - started:.2f} s")
+    if invalid:
+        print(f"{invalid} rows left out: no start_time, or a date/time that cannot be read")
+    conn.close()
+    return 0
+
+def cli_compact(argv):
+    """Archive raw sessions older than the retention window and vacuum"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py compact", description=cli_compact.__doc__)
+    parser.add_argument("--months", type=int, help="retention in months (default: the saved setting)")
+    parser.add_argument("--db", default=default_db_path(), help="FocusPro database")
+    args = parser.parse_args(argv)
+
+    conn = connect_database(args.db)
+    months = args.months if args.months is not None else SettingsStore(conn).get("retention_months")
+    size_before = os.path.getsize(args.db)
+    moved = compact_old_sessions(conn, args.db, months)
+    conn.close()
+    print(f"Archived {moved} sessions older than {months} months; "
+          f"{size_before // 1024} KiB -> {os.path.getsize(args.db) // 1024} KiB")
+    return 0
+
+def cli_sync(argv):
+    """Merge other devices' change-sets from a shared folder and publish this one's"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py sync", description=cli_sync.__doc__)
+    parser.add_argument("folder", nargs="?", help="shared folder (default: the one chosen in the app)")
+    parser.add_argument("--db", default=default_db_path(), help="FocusPro database")
+    args = parser.parse_args(argv)
+
+    conn = connect_database(args.db)
+    folder = args.folder or SettingsStore(conn).get("sync_folder")
+    if not folder:
+        parser.error("no sync folder given or saved")
+    started = time.perf_counter()
+    received, sent = sync_folder(conn, folder, db_path=args.db)
+    conn.close()
+    print(f"Received {received} and sent {sent} sessions in {time.perf_counter() - started:.2f} s")
+    return 0
+
+def cli_team_report(argv):
+    """Leaderboard, streaks and totals across a folder of members' focuspro.db files"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py team-report", description=cli_team_report.__doc__)
+    parser.add_argument("folder", help="folder of member databases (*.db or <member>/focuspro.db)")
+    parser.add_argument("--days", type=int, default=7, help="report window ending on --end (default: 7)")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help="last day of the window, YYYY-MM-DD (default: today)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args(argv)
+
+    paths = find_member_databases(args.folder)
+    if not paths:
+        parser.error(f"no databases in {args.folder}")
+    end_day = epoch_day(args.end)
+    start_day = end_day - args.days + 1
+    started = time.perf_counter()
+    report = team_report(paths, start_day, end_day, args.workers)
+    elapsed = time.perf_counter() - started
+
+    print(f"Team report {day_to_date(start_day)} .. {args.end}: {len(paths)} databases in {elapsed:.2f} s")
+    print(f"Total focus: {report['minutes'] / 60:.1f} h over {report['sessions']} sessions")
+    print("\nLeaderboard")
+    for rank, member in enumerate(report["leaderboard"], start=1):
+        print(f"  {rank:>3}. {member['member']:<24} {member['minutes'] / 60:>7.1f} h  "
+              f"{member['sessions']:>5} sessions  streak {member['streak']}")
+    print("\nDaily totals")
+    for day, minutes in report["daily"].items():
+        print(f"  {day_to_date(day)}  {minutes / 60:>8.1f} h")
+    print("\nCategories")
+    for category, minutes in report["categories"].items():
+        print(f"  {category:<24} {minutes / 60:>8.1f} h")
+    for member in report["errors"]:
+        print(f"Skipped {member['path']}: {member['error']}", file=sys.stderr)
+
+    if args.json:
+        report["daily"] = {day_to_date(day).isoformat(): minutes for day, minutes in report["daily"].items()}
+        for member in report["leaderboard"] + report["errors"]:
+            member["daily"] = {day_to_date(day).isoformat(): minutes for day, minutes in member["daily"].items()}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+def cli_backup(argv):
+    """Write a verified online backup of the database and rotate old ones"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py backup", description=cli_backup.__doc__)
+    parser.add_argument("--keep", type=int, help="backups to keep (default: the saved setting)")
+    parser.add_argument("--db", default=default_db_path(), help="FocusPro database")
+    args = parser.parse_args(argv)
+
+    conn = connect_database(args.db)
+    keep = args.keep or SettingsStore(conn).get("backup_keep")
+    started = time.perf_counter()
+    path = create_backup(conn, args.db, keep)
+    conn.close()
+    print(f"Backed up to {path} in {time.perf_counter() - started:.2f} s; keeping {keep}")
+    return 0
+
+def cli_goals(argv):
+    """Streaks, monthly goal hit rates and a goal calendar from the goal-met bitmap"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py goals", description=cli_goals.__doc__)
+    parser.add_argument("--months", type=int, default=6, help="months shown (default: 6)")
+    parser.add_argument("--db", default=default_db_path(), help="FocusPro database")
+    args = parser.parse_args(argv)
+
+    conn = connect_database(args.db)
+    close_goal_days(conn)
+    yesterday = epoch_day(datetime.date.today()) - 1
+    started = time.perf_counter()
+    goals = GoalBitmap.load(conn)
+    loaded = time.perf_counter()
+    streak, best = goals.streak(yesterday), goals.best_streak()
+    answered = time.perf_counter()
+    # What the streak used to cost: every day's total against today's goal
+    conn.execute("SELECT day, SUM(minutes) FROM daily_totals WHERE day <= ? GROUP BY day ORDER BY day DESC",
+                 (yesterday,)).fetchall()
+    scanned = time.perf_counter()
+    conn.close()
+
+    print(f"Current streak: {streak} days, best: {best} days")
+    print(f"Bitmap load {(loaded - started) * 1e6:.0f} us, streak + best {(answered - loaded) * 1e6:.0f} us; "
+          f"re-aggregating daily_totals {(scanned - answered) * 1e6:.0f} us")
+    month = datetime.date.today().replace(day=1)
+    for _ in range(args.months - 1):
+        month = (month - datetime.timedelta(days=1)).replace(day=1)
+    print()
+    while epoch_day(month) <= yesterday:
+        next_month = (month + datetime.timedelta(days=32)).replace(day=1)
+        start, end = epoch_day(month), min(epoch_day(next_month) - 1, yesterday)
+        # One column per day of the month: # goal met, . missed
+        days = "".join("#" if met else "." for met in goals.calendar(start, end))
+        print(f"  {month:%Y-%m}  {goals.hit_rate(start, end):>4.0%}  {days}")
+        month = next_month
+    return 0
+
+def cli_report(argv):
+    """List recent sessions with their notes and per-category totals, or search the notes"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py report", description=cli_report.__doc__)
+    parser.add_argument("--days", type=int, default=7, help="days covered, ending today (default: 7)")
+    parser.add_argument("--search", metavar="TEXT", help="show the sessions whose note matches TEXT instead")
+    parser.add_argument("--limit", type=int, default=50, help="search matches shown (default: 50)")
+    parser.add_argument("--db", default=default_db_path(), help="FocusPro database")
+    args = parser.parse_args(argv)
+
+    conn = connect_database(args.db)
+    started = time.perf_counter()
+    if args.search:
+        rows = search_notes(conn, args.search, args.limit)
+        label = f"{len(rows)} matches for {args.search!r}"
+    else:
+        rows = conn.execute("""
+            SELECT s.id, s.day, s.date, c.name, s.duration, s.completed, s.start_time, s.paused, s.note
+            FROM sessions s JOIN categories c ON c.id = s.category_id
+            WHERE s.day > ? ORDER BY s.day, s.start_ts
+        """, (epoch_day(datetime.date.today()) - args.days,)).fetchall()
+        label = f"{len(rows)} sessions in the last {args.days} days"
+    elapsed = time.perf_counter() - started
+    conn.close()
+
+    print(f"{label} ({elapsed * 1000:.1f} ms)")
+    totals = {}
+    for _, _, date, category, _, completed, start_time, _, note in rows:
+        totals[category] = totals.get(category, 0) + completed
+        print(f"  {date} {start_time[11:16]}  {category:<16} {completed:>4} min  {note or ''}")
+    if totals and not args.search:
+        print()
+        for category, minutes in sorted(totals.items(), key=lambda item: -item[1]):
+            print(f"  {category:<16} {minutes / 60:>6.1f} h")
+    return 0
+
+def cli_tags(argv):
+    """Totals and per-tag facet counts, for all sessions or those carrying every --filter tag"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py tags", description=cli_tags.__doc__)
+    parser.add_argument("--filter", default="", metavar="TAGS", help='e.g. "course:calc2 library"')
+    parser.add_argument("--days", type=int, help="days covered, ending today (default: all)")
+    parser.add_argument("--limit", type=int, default=30, help="facets shown, most hours first (default: 30)")
+    parser.add_argument("--db", default=default_db_path(), help="FocusPro database")
+    args = parser.parse_args(argv)
+
+    conn = connect_database(args.db)
+    today = epoch_day(datetime.date.today())
+    start_day, end_day = (today - args.days + 1, today) if args.days else (None, None)
+    started = time.perf_counter()
+    sessions, minutes, facets = tag_facets(conn, args.filter, start_day, end_day)
+    elapsed = time.perf_counter() - started
+    conn.close()
+
+    scope = f" tagged {args.filter!r}" if args.filter.strip() else ""
+    period = f"the last {args.days} days" if args.days else "all time"
+    print(f"{sessions} sessions{scope}, {minutes / 60:.1f} h, {period} ({elapsed * 1000:.1f} ms)")
+    for name, (count, total) in sorted(facets.items(), key=lambda item: -item[1][1])[:args.limit]:
+        print(f"  {name:<30} {count:>7} sessions {total / 60:>8.1f} h")
+    if len(facets) > args.limit:
+        print(f"  ... {len(facets) - args.limit} more")
+    return 0
+
+def rolling_stats_brute_force(conn, today):
+    """What RollingStats holds for `today`, recomputed from scratch: (short sum, long sum, hour sums, month total)"""
+    def total(first, end):
+        return conn.execute("SELECT COALESCE(SUM(minutes), 0) FROM daily_totals WHERE day >= ? AND day < ?",
+                            (first, end)).fetchone()[0]
+    hour_sums = [0] * 24
+    for hour, seconds in conn.execute("""
+        SELECT hour, SUM(seconds) FROM hour_buckets WHERE day >= ? AND day < ? GROUP BY hour
+    """, (today - RollingStats.WINDOW, today)):
+        hour_sums[hour] = seconds
+    month_start = epoch_day(day_to_date(today).replace(day=1))
+    return (total(today - RollingStats.SHORT, today), total(today - RollingStats.WINDOW, today),
+            hour_sums, total(month_start, today))
+
+def cli_stats(argv):
+    """Rolling averages and goal forecasts; --verify checks the running sums against a brute-force recount"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py stats", description=cli_stats.__doc__)
+    parser.add_argument("--verify", type=int, metavar="DAYS", default=0,
+                        help="advance day by day over the last DAYS days, editing days on the way, and compare")
+    parser.add_argument("--month-goal", type=int, metavar="HOURS", help="set the monthly goal")
+    parser.add_argument("--db", default=default_db_path(), help="FocusPro database")
+    args = parser.parse_args(argv)
+
+    conn = connect_database(args.db)
+    settings = SettingsStore(conn)
+    if args.month_goal is not None:
+        try:
+            settings.set("monthly_goal", args.month_goal)
+        except ValueError:
+            parser.error("--month-goal must be 1 to 744 hours")
+    today = epoch_day(datetime.date.today())
+    today_minutes = conn.execute("SELECT COALESCE(SUM(minutes), 0) FROM daily_totals WHERE day = ?",
+                                 (today,)).fetchone()[0]
+    stats = RollingStats()
+    started = time.perf_counter()
+    stats.load(conn)
+    loaded = time.perf_counter()
+    rolling_stats_brute_force(conn, today)
+    recounted = time.perf_counter()
+
+    short, long = stats.averages()
+    goal = settings.get("monthly_goal")
+    days = stats.days_to_month_goal(goal * 60, today_minutes)
+    print(f"7-day average {short / 60:.2f} h, 30-day average {long / 60:.2f} h")
+    print(f"Today {today_minutes / 60:.2f} h, projected by end of day {stats.projected(today_minutes) / 60:.2f} h")
+    print(f"{goal} h this month: " + ("reached" if days == 0 else "no pace to forecast from" if days is None
+                                      else f"in {days} days ({day_to_date(today + days - 1)})"))
+    print(f"Window load {(loaded - started) * 1000:.2f} ms; brute-force recount {(recounted - loaded) * 1000:.2f} ms")
+
+    if args.verify:
+        rng = random.Random(args.verify)
+        mismatches, steps, advance_time = 0, 0, 0.0
+        stats.load(conn, day_to_date(today - args.verify))
+        # Edits are rolled back at the end; the database is left as it was
+        for day in range(today - args.verify + 1, today + 1):
+            began = time.perf_counter()
+            stats.advance(conn, day_to_date(day))
+            advance_time += time.perf_counter() - began
+            if rng.random() < 0.5:
+                edited = day - rng.randint(1, RollingStats.WINDOW + 5)
+                conn.execute("UPDATE daily_totals SET minutes = minutes + ? WHERE day = ?", (rng.randint(-30, 90), edited))
+                conn.execute("UPDATE hour_buckets SET seconds = seconds + ? WHERE day = ?", (rng.randint(0, 3600), edited))
+                stats.update_day(conn, edited)
+            expected = rolling_stats_brute_force(conn, day)
+            actual = (stats.sum_short, stats.sum_long, stats.hour_sums, stats.month_closed)
+            steps += 1
+            if actual != expected:
+                mismatches += 1
+                print(f"  {day_to_date(day)}: running {actual[:2] + actual[3:]} != recount {expected[:2] + expected[3:]}")
+        conn.rollback()
+        print(f"Verified {steps} days: {mismatches} mismatches; advance {advance_time / max(steps, 1) * 1e6:.0f} us/day")
+        conn.close()
+        return 1 if mismatches else 0
+    conn.close()
+    return 0
+
+# Lengths the simulator picks from, in minutes
+SIMULATED_DURATIONS = (5, 15, 25, 25, 50, 90, 240)
+
+def simulate_sessions(engine, sessions, rng, per_day=6, pause_rate=0.3, stop_rate=0.15, late_rate=0.1,
+                      complete=None):
+    """Push `sessions` sessions through `engine`'s real code path on its SimulatedClock.
+
+    Each day starts around 08:00 with a few sessions separated by breaks;
+    some are paused (once or twice) and resumed, some stopped early, and
+    the last of a day may start late enough to run past midnight. The
+    countdown loop runs inline, waking exactly when the app's timer thread
+    would. Returns {session id: (start datetime, focused seconds, paused
+    seconds)}: what the simulation did, for verify_simulation().
+    `complete` handles a session that runs out (default engine.complete;
+    the soak test passes the window's handler).
+    """
+    clock = engine.clock
+    categories = engine.categories.names()
+    # Midnight is noticed where the app notices it: on the next timer tick
+    engine.on_checkpoint = lambda: engine.day_changed() and engine.roll_over()
+    engine.on_complete = complete or engine.complete
+    expected = {}
+    engine.roll_over()
+    while len(expected) < sessions:
+        today = clock.today()
+        for number in range(min(rng.randint(1, 2 * per_day - 1), sessions - len(expected))):
+            if number and clock.today() == today:
+                clock.advance(rng.randint(60, 1800))
+            last = number == per_day - 1 or len(expected) == sessions - 1
+            if last and rng.random() < late_rate and clock.today() == today:
+                evening = datetime.datetime.combine(today, datetime.time(23)) + datetime.timedelta(
+                    seconds=rng.randint(0, 3599))
+                if evening > clock.now():
+                    clock.advance((evening - clock.now()).total_seconds())
+            engine.session_duration = rng.choice(SIMULATED_DURATIONS)
+            total = engine.session_duration * 60
+            focus = rng.randint(1, total - 1) if rng.random() < stop_rate else total
+            started, start_time = clock.monotonic(), clock.now().replace(microsecond=0)
+            generation = engine.start(rng.choice(categories), note=f"simulated {len(expected)}",
+                                      tags=rng.choice(("", "course:calc2", "project:thesis library")))
+            # Pauses at whole focused seconds before the end, each shifting what follows
+            offset = paused = 0
+            count = sum(rng.random() < pause_rate for _ in range(2)) if focus > 2 else 0
+            for at in sorted(rng.sample(range(1, focus), count)):
+                length = rng.randint(30, 1800)
+                clock.at(started + at + offset, engine.pause)
+                clock.at(started + at + offset + length, engine.resume)
+                offset += length
+                paused += length
+            if focus < total:
+                clock.at(started + focus + offset, lambda: engine.stop(f"simulated {len(expected)}"))
+            expected[engine.current_session_id] = (start_time, focus, paused)
+            engine.run_timer(generation)
+            engine.reset()
+            if engine.day_changed():
+                engine.roll_over()
+        # Next morning, between 07:30 and 08:30
+        morning = datetime.datetime.combine(clock.today() + datetime.timedelta(days=1), datetime.time(7, 30))
+        clock.advance((morning - clock.now()).total_seconds() + rng.randint(0, 3600))
+        engine.roll_over()
+    return expected
+
+def verify_simulation(engine, expected):
+    """Compare what simulate_sessions() did with what the database and the engine's counters hold.
+
+    Returns a list of problems (empty when everything matches).
+    """
+    conn = engine.conn
+    problems = []
+    rows = {session_id: row for session_id, *row in conn.execute(
+        "SELECT id, day, completed, paused, start_ts, end_ts FROM sessions WHERE id IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(expected)),))}
+    for session_id, (start_time, focus, paused) in expected.items():
+        row = rows.get(session_id)
+        # Through unix time: a session across a DST change ends at a shifted wall-clock time
+        end_time = datetime.datetime.fromtimestamp(start_time.timestamp() + focus + paused)
+        wanted = [epoch_day(start_time.date()), focus // 60, paused, local_seconds(start_time), local_seconds(end_time)]
+        if row != wanted:
+            problems.append(f"session {session_id}: (day, completed, paused, start_ts, end_ts) {row} != {wanted}")
+    # Rollups against recounts from the sessions
+    recount = conn.execute("""
+        SELECT day, category_id, SUM(completed), COUNT(*) FROM sessions GROUP BY day, category_id
+        EXCEPT SELECT day, category_id, minutes, sessions FROM daily_totals
+    """).fetchall()
+    if recount:
+        problems.append(f"daily_totals differs from the sessions on {len(recount)} (day, category) rows")
+    bucket_seconds = conn.execute("SELECT COALESCE(SUM(seconds), 0) FROM hour_buckets").fetchone()[0]
+    if bucket_seconds != sum(focus for _, focus, _ in expected.values()):
+        problems.append(f"hour_buckets hold {bucket_seconds} s, sessions focused "
+                        f"{sum(focus for _, focus, _ in expected.values())} s")
+    # The day-based state the app shows
+    today = epoch_day(engine.clock.today())
+    persisted = conn.execute("SELECT COALESCE(SUM(minutes), 0) FROM daily_totals WHERE day = ?", (today,)).fetchone()[0]
+    if engine.today_minutes() != persisted:
+        problems.append(f"today's counter {engine.today_minutes()} != daily_totals {persisted}")
+    stats = engine.rolling_stats
+    actual = (stats.sum_short, stats.sum_long, stats.hour_sums, stats.month_closed)
+    if actual != rolling_stats_brute_force(conn, today):
+        problems.append("rolling statistics differ from a recount")
+    goals = GoalBitmap.load(conn)
+    first = conn.execute("SELECT MIN(day) FROM daily_totals").fetchone()[0]
+    minutes = dict(conn.execute("SELECT day, SUM(minutes) FROM daily_totals GROUP BY day"))
+    wrong = [day for day in range(first if first is not None else today, today)
+             if goals.calendar(day, day)[0] != (minutes.get(day, 0) >= goal_for_day(conn, day))]
+    if wrong:
+        problems.append(f"goal-met bits wrong on {len(wrong)} days, first {day_to_date(wrong[0])}")
+    return problems
+
+def cli_simulate(argv):
+    """Run thousands of sessions, pauses and midnights through the timer and persistence on a simulated clock"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py simulate", description=cli_simulate.__doc__)
+    parser.add_argument("--sessions", type=int, default=2000, help="sessions to run (default: 2000)")
+    parser.add_argument("--per-day", type=int, default=6, help="average sessions per day (default: 6)")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=datetime.date(2025, 1, 1),
+                        help="first simulated day (default: 2025-01-01)")
+    parser.add_argument("--visible", action="store_true", help="tick every second, as with the window on screen")
+    parser.add_argument("--seed", type=int, default=49, help="random seed")
+    parser.add_argument("--db", help="database to write to (default: a temporary one, deleted afterwards)")
+    args = parser.parse_args(argv)
+    if args.sessions < 1 or args.per_day < 1:
+        parser.error("--sessions and --per-day must be at least 1")
+
+    directory = None if args.db else tempfile.mkdtemp()
+    path = args.db or os.path.join(directory, "focuspro.db")
+    try:
+        conn = connect_database(path)
+        if not args.db:
+            # A throwaway database: measure the code, not the disk's flush latency
+            conn.execute("PRAGMA journal_mode = MEMORY")
+            conn.execute("PRAGMA synchronous = OFF")
+        clock = SimulatedClock(datetime.datetime.combine(args.start, datetime.time(8)))
+        engine = FocusSessionEngine(conn, CategoryCache(conn), clock)
+        engine.visible = args.visible
+        started, cpu_started = time.perf_counter(), time.process_time()
+        expected = simulate_sessions(engine, args.sessions, random.Random(args.seed), args.per_day)
+        wall, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+        problems = verify_simulation(engine, expected)
+
+        pauses = conn.execute("SELECT COUNT(*) FROM session_events WHERE kind = ?", (EVENT_PAUSE,)).fetchone()[0]
+        events = conn.execute("SELECT COUNT(*) FROM session_events").fetchone()[0]
+        overnight = sum(start.date() != datetime.date.fromtimestamp(start.timestamp() + focus + paused)
+                        for start, focus, paused in expected.values())
+        timed = sum(focus + paused for _, focus, paused in expected.values())
+        print(f"{len(expected)} sessions over {(clock.today() - args.start).days} simulated days: "
+              f"{pauses} pauses, {overnight} past midnight, {engine.timer_wakeups} timer wakeups, {events} events")
+        print(f"{wall:.2f} s wall, {cpu:.2f} s CPU: {len(expected) / wall:.0f} sessions/s; "
+              f"{timed / 3600:.0f} h of running timers, {timed / wall:.0f}x real time")
+        for problem in problems[:20]:
+            print(f"  {problem}")
+        print(f"Verified against recounts: {len(problems)} problems")
+        conn.close()
+        return 1 if problems else 0
+    finally:
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+def process_usage():
+    """(resident bytes, threads, open file descriptors) of this process.
+
+    Threads are the OS's count where it is readable (so native ones too);
+    on Windows descriptors are kernel handles, on macOS memory is the peak.
+    """
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class MemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+        kernel32, psapi = ctypes.WinDLL("kernel32"), ctypes.WinDLL("psapi")
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        kernel32.GetProcessHandleCount.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD)]
+        psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(MemoryCounters), wintypes.DWORD]
+        process = kernel32.GetCurrentProcess()
+        counters = MemoryCounters(cb=ctypes.sizeof(MemoryCounters))
+        handles = wintypes.DWORD()
+        psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+        kernel32.GetProcessHandleCount(process, ctypes.byref(handles))
+        return counters.WorkingSetSize, threading.active_count(), handles.value
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+        rss = int(status["VmRSS"].split()[0]) * 1024
+        return rss, int(status["Threads"]), len(os.listdir("/proc/self/fd"))
+    import resource
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, threading.active_count(),
+            len(os.listdir("/dev/fd")))
+
+def tk_usage(root):
+    """Live Tk objects under `root`: widgets, canvas items, pending after() calls and Tcl commands"""
+    widgets = items = 0
+    pending = [root]
+    while pending:
+        widget = pending.pop()
+        widgets += 1
+        if widget.winfo_class() == "Canvas":
+            items += len(widget.find_all())
+        pending.extend(widget.winfo_children())
+    return {
+        "widgets": widgets,
+        "canvas items": items,
+        "after calls": len(root.tk.splitlist(root.tk.call("after", "info"))),
+        "tcl commands": len(root.tk.splitlist(root.tk.call("info", "commands"))),
+    }
+
+def start_virtual_display():
+    """Start Xvfb and point DISPLAY at it; None when Xvfb is not installed"""
+    if not shutil.which("Xvfb"):
+        return None
+    read, write = os.pipe()
+    process = subprocess.Popen(["Xvfb", "-displayfd", str(write), "-screen", "0", "1280x800x24", "-nolisten", "tcp"],
+                               pass_fds=(write,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write)
+    with os.fdopen(read) as pipe:
+        number = pipe.readline().strip()  # Written once the server accepts connections
+    if not number:
+        process.kill()
+        return None
+    os.environ["DISPLAY"] = f":{number}"
+    return process
+
+def poke_instance_server(port):
+    """What later launches and stray clients send: a focus request, garbage, and nothing at all"""
+    messages = (b"focus", b"GET / HTTP/1.0\r\n\r\n", b"")
+    for message in messages:
+        try:
+            with socket.create_connection(("localhost", port), timeout=1) as s:
+                s.sendall(message)
+                s.shutdown(socket.SHUT_WR)
+                s.recv(1)  # Until the server has dealt with it and hung up
+        except OSError:
+            pass  # Shows up as a connection the server did not answer
+    return len(messages)
+
+def cli_soak(argv):
+    """Run weeks of simulated use through the engine (and the window, given a display) and fail on resource growth"""
+    parser = argparse.ArgumentParser(prog="FocusPro.py soak", description=cli_soak.__doc__)
+    parser.add_argument("--weeks", type=int, default=8, help="simulated weeks; the first is the baseline (default: 8)")
+    parser.add_argument("--per-day", type=int, default=6, help="average sessions per day (default: 6)")
+    parser.add_argument("--no-ui", action="store_true", help="drive only the engine, even where a display is available")
+    parser.add_argument("--max-rss-mb", type=float, default=16, help="allowed resident memory growth (default: 16)")
+    parser.add_argument("--max-threads", type=int, default=1, help="allowed thread count growth (default: 1)")
+    parser.add_argument("--max-fds", type=int, default=4, help="allowed open descriptor growth (default: 4)")
+    parser.add_argument("--max-tk", type=int, default=20,
+                        help="allowed growth of each Tk count: widgets, canvas items, after calls, Tcl commands "
+                             "(default: 20)")
+    parser.add_argument("--seed", type=int, default=50, help="random seed")
+    args = parser.parse_args(argv)
+    if args.weeks < 2 or args.per_day < 1:
+        parser.error("--weeks must be at least 2 and --per-day at least 1")
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")  # Completion sounds load and play, silently
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "focuspro.db")
+    clock = SimulatedClock(datetime.datetime.combine(datetime.date.today(), datetime.time(8)))
+    display = app = None
+    if not args.no_ui:
+        if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+            display = start_virtual_display()
+        try:
+            app = FocusSessionApp(path, clock)
+        except TclError as e:
+            print(f"No display ({e}); soaking the engine only")
+
+    if app:
+        # The window builds itself from an after() callback
+        deadline = time.monotonic() + 30
+        while not hasattr(app, "engine"):
+            if time.monotonic() > deadline:
+                raise RuntimeError("The window did not finish starting")
+            app.root.update()
+            time.sleep(0.05)
+        conn, engine, notifier = app.conn, app.engine, app.notifier
+        notifier.backends[0] = LocalStubBackend()  # Not thousands of desktop notifications
+        # Draw every tick, as for a window on screen; a virtual display has no focus to lose
+        app.on_window_visibility = lambda event=None: None
+        engine.on_tick = app.update_timer_display
+        complete = app.session_completed
+    else:
+        conn = connect_database(path)
+        engine = FocusSessionEngine(conn, CategoryCache(conn), clock)
+        engine.visible = False
+        notifier = NotificationService([
+            LocalStubBackend(),
+            SoundBackend(os.path.join(os.path.dirname(os.path.abspath(__file__)), "focuspro.wav")),
+        ], coalesce_seconds=0)
+
+        def complete():
+            engine.complete()
+            notifier.notify("Focus Session Complete!", f"Great job! You completed a {engine.session_duration} minute session.")
+    # A throwaway database: measure the code, not the disk's flush latency
+    conn.commit()
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    # Now and then a focus request fails, as bring_window_to_front can
+    focus_requests = []
+    def bring_to_front():
+        focus_requests.append(clock.now())
+        if len(focus_requests) % 7 == 1:
+            raise OSError("window not found")
+    server = SingleInstanceServer(bring_to_front, port=0).start()
+    while not server.binds:
+        time.sleep(0.01)
+
+    rng = random.Random(args.seed)
+    first_day = clock.today()
+    expected = {}
+    samples = []
+    sent = 0
+    started = time.perf_counter()
+    try:
+        for week in range(args.weeks):
+            # About a week: per_day * 7 sessions, some days busier than others
+            expected.update(simulate_sessions(engine, args.per_day * 7, rng, args.per_day, complete=complete))
+            for _ in range(7):
+                sent += poke_instance_server(server.port)
+                if app:
+                    for view in ("history", "chart", "timer", "data", "focus"):
+                        app.switch_view(view)
+                    app.root.update()
+            gc.collect()
+            rss, threads, fds = process_usage()
+            sample = {"RSS MB": rss / 2 ** 20, "threads": threads, "fds": fds}
+            if app:
+                sample.update(tk_usage(app.root))
+            samples.append((clock.today(), len(expected), sample))
+        wall = time.perf_counter() - started
+        problems = verify_simulation(engine, expected)
+    finally:
+        server.close()
+        if app:
+            app.on_closing()
+        else:
+            notifier.close()
+            conn.close()
+        if display:
+            display.terminate()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{'day':<12}{'sessions':>9}" + "".join(f"{name:>14}" for name in samples[0][2]))
+    for day, sessions, sample in samples:
+        print(f"{day.isoformat():<12}{sessions:>9}" + "".join(
+            f"{value:>14.1f}" if isinstance(value, float) else f"{value:>14}" for value in sample.values()))
+    limits = {"RSS MB": args.max_rss_mb, "threads": args.max_threads, "fds": args.max_fds}
+    baseline, final = samples[0][2], samples[-1][2]
+    for name, value in final.items():
+        growth = value - baseline[name]
+        if growth > limits.get(name, args.max_tk):
+            problems.append(f"{name} grew by {growth:g} after the first week (limit {limits.get(name, args.max_tk):g})")
+    if server.binds != 1:
+        problems.append(f"the single-instance server bound its port {server.binds} times")
+    if server.handled != sent:
+        problems.append(f"the single-instance server answered {server.handled} of {sent} connections")
+    print(f"{len(expected)} sessions over {(clock.today() - first_day).days} simulated days "
+          f"({'window and engine' if app else 'engine only'}) in {wall:.1f} s; {sent} single-instance connections, "
+          f"{len(focus_requests)} focus requests")
+    for problem in problems[:20]:
+        print(f"  {problem}")
+    print(f"Soak: {len(problems)} problems")
+    return 1 if problems else 0
+
+# Developer commands: `python FocusPro.py <command> [options]`
+CLI_COMMANDS = {
+    "bench-timers": bench_timers,
+    "bench-ticks": bench_ticks,
+    "bench-notify": bench_notify,
+    "bench-analytics": bench_analytics,
+    "bench-chart": bench_chart,
+    "bench-tags": bench_tags,
+    "export": cli_export,
+    "import": cli_import,
+    "compact": cli_compact,
+    "sync": cli_sync,
+    "team-report": cli_team_report,
+    "backup": cli_backup,
+    "goals": cli_goals,
+    "report": cli_report,
+    "tags": cli_tags,
+    "fetch-assets": cli_fetch_assets,
+    "stats": cli_stats,
+    "simulate": cli_simulate,
+    "soak": cli_soak,
+}
+
+
 if __name__ == "__main__":
+    # Worker processes of the frozen .exe (team-report) must not start the app
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS:
+        sys.exit(CLI_COMMANDS[sys.argv[1]](sys.argv[2:]))
+
     # Check if another instance is already running
     try:
         s = socket.create_connection(("localhost", FOCUSPRO_PORT), timeout=1)
@@ -0,0 +1,87 @@
+"""RollingStats' running sums against rolling_stats_brute_force on a random history"""
+import datetime
+import pathlib
+import random
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from FocusPro import RollingStats, connect_database, day_to_date, epoch_day, rolling_stats_brute_force
+
+START = epoch_day(datetime.date(2024, 1, 10))
+DAYS = 150
+
+
+def random_history(seed):
+    """An in-memory database with random daily_totals and hour_buckets for DAYS days from START"""
+    rng = random.Random(seed)
+    conn = connect_database(":memory:")
+    categories = [row[0] for row in conn.execute("SELECT id FROM categories")]
+    for day in range(START - RollingStats.WINDOW, START + DAYS):
+        if rng.random() < 0.2:
+            continue  # A day off
+        for category_id in rng.sample(categories, rng.randint(1, len(categories))):
+            conn.execute("INSERT INTO daily_totals (day, category_id, minutes, sessions) VALUES (?, ?, ?, ?)",
+                         (day, category_id, rng.randint(10, 300), rng.randint(1, 6)))
+            for hour in rng.sample(range(24), rng.randint(1, 4)):
+                conn.execute("INSERT INTO hour_buckets (day, hour, category_id, seconds) VALUES (?, ?, ?, ?)",
+                             (day, hour, category_id, rng.randint(60, 3600)))
+    conn.commit()
+    return conn, rng
+
+
+def edit_day(conn, rng, day):
+    conn.execute("UPDATE daily_totals SET minutes = minutes + ? WHERE day = ?", (rng.randint(-5, 90), day))
+    conn.execute("UPDATE hour_buckets SET seconds = seconds + ? WHERE day = ?", (rng.randint(0, 1800), day))
+
+
+def running(stats):
+    return stats.sum_short, stats.sum_long, stats.hour_sums, stats.month_closed
+
+
+def test_advance_day_by_day_with_edits():
+    conn, rng = random_history(1)
+    stats = RollingStats()
+    stats.load(conn, day_to_date(START))
+    assert running(stats) == rolling_stats_brute_force(conn, START)
+    for day in range(START + 1, START + DAYS):
+        stats.advance(conn, day_to_date(day))
+        # Edits inside the window, and some just outside it that must not count
+        for _ in range(rng.randint(0, 2)):
+            edited = day - rng.randint(1, RollingStats.WINDOW + 5)
+            edit_day(conn, rng, edited)
+            stats.update_day(conn, edited)
+        assert running(stats) == rolling_stats_brute_force(conn, day), day_to_date(day)
+
+
+def test_advance_over_gaps():
+    conn, rng = random_history(2)
+    stats = RollingStats()
+    stats.load(conn, day_to_date(START))
+    day = START
+    while day < START + DAYS:
+        # Several days at once (the app was closed), sometimes longer than the window
+        day += rng.choice((1, 2, 5, RollingStats.WINDOW, RollingStats.WINDOW + 3))
+        stats.advance(conn, day_to_date(day))
+        assert running(stats) == rolling_stats_brute_force(conn, day), day_to_date(day)
+
+
+def test_month_total_restarts_on_the_first():
+    conn, _ = random_history(3)
+    stats = RollingStats()
+    first = epoch_day(datetime.date(2024, 3, 1))
+    stats.load(conn, day_to_date(first - 3))
+    stats.advance(conn, day_to_date(first))
+    assert stats.month_closed == 0
+    stats.advance(conn, day_to_date(first + 1))
+    assert stats.month_closed == rolling_stats_brute_force(conn, first + 1)[3] > 0
+
+
+def test_averages_divide_the_sums():
+    conn, _ = random_history(4)
+    stats = RollingStats()
+    stats.load(conn, day_to_date(START + 40))
+    short, long = stats.averages()
+    expected = rolling_stats_brute_force(conn, START + 40)
+    assert short == expected[0] / RollingStats.SHORT
+    assert long == expected[1] / RollingStats.WINDOW